@@ -0,0 +1,365 @@
+import math
+import time
+
+import pulp
+
+from backends import pulp_solver
+from greedy import coverage_ok, greedy_schedule
+from patterns import best_pattern, pattern_schedule
+from progress import reached
+from shift_model import build_shift_model, extract_schedule, schedule_metrics
+from warm_start import repair_schedule, schedule_patterns
+
+# Column generation over weekly patterns. A group is a set of interchangeable
+# workers (one worker, or a contract class in aggregated.py); the master picks
+# how many workers of each group follow each pattern, and patterns are priced
+# by the DP in patterns.py. A dive rounds the LP to integer counts and CBC
+# polishes over every generated pattern.
+
+BIG_M = 1000.0
+
+
+def build_pattern_master(
+    groups, D, T, Demand,
+    Max_Deviation=2.5,
+    require_min_staff=True,
+    name="Shift_Scheduling_Patterns",
+):
+    """
+    LP master over weekly patterns, without columns yet (see add_pattern).
+
+    - groups[c] = (size, min_h, max_h, weekend_only); each of the `size`
+      workers of group c gets exactly one pattern of c
+    The cap and min-staff rows carry a BIG_M artificial so the master is always
+    feasible; a positive artificial means the columns cannot meet those rows.
+    Returns (model, refs).
+    """
+    model = pulp.LpProblem(name, pulp.LpMinimize)
+    under = pulp.LpVariable.dicts("under", (D, T), lowBound=0)
+    over = pulp.LpVariable.dicts("over", (D, T), lowBound=0)
+    art = pulp.LpVariable.dicts("art", (D, T), lowBound=0)
+    art_min = pulp.LpVariable.dicts("art_min", (D, T), lowBound=0)
+
+    model += (pulp.lpSum(under[d][t] + over[d][t] for d in D for t in T)
+              + BIG_M * pulp.lpSum(art[d][t] + art_min[d][t] for d in D for t in T))
+
+    cover_rows, min_rows, conv_rows = {}, {}, {}
+    for d in D:
+        for idx, t in enumerate(T):
+            cover_rows[(d, t)] = under[d][t] - over[d][t] == Demand[d][idx]
+            model += cover_rows[(d, t)], f"cover_{d}_{t}"
+            model += under[d][t] + over[d][t] - art[d][t] <= Max_Deviation, f"cap_{d}_{t}"
+            if require_min_staff:
+                # staffed >= 1, written through the cover row (staffed = demand - under + over)
+                min_rows[(d, t)] = over[d][t] - under[d][t] + art_min[d][t] >= 1 - Demand[d][idx]
+                model += min_rows[(d, t)], f"min_{d}_{t}"
+    for i, c in enumerate(groups):
+        conv_rows[c] = pulp.LpAffineExpression() == groups[c][0]
+        model += conv_rows[c], f"conv_{i}"
+
+    return model, {"D": list(D), "T": list(T), "groups": groups,
+                   "columns": {c: [] for c in groups}, "lam": {c: [] for c in groups},
+                   "under": under, "over": over, "art": art, "art_min": art_min,
+                   "cover": cover_rows, "min": min_rows, "conv": conv_rows}
+
+
+def add_pattern(refs, c, pattern):
+    """Add pattern as a new column of group c; returns its variable."""
+    i = list(refs["groups"]).index(c)
+    k = len(refs["columns"][c])
+    var = pulp.LpVariable(f"lam_{i}_{k}", 0, refs["groups"][c][0])
+    for d, se in zip(refs["D"], pattern):
+        if se is None:
+            continue
+        for t in refs["T"]:
+            if se[0] <= t <= se[1]:
+                refs["cover"][(d, t)].addInPlace(var)
+    refs["conv"][c].addInPlace(var)
+    refs["columns"][c].append(pattern)
+    refs["lam"][c].append(var)
+    return var
+
+
+def artificial_total(refs):
+    """How far the master is from meeting the cap / min-staff rows."""
+    return sum((pulp.value(refs["art"][d][t]) or 0) + (pulp.value(refs["art_min"][d][t]) or 0)
+               for d in refs["D"] for t in refs["T"])
+
+
+def lam_values(refs):
+    return {c: [pulp.value(v) or 0.0 for v in refs["lam"][c]] for c in refs["lam"]}
+
+
+def generate_columns(
+    model, refs, S,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_days=(5, 6, 7),
+    deadline=None,
+    max_rounds=500,
+    per_contract=5,
+    backend="auto",
+    stop=None,
+):
+    """
+    Column generation: solve the LP master, price one pattern per contract
+    with the slot duals, add it to the (at most per_contract) most improving
+    groups of that contract, repeat, until no pattern improves, the
+    deadline passes or stop (threading.Event) is set.
+    Returns the Lagrangian bound of the last round (valid even if generation
+    stops early, as long as no lowBound was raised on the columns).
+    """
+    D, T, groups = refs["D"], refs["T"], refs["groups"]
+    allowed = {c: (list(weekend_days) if g[3] else None) for c, g in groups.items()}
+    rules = dict(rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings)
+    known = {c: set(refs["columns"][c]) for c in groups}
+
+    bound = 0.0
+    for _ in range(max_rounds):
+        model.solve(pulp_solver(backend))
+        # Value of one more worker on slot (d,t)
+        pi = {dt: row.pi or 0.0 for dt, row in refs["cover"].items()}
+        day_value = {d: {se: sum(pi[(d, t)] for t in T if se[0] <= t <= se[1]) for se in S} for d in D}
+
+        bound = pulp.value(model.objective)
+        priced = {}
+        best = {}
+        for c, (size, min_h, max_h, weekend) in groups.items():
+            # Groups with the same contract share one pricing problem
+            contract = (min_h, max_h, weekend)
+            if contract not in priced:
+                priced[contract] = best_pattern(day_value, D, S, min_h, max_h, allowed_days=allowed[c], **rules)
+            value, pattern = priced[contract]
+            reduced = -value - (refs["conv"][c].pi or 0.0)
+            if reduced < -1e-6:
+                bound += size * reduced
+                if pattern not in known[c]:
+                    best.setdefault(contract, []).append((reduced, c, pattern))
+        # Only the most improving groups of each contract get the column
+        for found in best.values():
+            for _, c, pattern in sorted(found, key=lambda f: f[0])[:per_contract]:
+                known[c].add(pattern)
+                add_pattern(refs, c, pattern)
+        if not best or (deadline is not None and time.time() > deadline) or (stop is not None and stop.is_set()):
+            break
+    return max(bound, 0.0)
+
+
+def dive(model, refs, S, deadline=None, rounds=5, backend="auto", stop=None, **rules):
+    """
+    Diving heuristic: raise the lowBound of the fractional pattern with the
+    largest LP value (plus any within 0.1 of their next integer) to the next
+    integer and re-run a few rounds of column generation, until the LP master
+    is integral. A rounding that forces the artificials is undone and not tried again.
+    Returns {c: [count per pattern]} or None if the dive gets stuck.
+    """
+    groups = refs["groups"]
+    tried = set()
+    values = lam_values(refs)
+    while True:
+        frac = [(v, c, k) for c in values for k, v in enumerate(values[c]) if abs(v - round(v)) > 1e-6]
+        if not frac:
+            return {c: [int(round(v)) for v in values[c]] for c in values}
+        frac = [f for f in frac if (f[1], f[2]) not in tried]
+        if not frac or (deadline is not None and time.time() > deadline) or (stop is not None and stop.is_set()):
+            return None
+        _, c, k = max(frac, key=lambda f: f[0])
+        fixes = [(c, k)] + [(c2, k2) for v, c2, k2 in frac if (c2, k2) != (c, k) and math.ceil(v) - v < 0.1]
+        previous = {c2: [var.lowBound for var in refs["lam"][c2]] for c2 in groups}
+        for c2, k2 in fixes:
+            var = refs["lam"][c2][k2]
+            fixed = sum(v.lowBound for v in refs["lam"][c2]) - var.lowBound
+            # Roundings within one group must still fit the group size
+            if fixed + math.ceil(values[c2][k2]) <= groups[c2][0]:
+                var.lowBound = math.ceil(values[c2][k2])
+        generate_columns(model, refs, S, deadline=deadline, max_rounds=rounds, backend=backend, stop=stop, **rules)
+        if artificial_total(refs) > 1e-6:
+            # Dead end: drop the roundings and never pick this pattern again
+            for c2 in groups:
+                for var, lb in zip(refs["lam"][c2], previous[c2]):
+                    var.lowBound = lb
+            tried.add((c, k))
+            model.solve(pulp_solver(backend))
+        values = lam_values(refs)
+
+
+def solve_pattern_groups(
+    groups, members, D, T, S, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=None,
+    seeds=None,
+    backend="auto",
+    gap=None,
+    stop=None,
+):
+    """
+    Column generation at the root, a dive to integer pattern counts, then the
+    integer master over every generated column (warm-started from the dive).
+    seeds[c]: the patterns of group c's members in a known roster (e.g. the
+    greedy one); they are columns from the start, and the integer master
+    starts from them when the dive gets stuck. gap stops the integer master
+    at that relative gap; stop (threading.Event) ends the generation and the
+    dive and skips the integer master.
+    Patterns are handed to members[c] in order.
+    Returns (status, schedule, lower_bound); schedule is None if some group has
+    no legal pattern ("Infeasible"), the columns cannot meet the cap /
+    min-staff rows or stop was set ("Not Solved").
+    """
+    D = list(D); T = list(T)
+    start = time.time()
+    pricing = dict(rest_pairs=rest_pairs, closing_slot=closing_slot,
+                   max_closings=max_closings, weekend_days=weekend_days)
+    model, refs = build_pattern_master(groups, D, T, Demand, Max_Deviation=Max_Deviation,
+                                       require_min_staff=require_min_staff)
+    # Seed every group with any legal pattern
+    zero = {d: {se: 0.0 for se in S} for d in D}
+    for c, (_, min_h, max_h, weekend) in groups.items():
+        _, pattern = best_pattern(zero, D, S, min_h, max_h, rest_pairs=rest_pairs,
+                                  closing_slot=closing_slot, max_closings=max_closings,
+                                  allowed_days=list(weekend_days) if weekend else None)
+        if pattern is None:
+            return "Infeasible", None, None
+        add_pattern(refs, c, pattern)
+    for c, patterns in (seeds or {}).items():
+        for pattern in dict.fromkeys(patterns):
+            if pattern not in refs["columns"][c]:
+                add_pattern(refs, c, pattern)
+
+    deadline = None if time_limit is None else start + 0.6 * time_limit
+    lower_bound = generate_columns(model, refs, S, deadline=deadline, backend=backend, stop=stop, **pricing)
+    counts = dive(model, refs, S, deadline=deadline, backend=backend, stop=stop, **pricing)
+    if stop is not None and stop.is_set():
+        return "Not Solved", None, lower_bound
+    if counts is None and seeds is not None:
+        counts = {c: [seeds[c].count(pattern) for pattern in refs["columns"][c]] for c in groups}
+
+    # Integer master over all columns
+    for c in groups:
+        for k, var in enumerate(refs["lam"][c]):
+            var.lowBound = 0
+            var.cat = pulp.LpInteger
+            if counts is not None:
+                var.setInitialValue(counts[c][k] if k < len(counts[c]) else 0)
+    remaining = None if time_limit is None else max(1, int(time_limit - (time.time() - start)))
+    model.solve(pulp_solver(backend, time_limit=remaining, gap=gap, warm_start=counts is not None))
+    objective = pulp.value(model.objective)
+    if objective is None or artificial_total(refs) > 1e-6:
+        return "Not Solved", None, lower_bound
+
+    schedule = []
+    for c in groups:
+        assigned = []
+        for pattern, var in zip(refs["columns"][c], refs["lam"][c]):
+            assigned += [pattern] * int(round(pulp.value(var) or 0))
+        for w, pattern in zip(members[c], assigned):
+            schedule += pattern_schedule(w, pattern, D, T)
+    status = "Optimal" if objective <= lower_bound + 1e-6 else "Feasible"
+    return status, schedule, lower_bound
+
+
+def solve_worker_model(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    weekend_only=(),
+    time_limit=None,
+    backend="auto",
+    gap=None,
+    **rules
+):
+    """Per-worker lean MIP, used when the pattern master cannot meet the cap / min-staff rows."""
+    model, v = build_shift_model("Shift_Scheduling", W, D, T, S, MinHw, MaxHw, Demand,
+                                 weekend_only=weekend_only, **rules)
+    model.solve(pulp_solver(backend, time_limit=None if time_limit is None else max(1, int(time_limit)), gap=gap))
+    if pulp.LpStatus[model.status] in ("Infeasible", "Not Solved") or pulp.value(model.objective) is None:
+        return pulp.LpStatus[model.status], None
+    return pulp.LpStatus[model.status], extract_schedule(v, W, D, T, S)
+
+
+def solve_seeded(
+    groups, members, W, D, T, S, MinHw, MaxHw, Demand,
+    weekend_only=(),
+    time_limit=None,
+    initial_schedule=None,
+    backend="auto",
+    gap=None,
+    stop=None,
+    **rules
+):
+    """
+    Body of the pattern engines (solve_columns, aggregated.py). The weekly
+    patterns of `initial_schedule` (repaired) or the greedy roster seed the
+    groups; the per-worker MIP takes over if the patterns cannot meet the cap /
+    min-staff rows, and the seed roster is returned if the result is worse
+    (or if stop is set before the integer master).
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    start = time.time()
+    if initial_schedule is not None:
+        known = repair_schedule(initial_schedule, W, D, T, S, MinHw, MaxHw, Demand,
+                                weekend_only=weekend_only, **rules)
+    else:
+        known = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, weekend_only=weekend_only, **rules)[2]
+    seeds = None
+    if known:
+        patterns = schedule_patterns(known, W, D)
+        seeds = {c: [patterns[w] for w in members[c]] for c in groups}
+    status, schedule, lower_bound = solve_pattern_groups(groups, members, D, T, S, Demand, time_limit=time_limit,
+                                                         seeds=seeds, backend=backend, gap=gap, stop=stop,
+                                                         **rules)
+    if status == "Infeasible":
+        # Some group has no legal weekly roster at all
+        return status, None, [], {}
+    if schedule is None and not (stop is not None and stop.is_set()):
+        remaining = None if time_limit is None else time_limit - (time.time() - start)
+        status, schedule = solve_worker_model(W, D, T, S, MinHw, MaxHw, Demand, weekend_only=weekend_only,
+                                              time_limit=remaining, backend=backend, gap=gap, **rules)
+
+    best = (status, None, [], {})
+    if schedule is not None:
+        objective, metrics = schedule_metrics(schedule, D, T, Demand)
+        best = (status, objective, schedule, metrics)
+    if known:
+        objective, metrics = schedule_metrics(known, D, T, Demand)
+        if (coverage_ok(metrics, rules["Max_Deviation"], rules["require_min_staff"])
+                and (best[1] is None or objective < best[1] - 1e-9)):
+            best = ("Optimal" if reached(objective, lower_bound) else "Feasible", objective, known, metrics)
+    return best
+
+
+def solve_columns(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    initial_schedule=None,
+    backend="auto",
+    gap=None,
+    stop=None,
+):
+    """
+    Per-worker column generation: one column is one worker's full week.
+    "Feasible" means the rosters are valid but not proven optimal within
+    time_limit (seconds). Falls back to the per-worker MIP if the generated
+    rosters cannot meet the cap / min-staff rows. Each worker's column
+    starts from their week in `initial_schedule` or the greedy roster (see
+    solve_seeded); backend, gap and stop as in solve_pattern_groups.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T)
+    weekend_only = set(weekend_only)
+    groups = {w: (1, float(MinHw[w]), float(MaxHw[w]), w in weekend_only) for w in W}
+    return solve_seeded(groups, {w: [w] for w in W}, W, D, T, S, MinHw, MaxHw, Demand,
+                        weekend_only=weekend_only, time_limit=time_limit, initial_schedule=initial_schedule,
+                        backend=backend, gap=gap, stop=stop, Max_Deviation=Max_Deviation,
+                        rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings,
+                        weekend_days=weekend_days, require_min_staff=require_min_staff)
@@ -0,0 +1,201 @@
+import math
+
+import pulp
+
+from backends import pulp_solver
+from shift_model import extract_schedule, shifts_covering
+
+# Infeasibility diagnosis with elastic constraint groups. The lean model is
+# rebuilt with a slack on every row of the groups below, and each group
+# instance gets a binary "relaxed" flag that its slacks need. One MIP
+# minimises the number of relaxed groups (then the total slack), so the answer
+# is a smallest set of groups that must give way for a schedule to exist, with
+# how far each one has to move in the relaxed roster found. With every group
+# relaxed the model always has a solution (nobody works), so the diagnosis
+# itself cannot be infeasible. Once the solver has said "Infeasible" at least
+# one group must give way; with that row the count's bound starts at one.
+# A relaxed group weighs the largest total slack the model allows plus
+# GROUP_MARGIN, so one group fewer always lowers the objective by at least
+# GROUP_MARGIN whatever the slack; stopping at an absolute gap below that
+# proves the count smallest without also minimising the slack.
+#   hours[w]       MinHw / MaxHw of worker w
+#   rest_days[w]   the pair of consecutive days off
+#   rest_12h[w]    12h rest between a late and the next early slot
+#   closings[w]    max closing shifts
+#   cap            |staffed - demand| <= Max_Deviation (one raise for all slots)
+#   min_staff      at least one worker in every slot
+
+GROUPS = ("hours", "rest_days", "rest_12h", "closings", "cap", "min_staff")
+# Objective margin of one relaxed group over any total slack
+GROUP_MARGIN = 1000
+
+
+def build_elastic_model(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    infeasible=True,
+):
+    """
+    Lean model with slacks per group; returns (model, vars) with vars["relaxed"][(group, key)]
+    and vars["weight"], the objective weight of a relaxed group.
+    infeasible: the instance is known to be infeasible, so at least one group is relaxed.
+    """
+    W = list(W); D = list(D); T = list(T)
+    cover = shifts_covering(S, T)
+    rest_pairs = [(late, early) for (late, early) in rest_pairs if late in T and early in T]
+    if closing_slot not in T:
+        closing_slot = None
+    max_hours = len(D) * max(e - s + 1 for s, e in S)
+    # Largest deviation any headcount 0..len(W) can give
+    big = max(max(max(Demand[d]), len(W) - min(Demand[d])) for d in D)
+
+    model = pulp.LpProblem("Infeasibility_Diagnosis", pulp.LpMinimize)
+    b = pulp.LpVariable.dicts("b", (W, D, S), cat="Binary")
+    z = pulp.LpVariable.dicts("z", (W, range(1, 7)), cat="Binary")
+    under = pulp.LpVariable.dicts("under", (D, T), lowBound=0)
+    over = pulp.LpVariable.dicts("over", (D, T), lowBound=0)
+    y = {w: {d: pulp.lpSum(b[w][d][se] for se in S) for d in D} for w in W}
+    x = {w: {d: {t: pulp.lpSum(b[w][d][se] for se in cover[t]) for t in T} for d in D} for w in W}
+
+    keys = [(g, w) for g in ("hours", "rest_days", "rest_12h", "closings") for w in W]
+    keys += [("cap", None), ("min_staff", None)]
+    relaxed = {key: pulp.LpVariable(f"relaxed_{key[0]}_{i}", cat="Binary") for i, key in enumerate(keys)}
+    slack = {}
+    bounds = []
+
+    def elastic(key, index, bound):
+        s = pulp.LpVariable(f"slack_{key[0]}_{len(slack)}", lowBound=0)
+        slack[(key, index)] = s
+        bounds.append(bound)
+        model.addConstraint(s <= bound * relaxed[key])
+        return s
+
+    for w in W:
+        for d in D:
+            model += y[w][d] <= 1
+
+    # Weekly hours, rounded inwards to whole slots as in the lean model
+    for w in W:
+        hours = pulp.lpSum((se[1] - se[0] + 1) * b[w][d][se] for d in D for se in S)
+        key = ("hours", w)
+        low, high = math.ceil(MinHw[w] - 1e-9), math.floor(MaxHw[w] + 1e-9)
+        model += hours + elastic(key, "short", max(low, 0)) >= low
+        model += hours - elastic(key, "over", max(max_hours - high, 0)) <= high
+
+    # Pair of consecutive rest days
+    for w in W:
+        model += pulp.lpSum(z[w][d] for d in range(1, 7)) + elastic(("rest_days", w), "missing", 1) >= 1
+        for d in range(1, 7):
+            model += z[w][d] <= 1 - y[w][d]
+            model += z[w][d] <= 1 - y[w][d + 1]
+
+    # 12h rest
+    for w in W:
+        for d in range(1, 7):
+            for late, early in rest_pairs:
+                model += x[w][d][late] + x[w][d + 1][early] <= 1 + relaxed[("rest_12h", w)]
+
+    # Closing shifts
+    for w in W:
+        if closing_slot is not None:
+            model += pulp.lpSum(x[w][d][closing_slot] for d in D) - elastic(("closings", w), "extra", len(D)) \
+                <= max_closings
+        else:
+            model += relaxed[("closings", w)] == 0
+
+    # Demand balance, deviation cap and min staff per slot
+    raise_cap = elastic(("cap", None), "raise", max(big - Max_Deviation, 0))
+    for d in D:
+        for idx, t in enumerate(T):
+            staffed = pulp.lpSum(x[w][d][t] for w in W)
+            model += staffed + under[d][t] - over[d][t] == Demand[d][idx]
+            model += under[d][t] + over[d][t] - raise_cap <= Max_Deviation
+            if require_min_staff:
+                model += staffed + elastic(("min_staff", None), (d, t), 1) >= 1
+    if not require_min_staff:
+        model += relaxed[("min_staff", None)] == 0
+
+    # Weekend-only contracts stay hard: they define who may work when
+    for w in weekend_only:
+        for d in D:
+            if d not in weekend_days:
+                model += y[w][d] == 0
+
+    if infeasible:
+        model += pulp.lpSum(relaxed.values()) >= 1
+    weight = sum(bounds) + GROUP_MARGIN
+    model += weight * pulp.lpSum(relaxed.values()) + pulp.lpSum(slack.values())
+    return model, {"b": b, "relaxed": relaxed, "slack": slack, "x": x, "weight": weight}
+
+
+def _describe(key, amounts, hours, MinHw, MaxHw, Max_Deviation, max_closings):
+    group, who = key
+    if group == "hours":
+        return f"Worker {who}: no legal week has {MinHw[who]:g}-{MaxHw[who]:g} h " \
+               f"(the relaxed roster found gives {hours.get(who, 0)} h)."
+    if group == "rest_days":
+        return f"Worker {who}: cannot get two consecutive days off."
+    if group == "rest_12h":
+        return f"Worker {who}: needs a late shift followed by an early one (12h rest broken)."
+    if group == "closings":
+        return f"Worker {who}: needs {max_closings + round(amounts.get('extra', 0))} closing shifts " \
+               f"(max {max_closings})."
+    if group == "cap":
+        return f"Max_Deviation {Max_Deviation:g} is too tight " \
+               f"(the relaxed roster found reaches {Max_Deviation + amounts['raise']:.2f})."
+    slots = ", ".join(f"day {d} slot {t}" for (d, t), v in amounts.items() if v > 1e-6)
+    return f"Min-staff rule broken: {slots} left without staff."
+
+
+def diagnose_infeasibility(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    infeasible=True,
+    time_limit=30,
+    backend="auto",
+    msg=False,
+):
+    """
+    Smallest set of constraint groups to relax, from one solve of the elastic
+    model on the backend's PuLP solver (backends.pulp_solver).
+    Returns: diagnostics (list of str), relaxed [{"group", "key", "amounts"}],
+    schedule (list of (w,d,t)) of the relaxed roster
+    """
+    W = list(W); D = list(D); T = list(T)
+    model, v = build_elastic_model(W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+                                   rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings,
+                                   weekend_only=weekend_only, weekend_days=weekend_days,
+                                   require_min_staff=require_min_staff, infeasible=infeasible)
+    # Stop once the number of relaxed groups is proven smallest
+    model.solve(pulp_solver(backend, time_limit=time_limit, msg=msg, gap_abs=GROUP_MARGIN - 1))
+    if pulp.value(model.objective) is None:
+        return ["The diagnosis found no relaxed roster within the time limit."], [], []
+
+    relaxed = []
+    for key, flag in v["relaxed"].items():
+        if (flag.value() or 0) < 0.5:
+            continue
+        amounts = {index: round(s.value() or 0, 6) for (k, index), s in v["slack"].items() if k == key}
+        relaxed.append({"group": key[0], "key": key[1], "amounts": amounts})
+    relaxed.sort(key=lambda r: GROUPS.index(r["group"]))
+    schedule = extract_schedule(v, W, D, T, S)
+    hours = {}
+    for w, _, _ in schedule:
+        hours[w] = hours.get(w, 0) + 1
+    diagnostics = [_describe((r["group"], r["key"]), r["amounts"], hours, MinHw, MaxHw, Max_Deviation, max_closings)
+                   for r in relaxed]
+    if model.sol_status != pulp.LpSolutionOptimal:
+        diagnostics.append("(Diagnosis stopped at its time limit; a smaller set may exist.)")
+    return diagnostics, relaxed, schedule
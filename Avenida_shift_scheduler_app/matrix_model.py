@@ -0,0 +1,293 @@
+import math
+
+import numpy as np
+
+from warm_start import schedule_patterns
+
+# The lean model assembled straight into sparse arrays. Every row family is a
+# block of COO triplets generated with NumPy index arithmetic from the
+# shift-by-slot incidence matrix, so the build does no per-term Python work
+# and never creates PuLP expressions. Column layout: b[w][d][s] first (in
+# W, D, S order), then z[w][k] for k = 1..6, then under[d][t] and over[d][t].
+# The arrays go to CBC as an MPS file or straight to HiGHS (backends.py);
+# the rows are the same as build_shift_model's. With candidate shift lists
+# (reduction.py) the model is assembled in that layout and the b columns of
+# shifts not in a (worker, day) list are then dropped; mm["columns"] maps
+# the remaining columns to the full layout.
+
+INF = math.inf
+
+
+def _incidence(T, S):
+    """Boolean |S| x |T| matrix: shift s covers slot t."""
+    t = np.array(T)
+    start = np.array([se[0] for se in S])[:, None]
+    end = np.array([se[1] for se in S])[:, None]
+    return (start <= t) & (t <= end)
+
+
+def build_matrix_model(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    candidates=None,
+):
+    """
+    Lean weekly model as arrays: minimise c.x subject to
+    row_lower <= A x <= row_upper and lower <= x <= upper, where A is given
+    by COO triplets (rows, cols, vals) and integrality marks b and z.
+    Weekend-only workers get upper bound 0 on their weekday shifts.
+    candidates: {(w, d): [shifts]} keeps only those b columns.
+    Returns a dict with the arrays, their shape and the instance.
+    """
+    W = list(W); D = list(D); T = list(T); S = list(S)
+    rest_pairs = [(late, early) for (late, early) in rest_pairs if late in T and early in T]
+    if closing_slot not in T:
+        closing_slot = None
+    nW, nD, nT, nS = len(W), len(D), len(T), len(S)
+    C = _incidence(T, S)
+    length = C.sum(axis=1).astype(float)
+    day = {d: i for i, d in enumerate(D)}
+    pairs = list(range(1, 7))  # z[w][k]: days k and k+1 off, as in build_shift_model
+
+    n_b = nW * nD * nS
+    n_z = nW * len(pairs)
+    n_dev = nD * nT
+    n_cols = n_b + n_z + 2 * n_dev
+    z0, under0, over0 = n_b, n_b + n_z, n_b + n_z + n_dev
+    wd = np.arange(nW * nD)  # (w, d) in W, D order
+    w_of = np.repeat(np.arange(nW), len(pairs))
+    k_of = np.tile(np.arange(len(pairs)), nW)
+
+    blocks = []  # (rows, cols, vals) with rows numbered within the block
+    lower, upper = [], []
+
+    def add(rows, cols, vals, lo, hi):
+        offset = sum(len(r) for r in lower)
+        blocks.append((np.asarray(rows) + offset, np.asarray(cols), np.broadcast_to(vals, np.shape(cols))))
+        lower.append(np.broadcast_to(np.asarray(lo, float), (len_rows(rows),)))
+        upper.append(np.broadcast_to(np.asarray(hi, float), (len_rows(rows),)))
+
+    def len_rows(rows):
+        return int(np.max(rows)) + 1 if np.size(rows) else 0
+
+    # At most one shift per day
+    add(np.repeat(wd, nS), np.arange(n_b), 1.0, -INF, 1.0)
+
+    # Weekly hours (whole slots, so fractional bounds are rounded inwards)
+    hours_rows, hours = np.repeat(np.arange(nW), nD * nS), np.tile(length, nW * nD)
+    add(hours_rows, np.arange(n_b), hours, [math.ceil(MinHw[w] - 1e-9) for w in W], INF)
+    add(hours_rows, np.arange(n_b), hours, -INF, [math.floor(MaxHw[w] + 1e-9) for w in W])
+
+    # Exactly one pair of consecutive rest days, z[w][k] <= 1 - y[w][k] and 1 - y[w][k+1]
+    add(w_of, z0 + np.arange(n_z), 1.0, 1.0, 1.0)
+    for side in (0, 1):
+        days = np.array([day[k + side] for k in pairs])
+        rows = np.arange(n_z)
+        cols = ((w_of * nD + days[k_of])[:, None] * nS + np.arange(nS)).ravel()
+        add(np.concatenate([rows, np.repeat(rows, nS)]), np.concatenate([z0 + rows, cols]), 1.0, -INF, 1.0)
+
+    # 12h rest: late slot on d vs early slot on d+1
+    for late, early in rest_pairs:
+        late_s = np.flatnonzero(C[:, T.index(late)])
+        early_s = np.flatnonzero(C[:, T.index(early)])
+        today = (w_of * nD + np.array([day[k] for k in pairs])[k_of])
+        tomorrow = (w_of * nD + np.array([day[k + 1] for k in pairs])[k_of])
+        rows = np.arange(n_z)
+        add(np.concatenate([np.repeat(rows, len(late_s)), np.repeat(rows, len(early_s))]),
+            np.concatenate([(today[:, None] * nS + late_s).ravel(), (tomorrow[:, None] * nS + early_s).ravel()]),
+            1.0, -INF, 1.0)
+
+    # Max closing shifts
+    if closing_slot is not None:
+        close_s = np.flatnonzero(C[:, T.index(closing_slot)])
+        add(np.repeat(np.arange(nW), nD * len(close_s)), (wd[:, None] * nS + close_s).ravel(),
+            1.0, -INF, max_closings)
+
+    # Demand balance + per-slot rules
+    s_idx, t_idx = np.nonzero(C)
+    cover_rows = ((wd % nD)[:, None] * nT + t_idx).ravel()
+    cover_cols = (wd[:, None] * nS + s_idx).ravel()
+    dev = np.arange(n_dev)
+    demand = np.array([[Demand[d][idx] for idx in range(nT)] for d in D], float).ravel()
+    add(np.concatenate([cover_rows, dev, dev]), np.concatenate([cover_cols, under0 + dev, over0 + dev]),
+        np.concatenate([np.ones(len(cover_cols)), np.ones(n_dev), -np.ones(n_dev)]), demand, demand)
+    add(np.concatenate([dev, dev]), np.concatenate([under0 + dev, over0 + dev]), 1.0, -INF, Max_Deviation)
+    if require_min_staff:
+        add(cover_rows, cover_cols, 1.0, 1.0, INF)
+
+    # Bounds: binaries, weekend-only workers off on weekdays, deviations >= 0
+    col_upper = np.concatenate([np.ones(n_b + n_z), np.full(2 * n_dev, INF)])
+    weekday = np.array([d not in weekend_days for d in D])
+    for w in weekend_only:
+        i = W.index(w)
+        col_upper[:n_b].reshape(nW, nD, nS)[i, weekday, :] = 0.0
+    c = np.zeros(n_cols)
+    c[under0:] = 1.0
+    rows = np.concatenate([b[0] for b in blocks])
+    cols = np.concatenate([b[1] for b in blocks])
+    vals = np.concatenate([b[2] for b in blocks]).astype(float)
+    integrality = np.concatenate([np.ones(n_b + n_z, int), np.zeros(2 * n_dev, int)])
+    kept = np.arange(n_cols)
+
+    if candidates is not None:
+        # Drop the b columns outside the candidate lists and renumber the rest
+        shift = {se: k for k, se in enumerate(S)}
+        keep = np.ones(n_cols, bool)
+        keep[:n_b] = False
+        for i, w in enumerate(W):
+            for j, d in enumerate(D):
+                keep[[(i * nD + j) * nS + shift[se] for se in candidates[(w, d)]]] = True
+        kept = np.flatnonzero(keep)
+        index = np.cumsum(keep) - 1
+        entries = keep[cols]
+        rows, cols, vals = rows[entries], index[cols[entries]], vals[entries]
+        c, col_upper, integrality = c[kept], col_upper[kept], integrality[kept]
+
+    return {
+        "c": c,
+        "rows": rows,
+        "cols": cols,
+        "vals": vals,
+        "row_lower": np.concatenate(lower),
+        "row_upper": np.concatenate(upper),
+        "lower": np.zeros(len(kept)),
+        "upper": col_upper,
+        "integrality": integrality,
+        "shape": (sum(len(r) for r in lower), len(kept)),
+        "columns": kept,
+        "n_full": n_cols,
+        "instance": dict(W=W, D=D, T=T, S=S, MinHw=MinHw, MaxHw=MaxHw, Demand=Demand),
+        "rules": dict(Max_Deviation=Max_Deviation, rest_pairs=rest_pairs, closing_slot=closing_slot,
+                      max_closings=max_closings, weekend_only=list(weekend_only), weekend_days=weekend_days,
+                      require_min_staff=require_min_staff),
+    }
+
+
+def column_major(mm):
+    """CSC form of A: (column starts, row indices, values)."""
+    order = np.lexsort((mm["rows"], mm["cols"]))
+    starts = np.searchsorted(mm["cols"][order], np.arange(mm["shape"][1] + 1))
+    return starts, mm["rows"][order], mm["vals"][order]
+
+
+def write_mps(mm, path):
+    """Write the matrix model as a fixed-name MPS file (rows R<i>, columns X<j>)."""
+    n_rows, n_cols = mm["shape"]
+    lo, hi = mm["row_lower"], mm["row_upper"]
+    sense = np.where(lo == hi, "E", np.where(np.isinf(lo), "L", "G"))
+    rhs = np.where(sense == "L", hi, lo)
+    ranged = np.flatnonzero(~np.isinf(lo) & ~np.isinf(hi) & (lo < hi))
+
+    starts, rows, vals = column_major(mm)
+    n_int = int(mm["integrality"].sum())
+
+    lines = ["NAME          SHIFTS", "ROWS", " N  OBJ"]
+    lines += [f" {s}  R{i}" for i, s in enumerate(sense)]
+    lines.append("COLUMNS")
+    for j in range(n_cols):
+        if j == 0 and n_int:
+            lines.append("    MARKER                 'MARKER'                 'INTORG'")
+        if j == n_int and n_int:
+            lines.append("    MARKER                 'MARKER'                 'INTEND'")
+        if mm["c"][j]:
+            lines.append(f"    X{j}  OBJ  {mm['c'][j]:.12g}")
+        a, b = starts[j], starts[j + 1]
+        lines += [f"    X{j}  R{r}  {v:.12g}" for r, v in zip(rows[a:b].tolist(), vals[a:b].tolist())]
+    lines.append("RHS")
+    lines += [f"    RHS  R{i}  {rhs[i]:.12g}" for i in np.flatnonzero(rhs)]
+    if len(ranged):
+        lines.append("RANGES")
+        lines += [f"    RNG  R{i}  {hi[i] - lo[i]:.12g}" for i in ranged]
+    lines.append("BOUNDS")
+    for j in range(n_cols):
+        up = mm["upper"][j]
+        if mm["integrality"][j]:
+            lines.append(f" BV BND  X{j}" if up == 1 else f" FX BND  X{j}  {up:.12g}")
+        elif not np.isinf(up):
+            lines.append(f" UP BND  X{j}  {up:.12g}")
+    lines.append("ENDATA")
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def initial_values(mm, schedule):
+    """
+    Column vector for a legal (w, d, t) schedule (the CBC MIP start); None if
+    it uses a shift the candidate lists dropped, as a partial start is no start.
+    """
+    inst = mm["instance"]
+    W, D, T, S = inst["W"], inst["D"], inst["T"], inst["S"]
+    nD, nT, nS = len(D), len(T), len(S)
+    x = np.zeros(mm["n_full"])
+    b = x[:len(W) * nD * nS].reshape(len(W), nD, nS)
+    z = x[b.size:b.size + len(W) * 6].reshape(len(W), 6)
+    shift = {se: i for i, se in enumerate(S)}
+    patterns = schedule_patterns(schedule, W, D)
+    for i, w in enumerate(W):
+        for j, cur in enumerate(patterns[w]):
+            if cur is not None:
+                b[i, j, shift[cur]] = 1.0
+        off = dict(zip(D, (cur is None for cur in patterns[w])))
+        first = next((k for k in range(1, 7) if off.get(k) and off.get(k + 1)), None)
+        if first is not None:
+            z[i, first - 1] = 1.0
+    staffed = (b @ _incidence(T, S).astype(float)).sum(axis=0).ravel()
+    demand = np.array([[inst["Demand"][d][idx] for idx in range(nT)] for d in D], float).ravel()
+    n_dev = nD * nT
+    x[-2 * n_dev:-n_dev] = np.maximum(0.0, demand - staffed)
+    x[-n_dev:] = np.maximum(0.0, staffed - demand)
+    dropped = np.ones(b.size, bool)
+    dropped[mm["columns"][mm["columns"] < b.size]] = False
+    if b.ravel()[dropped].any():
+        return None
+    return x[mm["columns"]]
+
+
+def read_cbc_solution(path, n_cols):
+    """Status and column values from a CBC -solution file (statuses as PuLP reports them)."""
+    x = np.zeros(n_cols)
+    with open(path) as f:
+        words = f.readline().split()
+        for line in f:
+            parts = line.split()
+            if parts and parts[0] == "**":
+                parts = parts[1:]
+            if len(parts) >= 3 and parts[1].startswith("X"):
+                x[int(parts[1][1:])] = float(parts[2])
+    status = {"Optimal": "Optimal", "Infeasible": "Infeasible", "Integer": "Infeasible",
+              "Unbounded": "Unbounded", "Stopped": "Not Solved"}.get(words[0] if words else "", "Undefined")
+    if status == "Not Solved" and len(words) >= 5 and words[4] == "objective":
+        # Stopped on time / iterations with an incumbent
+        status = "Optimal"
+    return status, x
+
+
+def matrix_schedule(mm, x):
+    """(w, d, t) rows and {(d, t): (under, over, staffed, demand)} from a column vector."""
+    inst = mm["instance"]
+    W, D, T, S = inst["W"], inst["D"], inst["T"], inst["S"]
+    nD, nT, nS = len(D), len(T), len(S)
+    full = np.zeros(mm["n_full"])
+    full[mm["columns"]] = x
+    x = full
+    b = x[:len(W) * nD * nS].reshape(len(W), nD, nS)
+    schedule = []
+    for i, j, k in np.argwhere(b > 0.5):
+        s, e = S[k]
+        schedule.extend((W[i], D[j], t) for t in T if s <= t <= e)
+    n_dev = nD * nT
+    under = x[-2 * n_dev:-n_dev].reshape(nD, nT)
+    over = x[-n_dev:].reshape(nD, nT)
+    staffed = {(d, t): 0 for d in D for t in T}
+    for _, d, t in schedule:
+        staffed[(d, t)] += 1
+    metrics = {(d, t): (float(under[j, i]), float(over[j, i]), staffed[(d, t)], inst["Demand"][d][i])
+               for j, d in enumerate(D) for i, t in enumerate(T)}
+    return schedule, metrics
+
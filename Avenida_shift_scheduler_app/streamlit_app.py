@@ -1,7 +1,11 @@
 
 import pandas as pd
 import streamlit as st
+from bounds import describe_bounds
 from optimizer import solve_schedule
+from progress import SolveJob
+from roster import Schedule
+from solve_panel import follow_solve
 
 st.set_page_config(page_title="Avenida Shift Scheduler", page_icon="🧊", layout="wide")
 st.title("Avenida Shift Scheduler")
@@ -48,6 +52,9 @@ with st.sidebar:
 
     st.header("Model options")
     max_dev = st.number_input("Max deviation per slot", min_value=0.0, value=2.5, step=0.1)
+    quick_preview = st.checkbox("Quick preview (greedy, no solver)", value=False)
+    race_solvers = st.checkbox("Race solver configurations (one per CPU core)", value=False)
+    gap_pct = st.number_input("Stop at relative gap (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.5)
     need_min_staff = st.checkbox("Require at least 1 staff per slot", value=True)
     weekend_15 = st.checkbox("15h contracts weekend-only", value=True, help="No 15h contracts in this store; has no effect.")
 
@@ -95,20 +102,49 @@ W = [str(w) for w in staff_df["worker"].tolist()]
 
 # ---- RUN ----
 if st.button("Solve"):
-    with st.spinner("Solving..."):
-        status, obj, schedule, metrics = solve_schedule(
-            W=W, D=D, T=T,
-            MinHw=MinHw, MaxHw=MaxHw,
-            Demand=Demand,
-            Max_Deviation=max_dev,
-            weekend_15h_only=weekend_15,
-            require_min_staff=need_min_staff,
-            solver_time_limit=None
-        )
+    st.session_state["solve_job"] = SolveJob(
+        solve_schedule,
+        W=W, D=D, T=T,
+        MinHw=MinHw, MaxHw=MaxHw,
+        Demand=Demand,
+        Max_Deviation=max_dev,
+        engine="greedy" if quick_preview else ("portfolio" if race_solvers else "mip"),
+        weekend_15h_only=weekend_15,
+        require_min_staff=need_min_staff,
+        solver_time_limit=None,
+        gap=gap_pct / 100,
+        diagnose=True,
+    )
+
+job = st.session_state.get("solve_job")
+if job is not None:
+    result = follow_solve(job)
+    if result.get("diagnosed_by") == "screening":
+        # Rejected by the pre-solve screen, before any model was built
+        st.error("These inputs cannot produce a schedule:\n" + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+    if result.get("diagnostics"):
+        # The MIP was infeasible: the elastic solve (diagnosis.py) names the rules to relax
+        st.error("No roster meets every rule; relax one of these:\n"
+                 + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+
+    status, obj, schedule, metrics = result
+    if obj is None:
+        st.error(f"Status: {status}; no schedule found.")
+        st.stop()
 
     st.subheader("Result")
     st.write(f"**Status:** {status}")
     st.write(f"**Total deviation:** {obj:.4f}")
+    if result.get("gap_stopped"):
+        st.caption(f"Stopped at the {gap_pct:g} % gap: not proven optimal")
+    if result.get("winner"):
+        st.caption(f"Portfolio winner: {result['winner']}")
+    if result.get("candidates"):
+        st.caption(result["candidates"])
+    if result.get("bounds"):
+        st.caption(describe_bounds(result["bounds"]))
 
     # Output: schedule table (long format)
     sched_df = pd.DataFrame(schedule, columns=["worker","day","slot"]).sort_values(["day","slot","worker"])
@@ -116,10 +152,8 @@ if st.button("Solve"):
     st.dataframe(sched_df, use_container_width=True)
 
     # Output: coverage vs demand table
-    rows = []
-    for (d,t), (u,o,staffed,dem) in metrics.items():
-        rows.append({"day": d, "slot": t, "staffed": staffed, "demand": dem, "under": u, "over": o})
-    cov_df = pd.DataFrame(rows).sort_values(["day","slot"])
+    roster = Schedule.from_rows(schedule, W, D, T)
+    cov_df = pd.DataFrame(roster.coverage_columns(Demand))
     st.markdown("**Coverage vs Demand**")
     st.dataframe(cov_df, use_container_width=True)
 
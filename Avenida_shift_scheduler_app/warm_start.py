@@ -0,0 +1,184 @@
+import pulp
+
+from patterns import best_pattern, pattern_schedule, pattern_violations, shift_hours
+
+# MIP starts from a previous (w, d, t) schedule: last week's output or the
+# "Download schedule CSV" file. Each worker's week is first repaired to the
+# nearest legal week (fewest slots changed) with the pattern DP, then weeks are
+# re-chosen one worker at a time until the coverage cap / min-staff rows hold,
+# so the start stays usable after demand, contracts, staff or rules change.
+
+VIOLATION_WEIGHT = 1000.0
+
+
+def schedule_patterns(schedule, W, D):
+    """{w: pattern} from (w, d, t) rows; each day becomes the span of its slots."""
+    spans = {}
+    for w, d, t in schedule:
+        s, e = spans.get((w, d), (t, t))
+        spans[(w, d)] = (min(s, t), max(e, t))
+    return {w: tuple(spans.get((w, d)) for d in D) for w in W}
+
+
+def closeness(pattern, S):
+    """Per-day shift values 2 * overlap - length: minus the slots changed, up to a constant."""
+    value = {}
+    for i, old in enumerate(pattern):
+        value[i] = {}
+        for se in S:
+            overlap = 0 if old is None else max(0, min(se[1], old[1]) - max(se[0], old[0]) + 1)
+            value[i][se] = 2 * overlap - shift_hours(se)
+    return value
+
+
+def nearest_pattern(pattern, D, S, min_h, max_h, allowed_days=None, **rules):
+    """Legal pattern with the fewest (d, t) slots changed from `pattern` (None if none exists)."""
+    if all(se is None or se in S for se in pattern) and not pattern_violations(
+            pattern, D, min_h, max_h, allowed_days=allowed_days, **rules):
+        return pattern
+    value = closeness(pattern, S)
+    day_value = {d: value[i] for i, d in enumerate(D)}
+    _, best = best_pattern(day_value, D, S, min_h, max_h, allowed_days=allowed_days, **rules)
+    return best
+
+
+def coverage_violation(staffed, demand, Max_Deviation=2.5, require_min_staff=True):
+    """How far one slot is from its cap / min-staff rows."""
+    out = max(0.0, abs(staffed - demand) - Max_Deviation)
+    if require_min_staff and staffed < 1:
+        out += 1
+    return out
+
+
+def repair_schedule(
+    schedule, W, D, T, S, MinHw, MaxHw,
+    Demand=None,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    passes=3,
+):
+    """
+    Nearest legal week for every worker in W. Workers missing from `schedule`
+    start from an empty week and rows for workers not in W are dropped.
+    With Demand, slots breaking the cap / min-staff rows are then repaired by
+    re-choosing one worker's week at a time (fewest changes first).
+    Returns the repaired (w, d, t) list, or None if some worker has no legal week.
+    """
+    W = list(W); D = list(D); T = list(T)
+    weekend_only = set(weekend_only)
+    rules = dict(rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings)
+    allowed = {w: (list(weekend_days) if w in weekend_only else None) for w in W}
+    original = schedule_patterns(schedule, W, D)
+    patterns = {}
+    for w in W:
+        patterns[w] = nearest_pattern(original[w], D, S, MinHw[w], MaxHw[w], allowed_days=allowed[w], **rules)
+        if patterns[w] is None:
+            return None
+
+    if Demand is not None:
+        staffed = {(d, t): 0 for d in D for t in T}
+        for w in W:
+            for _, d, t in pattern_schedule(w, patterns[w], D, T):
+                staffed[(d, t)] += 1
+        demand = {(d, t): Demand[d][idx] for d in D for idx, t in enumerate(T)}
+        cover = dict(Max_Deviation=Max_Deviation, require_min_staff=require_min_staff)
+
+        def violation(dt, n):
+            return coverage_violation(n, demand[dt], **cover)
+
+        for _ in range(passes):
+            if not any(violation(dt, n) > 1e-9 for dt, n in staffed.items()):
+                break
+            for w in W:
+                for _, d, t in pattern_schedule(w, patterns[w], D, T):
+                    staffed[(d, t)] -= 1
+                # Violations dominate; closeness to the original week breaks ties
+                value = closeness(original[w], S)
+                gain = {dt: violation(dt, n) - violation(dt, n + 1) for dt, n in staffed.items()}
+                day_value = {}
+                for i, d in enumerate(D):
+                    day_value[d] = {}
+                    for se in S:
+                        fixed = sum(gain[(d, t)] for t in range(se[0], se[1] + 1))
+                        day_value[d][se] = value[i][se] + VIOLATION_WEIGHT * fixed
+                _, patterns[w] = best_pattern(day_value, D, S, MinHw[w], MaxHw[w],
+                                              allowed_days=allowed[w], **rules)
+                for _, d, t in pattern_schedule(w, patterns[w], D, T):
+                    staffed[(d, t)] += 1
+
+    return [row for w in W for row in pattern_schedule(w, patterns[w], D, T)]
+
+
+def set_initial_values(v, schedule, W, D, T, S, Demand):
+    """Seed b (start / end), x, y, z, under and over from a legal schedule (x / y only where they are variables)."""
+    patterns = schedule_patterns(schedule, W, D)
+    staffed = {(d, t): 0 for d in D for t in T}
+    for w in W:
+        for d, cur in zip(D, patterns[w]):
+            if "b" in v:
+                for se in S:
+                    v["b"][w][d][se].setInitialValue(int(se == cur))
+            else:
+                for first, var in v["start"][w][d].items():
+                    var.setInitialValue(int(cur is not None and cur[0] == first))
+                for last, var in v["end"][w][d].items():
+                    var.setInitialValue(int(cur is not None and cur[1] == last))
+            if isinstance(v["y"][w][d], pulp.LpVariable):
+                v["y"][w][d].setInitialValue(int(cur is not None))
+            for t, var in v["x"][w][d].items():
+                if isinstance(var, pulp.LpVariable):
+                    var.setInitialValue(int(cur is not None and cur[0] <= t <= cur[1]))
+            if cur is not None:
+                for t in T:
+                    if cur[0] <= t <= cur[1]:
+                        staffed[(d, t)] += 1
+        if "p" in v:
+            # The week's on/off pattern
+            on = tuple(d for d, cur in zip(D, patterns[w]) if cur is not None)
+            for i, var in v["p"][w].items():
+                var.setInitialValue(int(v["patterns"][i] == on))
+            continue
+        # z marks the first pair of consecutive days off
+        off = dict(zip(D, (cur is None for cur in patterns[w])))
+        first = next((d for d in range(1, 7) if off.get(d) and off.get(d + 1)), None)
+        for d in range(1, 7):
+            v["z"][w][d].setInitialValue(int(d == first))
+    for d in D:
+        for idx, t in enumerate(T):
+            v["under"][d][t].setInitialValue(max(0.0, Demand[d][idx] - staffed[(d, t)]))
+            v["over"][d][t].setInitialValue(max(0.0, staffed[(d, t)] - Demand[d][idx]))
+
+
+def warm_start(
+    v, initial_schedule, W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+):
+    """
+    Repair `initial_schedule` and seed the model variables with it.
+    Returns True if a start was set (pass warmStart=True to CBC), False if
+    some worker has no legal week at all.
+    """
+    schedule = repair_schedule(initial_schedule, W, D, T, S, MinHw, MaxHw,
+                               Demand=Demand,
+                               Max_Deviation=Max_Deviation,
+                               rest_pairs=rest_pairs,
+                               closing_slot=closing_slot,
+                               max_closings=max_closings,
+                               weekend_only=weekend_only,
+                               weekend_days=weekend_days,
+                               require_min_staff=require_min_staff)
+    if schedule is None:
+        return False
+    set_initial_values(v, schedule, W, D, T, S, Demand)
+    return True
@@ -0,0 +1,299 @@
+import math
+
+import pulp
+
+# Shared MILP builder used by every store's optimizer.py.
+# Store differences (late/early rest slots, closing slot, weekend-only staff)
+# are passed in; the rows are the same everywhere.
+
+
+def build_shift_set(T, min_len=4, max_len=8):
+    """All (start, end) shifts with inclusive length in [min_len, max_len]."""
+    return [(s, e) for s in T for e in T if s <= e and min_len <= (e - s + 1) <= max_len]
+
+
+def shifts_covering(S, T):
+    """{t: [(s,e), ...]} shifts that cover slot t."""
+    return {t: [se for se in S if se[0] <= t <= se[1]] for t in T}
+
+
+def rest_day_patterns(D):
+    """Working-day tuples of a week that leave some pair (d, d+1), d = 1..6, off."""
+    D = list(D)
+    patterns = []
+    for mask in range(2 ** len(D)):
+        on = tuple(d for i, d in enumerate(D) if mask >> i & 1)
+        if any(d not in on and d + 1 not in on for d in range(1, 7)):
+            patterns.append(on)
+    return patterns
+
+
+def rest_cliques(S, rest_pairs):
+    """
+    Maximal (late, early) shift sets for the 12h rest: every shift in late on
+    day d conflicts with every shift in early on day d+1. They are the closed
+    sets of the conflict relation, so overlapping rest pairs give one row per
+    distinct set instead of one per pair.
+    """
+    conflicts = {}
+    for a in S:
+        early = frozenset(e for e in S if any(a[0] <= late <= a[1] and e[0] <= first <= e[1]
+                                              for late, first in rest_pairs))
+        if early:
+            conflicts[a] = early
+    closed = set(conflicts.values())
+    frontier = list(closed)
+    while frontier:
+        current = frontier.pop()
+        for other in list(closed):
+            meet = current & other
+            if meet and meet not in closed:
+                closed.add(meet)
+                frontier.append(meet)
+    cliques = []
+    for early in closed:
+        late = [a for a in S if a in conflicts and early <= conflicts[a]]
+        cliques.append((late, [e for e in S if e in early]))
+    return sorted(cliques, key=lambda c: (len(c[0]), -len(c[1])))
+
+
+def build_shift_model(
+    name,
+    W, D, T, S,
+    MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    formulation="compact",
+):
+    """
+    Build the weekly shift model.
+
+    - Demand[d] is a list aligned with T (Demand[d][idx]).
+    - rest_pairs: [(late_slot, early_slot)] that cannot be worked on d and d+1.
+    - closing_slot: slot counted against max_closings (None = no cap).
+    - weekend_only: workers that may only work on weekend_days.
+    - formulation:
+        "compact": x[w][d][t], y[w][d] variables linked to b by equalities.
+        "lean":    x and y are dropped; every row is written on b directly.
+        "rest_patterns": lean, with one binary p[w][i] per on/off day pattern
+                   (v["patterns"][i]) instead of the z rows, and 12h rest as
+                   maximal clique rows on b (rest_cliques).
+        "flow":    no b; each worker-day is a path through the slots: a
+                   start arc start[w][d][s], work arcs x[w][d][t] with flow
+                   conservation between slots, an end arc end[w][d][e] (or
+                   neither: the day off). Length rows pair each end with the
+                   starts that make a shift of S with it and vice versa, so a
+                   day costs O(|T|) rows and arcs instead of |S| columns.
+    Returns (model, vars) where vars holds x, y, z (p), b (start / end), under, over and the
+    rows that later solves may update in place (min_hours / max_hours per
+    worker, balance / cap / min_staff per (d, t)).
+    In lean mode x and y are affine expressions in b, and x only covers the
+    rest/closing slots.
+    """
+    if formulation not in ("compact", "lean", "rest_patterns", "flow"):
+        raise ValueError(f"Unknown formulation: {formulation}")
+    W = list(W); D = list(D); T = list(T)
+    cover = shifts_covering(S, T)
+    rest_pairs = [(late, early) for (late, early) in rest_pairs if late in T and early in T]
+    if closing_slot not in T:
+        closing_slot = None
+
+    model = pulp.LpProblem(name, pulp.LpMinimize)
+
+    if formulation == "flow":
+        starts = sorted({se[0] for se in S})
+        ends = sorted({se[1] for se in S})
+        start = pulp.LpVariable.dicts("start", (W, D, starts), cat="Binary")
+        end = pulp.LpVariable.dicts("end", (W, D, ends), cat="Binary")
+    else:
+        b = pulp.LpVariable.dicts("b", (W, D, S), cat="Binary")
+    if formulation == "rest_patterns":
+        patterns = rest_day_patterns(D)
+        p = pulp.LpVariable.dicts("p", (W, range(len(patterns))), cat="Binary")  # working days of the week
+        z = {w: {} for w in W}
+    else:
+        z = pulp.LpVariable.dicts("z", (W, range(1, 7)), cat="Binary")  # pairs (d,d+1) off
+    under = pulp.LpVariable.dicts("under", (D, T), lowBound=0)
+    over = pulp.LpVariable.dicts("over", (D, T), lowBound=0)
+
+    if formulation == "compact":
+        x = pulp.LpVariable.dicts("x", (W, D, T), cat="Binary")
+        y = pulp.LpVariable.dicts("y", (W, D), cat="Binary")
+    elif formulation == "flow":
+        x = pulp.LpVariable.dicts("x", (W, D, T), cat="Binary")
+        y = {w: {d: pulp.lpSum(start[w][d].values()) for d in D} for w in W}
+    else:
+        # Only the slots used by the rest/closing rows need an x expression
+        x_slots = sorted({t for pair in rest_pairs for t in pair} | ({closing_slot} - {None}))
+        x = {w: {d: {t: pulp.lpSum(b[w][d][se] for se in cover[t]) for t in x_slots} for d in D} for w in W}
+        y = {w: {d: pulp.lpSum(b[w][d][se] for se in S) for d in D} for w in W}
+
+    # Objective
+    model += pulp.lpSum(under[d][t] + over[d][t] for d in D for t in T)
+
+    # At most one shift per day (+ link b, x, y and daily min/max in compact mode)
+    for w in W:
+        for d in D:
+            if formulation == "rest_patterns":
+                # One pattern per week, and a shift exactly on its working days
+                model += y[w][d] == pulp.lpSum(p[w][i] for i, on in enumerate(patterns) if d in on)
+                continue
+            if formulation == "flow":
+                # One unit of flow leaves the source by a start arc or the
+                # day-off arc; between slots, flow in (work or start) = flow
+                # out (work or end)
+                model += y[w][d] <= 1
+                for i, t in enumerate(T):
+                    inflow = (x[w][d][T[i - 1]] if i else 0) + start[w][d].get(t, 0)
+                    outflow = x[w][d][t] + (end[w][d].get(T[i - 1], 0) if i else 0)
+                    model += inflow == outflow
+                model += x[w][d][T[-1]] == end[w][d].get(T[-1], 0)
+                # Start and end must be a shift of S
+                for e in ends:
+                    model += end[w][d][e] <= pulp.lpSum(start[w][d][se[0]] for se in S if se[1] == e)
+                for first in starts:
+                    model += start[w][d][first] <= pulp.lpSum(end[w][d][se[1]] for se in S if se[0] == first)
+                continue
+            model += pulp.lpSum(b[w][d][se] for se in S) <= 1
+            if formulation == "compact":
+                for t in T:
+                    model += x[w][d][t] == pulp.lpSum(b[w][d][se] for se in cover[t])
+                model += y[w][d] == pulp.lpSum(b[w][d][se] for se in S)
+                model += pulp.lpSum(x[w][d][t] for t in T) >= 4 * y[w][d]
+                model += pulp.lpSum(x[w][d][t] for t in T) <= 8 * y[w][d]
+
+    # Weekly hours
+    rows = {"min_hours": {}, "max_hours": {}, "balance": {d: {} for d in D}, "cap": {d: {} for d in D},
+            "min_staff": {d: {} for d in D}}
+    for w in W:
+        if formulation == "compact":
+            hours = pulp.lpSum(x[w][d][t] for d in D for t in T)
+            low, high = MinHw[w], MaxHw[w]
+        elif formulation == "flow":
+            hours = pulp.lpSum(x[w][d][t] for d in D for t in T)
+            low, high = math.ceil(MinHw[w] - 1e-9), math.floor(MaxHw[w] + 1e-9)
+        else:
+            # Hours are whole slots, so fractional bounds can be rounded inwards
+            hours = pulp.lpSum((se[1] - se[0] + 1) * b[w][d][se] for d in D for se in S)
+            low, high = math.ceil(MinHw[w] - 1e-9), math.floor(MaxHw[w] + 1e-9)
+        rows["min_hours"][w] = hours >= low
+        rows["max_hours"][w] = hours <= high
+        model += rows["min_hours"][w]
+        model += rows["max_hours"][w]
+
+    # Exactly one pair of consecutive rest days
+    for w in W:
+        if formulation == "rest_patterns":
+            model += pulp.lpSum(p[w].values()) == 1
+            continue
+        model += pulp.lpSum(z[w][d] for d in range(1, 7)) == 1
+        for d in range(1, 7):
+            model += z[w][d] <= 1 - y[w][d]
+            model += z[w][d] <= 1 - y[w][d + 1]
+
+    # 12h rest: late slot on d vs early slot on d+1
+    if formulation == "rest_patterns":
+        # One row per maximal set of late (d) and early (d+1) shifts that
+        # exclude each other
+        cliques = rest_cliques(S, rest_pairs)
+        for w in W:
+            for d in range(1, 7):
+                for late, early in cliques:
+                    model += pulp.lpSum(b[w][d][se] for se in late) + pulp.lpSum(b[w][d + 1][se] for se in early) <= 1
+    else:
+        for w in W:
+            for d in range(1, 7):
+                for late, early in rest_pairs:
+                    model += x[w][d][late] + x[w][d + 1][early] <= 1
+
+    # Max closing shifts
+    if closing_slot is not None:
+        for w in W:
+            model += pulp.lpSum(x[w][d][closing_slot] for d in D) <= max_closings
+
+    # Demand balance + per-slot rules
+    for d in D:
+        for idx, t in enumerate(T):
+            if formulation in ("compact", "flow"):
+                staffed = pulp.lpSum(x[w][d][t] for w in W)
+            else:
+                staffed = pulp.lpSum(b[w][d][se] for w in W for se in cover[t])
+            rows["balance"][d][t] = staffed + under[d][t] - over[d][t] == Demand[d][idx]
+            rows["cap"][d][t] = under[d][t] + over[d][t] <= Max_Deviation
+            model += rows["balance"][d][t]
+            model += rows["cap"][d][t]
+            if require_min_staff:
+                rows["min_staff"][d][t] = staffed >= 1
+                model += rows["min_staff"][d][t]
+
+    # Weekend-only workers
+    for w in weekend_only:
+        for d in D:
+            if d not in weekend_days:
+                model += y[w][d] == 0
+
+    v = {"x": x, "y": y, "z": z, "under": under, "over": over, **rows}
+    if formulation == "flow":
+        v.update(start=start, end=end)
+    else:
+        v["b"] = b
+    if formulation == "rest_patterns":
+        v.update(p=p, patterns=patterns)
+    return model, v
+
+
+def extract_schedule(v, W, D, T, S):
+    """Read the (w, d, t) schedule off the shift variables b (work arcs x in the flow model)."""
+    if "b" not in v:
+        return [(w, d, t) for w in W for d in D for t in T if (pulp.value(v["x"][w][d][t]) or 0) > 0.5]
+    b = v["b"]
+    schedule = []
+    for w in W:
+        for d in D:
+            for (s, e) in S:
+                val = pulp.value(b[w][d][(s, e)])
+                if val is not None and val > 0.5:
+                    schedule.extend((w, d, t) for t in T if s <= t <= e)
+    return schedule
+
+
+def slot_metrics(v, schedule, D, T, Demand):
+    """{(d, t): (under, over, staffed, demand)} for the solved model."""
+    staffed = {(d, t): 0 for d in D for t in T}
+    for (_, d, t) in schedule:
+        staffed[(d, t)] += 1
+    metrics = {}
+    for d in D:
+        for idx, t in enumerate(T):
+            metrics[(d, t)] = (
+                pulp.value(v["under"][d][t]),
+                pulp.value(v["over"][d][t]),
+                staffed[(d, t)],
+                Demand[d][idx],
+            )
+    return metrics
+
+
+def schedule_metrics(schedule, D, T, Demand):
+    """
+    Total deviation and {(d, t): (under, over, staffed, demand)} computed from
+    a schedule alone (for engines that do not carry under/over variables).
+    """
+    staffed = {(d, t): 0 for d in D for t in T}
+    for (_, d, t) in schedule:
+        staffed[(d, t)] += 1
+    metrics = {}
+    total = 0.0
+    for d in D:
+        for idx, t in enumerate(T):
+            dem = Demand[d][idx]
+            u = max(0.0, dem - staffed[(d, t)])
+            o = max(0.0, staffed[(d, t)] - dem)
+            metrics[(d, t)] = (u, o, staffed[(d, t)], dem)
+            total += u + o
+    return total, metrics
@@ -3,7 +3,11 @@ import io
 import json
 import pandas as pd
 import streamlit as st
+from bounds import describe_bounds
 from optimizer import solve_schedule
+from progress import SolveJob
+from roster import Schedule
+from solve_panel import follow_solve
 
 st.set_page_config(page_title="Avenida Shift Scheduler", page_icon="🧮", layout="wide")
 st.title("Avenida Shift Scheduler")
@@ -52,6 +56,9 @@ default_Demand = {
 with st.sidebar:
     st.header("Parameters")
     max_dev = st.number_input("Max deviation per slot", min_value=0.0, value=2.5, step=0.1)
+    quick_preview = st.checkbox("Quick preview (greedy, no solver)", value=False)
+    race_solvers = st.checkbox("Race solver configurations (one per CPU core)", value=False)
+    gap_pct = st.number_input("Stop at relative gap (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.5)
     ensure_min_staff = st.checkbox("Require at least 1 staff per slot", value=True)
     weekend_15_only = st.checkbox("15h contracts weekend-only", value=True)
     st.caption("Note: No employee has a 15h contract here; this toggle will have no effect.")
@@ -106,30 +113,57 @@ else:
 run = st.button("Solve")
 
 if run:
-    with st.spinner("Solving..."):
-        status, obj, schedule, metrics = solve_schedule(
-            W=default_W, D=D, T=T,
-            MinHw=MinHw, MaxHw=MaxHw,
-            Demand=Demand,
-            Max_Deviation=max_dev,
-            weekend_15h_only=weekend_15_only,
-            require_min_staff=ensure_min_staff,
-            solver_time_limit=None
-        )
+    st.session_state["solve_job"] = SolveJob(
+        solve_schedule,
+        W=default_W, D=D, T=T,
+        MinHw=MinHw, MaxHw=MaxHw,
+        Demand=Demand,
+        Max_Deviation=max_dev,
+        engine="greedy" if quick_preview else ("portfolio" if race_solvers else "mip"),
+        weekend_15h_only=weekend_15_only,
+        require_min_staff=ensure_min_staff,
+        solver_time_limit=None,
+        gap=gap_pct / 100,
+        diagnose=True,
+    )
+
+job = st.session_state.get("solve_job")
+if job is not None:
+    result = follow_solve(job)
+    if result.get("diagnosed_by") == "screening":
+        # Rejected by the pre-solve screen, before any model was built
+        st.error("These inputs cannot produce a schedule:\n" + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+    if result.get("diagnostics"):
+        # The MIP was infeasible: the elastic solve (diagnosis.py) names the rules to relax
+        st.error("No roster meets every rule; relax one of these:\n"
+                 + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+
+    status, obj, schedule, metrics = result
+    if obj is None:
+        st.error(f"Status: {status}; no schedule found.")
+        st.stop()
 
     st.subheader("Result")
     st.write(f"**Status:** {status}")
     st.write(f"**Total deviation:** {obj:.4f}")
+    if result.get("gap_stopped"):
+        st.caption(f"Stopped at the {gap_pct:g} % gap: not proven optimal")
+    if result.get("winner"):
+        st.caption(f"Portfolio winner: {result['winner']}")
+    if result.get("candidates"):
+        st.caption(result["candidates"])
+    if result.get("bounds"):
+        st.caption(describe_bounds(result["bounds"]))
 
     # Schedule table
     sched_df = pd.DataFrame(schedule, columns=["worker","day","slot"]).sort_values(["day","slot","worker"])
     st.dataframe(sched_df, use_container_width=True)
 
     # Slot metrics
-    rows = []
-    for (d,t), (u,o,staffed,dem) in metrics.items():
-        rows.append({"day": d, "slot": t, "staffed": staffed, "demand": dem, "under": u, "over": o})
-    met_df = pd.DataFrame(rows).sort_values(["day","slot"])
+    roster = Schedule.from_rows(schedule, default_W, D, T)
+    met_df = pd.DataFrame(roster.coverage_columns(Demand))
     st.dataframe(met_df, use_container_width=True)
 
     # Download buttons
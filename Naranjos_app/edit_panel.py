@@ -0,0 +1,46 @@
+import pandas as pd
+import streamlit as st
+
+from validation import describe_violations
+
+# Editable per-worker 7 x |T| tables for an editing.RosterEditor. Each table is
+# a data_editor of checkboxes over the solved grid; its on_change callback
+# hands the changed cells to the editor before the rerun, so the coverage
+# table, charts and hours read from the editor already show the edit. The
+# editor lives in st.session_state next to the solve job it came from, and
+# st.fragment (Streamlit >= 1.37) limits the rerun to the results section.
+
+fragment = getattr(st, "fragment", None) or (lambda fn: fn)
+
+
+def roster_editor(job, build):
+    """The RosterEditor of this solve job, from build() the first time."""
+    if st.session_state.get("editor_job") is not job:
+        st.session_state["editor"] = build()
+        st.session_state["editor_job"] = job
+    return st.session_state["editor"]
+
+
+def _apply(editor, i, key, columns):
+    editor.apply_edits(i, st.session_state[key]["edited_rows"], columns)
+
+
+def worker_editors(editor, slot_labels, day_labels):
+    """Edit summary, the rules the edited roster breaks and one checkbox table per worker."""
+    if editor.edits:
+        st.info(f"{editor.edits} cells changed by hand; total deviation now {editor.deviation:.4f}")
+        found = editor.violations()
+        if found:
+            st.warning("The edited roster breaks these rules:\n"
+                       + "\n".join(f"- {line}" for line in describe_violations(found)))
+        else:
+            st.success("The edited roster meets every rule.")
+        if st.button("Discard manual edits"):
+            editor.reset()
+            st.rerun()
+    for i, w in enumerate(editor.roster.W):
+        key = f"edit_{id(editor)}_{editor.version}_{i}"
+        table = pd.DataFrame(editor.solved[i].astype(bool), columns=slot_labels, index=day_labels)
+        with st.expander(f"{w}"):
+            st.data_editor(table, key=key, use_container_width=True, on_change=_apply,
+                           args=(editor, i, key, list(slot_labels)))
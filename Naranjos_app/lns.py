@@ -0,0 +1,198 @@
+import random
+import time
+
+import pulp
+
+from backends import pulp_solver
+from greedy import coverage_ok, greedy_schedule
+from progress import reached
+from shift_model import build_shift_model, extract_schedule, schedule_metrics, shifts_covering
+from warm_start import repair_schedule, schedule_patterns, set_initial_values
+
+# Large-neighbourhood search: every iteration keeps most workers on their
+# incumbent week and lets CBC re-optimise the rest under a short time limit.
+# Kept workers are substituted out (their staffing is taken off the demand),
+# so each sub-MIP only holds the free workers and stays small on big stores.
+# Neighbourhoods alternate between k random workers, k workers picked around
+# a badly covered (day, slot) cell and two days around such a cell for up to
+# 3k workers; cells are drawn with probability proportional to under + over.
+
+NEIGHBOURHOODS = ("random workers", "worst workers", "worst days")
+
+
+def bad_cell(metrics, rng):
+    """Random (d, t) drawn with probability proportional to its under + over."""
+    cells = list(metrics)
+    weights = [metrics[dt][0] + metrics[dt][1] for dt in cells]
+    return rng.choices(cells, weights=weights)[0]
+
+
+def choose_neighbourhood(kind, schedule, metrics, W, D, k, rng):
+    """Free (worker, day) pairs for one iteration."""
+    if kind == "worst days":
+        d, _ = bad_cell(metrics, rng)
+        i = D.index(d)
+        days = D[i:i + 2] if i + 1 < len(D) else D[i - 1:i + 1]
+        return {(w, d) for w in rng.sample(W, min(len(W), 3 * k)) for d in days}
+    workers = []
+    if kind == "worst workers":
+        d, t = bad_cell(metrics, rng)
+        under, over = metrics[(d, t)][:2]
+        on = {w for w, dd, tt in schedule if (dd, tt) == (d, t)}
+        # Over-staffed: someone working the cell must move; under-staffed: someone off must come in
+        candidates = sorted(on) if over > under else [w for w in W if w not in on]
+        workers = rng.sample(candidates, min(len(candidates), max(1, k // 2)))
+    rest = [w for w in W if w not in workers]
+    workers += rng.sample(rest, min(len(rest), k - len(workers)))
+    return {(w, d) for w in workers for d in D}
+
+
+def solve_neighbourhood(
+    free, schedule, W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=5,
+    backend="auto",
+):
+    """
+    Re-optimise the free (worker, day) pairs with everything else kept as in
+    `schedule`. Returns the new full schedule, or None if the solver found
+    nothing.
+    """
+    workers = [w for w in W if any((w, d) in free for d in D)]
+    kept = {(d, t): 0 for d in D for t in T}
+    for w, d, t in schedule:
+        if w not in workers:
+            kept[(d, t)] += 1
+    residual = {d: [Demand[d][idx] - kept[(d, t)] for idx, t in enumerate(T)] for d in D}
+    model, v = build_shift_model("Shift_Scheduling_LNS", workers, D, T, S, MinHw, MaxHw, residual,
+                                 Max_Deviation=Max_Deviation,
+                                 rest_pairs=rest_pairs,
+                                 closing_slot=closing_slot,
+                                 max_closings=max_closings,
+                                 weekend_only=[w for w in weekend_only if w in workers],
+                                 weekend_days=weekend_days,
+                                 require_min_staff=False,
+                                 formulation="lean")
+    if require_min_staff:
+        # Only cells the kept workers leave empty still need a free worker
+        cover = shifts_covering(S, T)
+        for (d, t), n in kept.items():
+            if n < 1:
+                model += pulp.lpSum(v["b"][w][d][se] for w in workers for se in cover[t]) >= 1
+
+    # The free workers' other days stay on the incumbent
+    current = [row for row in schedule if row[0] in workers]
+    patterns = schedule_patterns(current, workers, D)
+    for w in workers:
+        for d, cur in zip(D, patterns[w]):
+            if (w, d) not in free:
+                for se in S:
+                    v["b"][w][d][se].lowBound = v["b"][w][d][se].upBound = int(se == cur)
+    set_initial_values(v, current, workers, D, T, S, residual)
+    model.solve(pulp_solver(backend, time_limit=max(1, int(time_limit)), warm_start=True))
+    if pulp.value(model.objective) is None:
+        return None
+    return [row for row in schedule if row[0] not in workers] + extract_schedule(v, workers, D, T, S)
+
+
+def solve_lns(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    sub_time_limit=5,
+    k_workers=None,
+    patience=50,
+    initial_schedule=None,
+    seed=0,
+    on_iteration=None,
+    target=None,
+    backend="auto",
+    stop=None,
+):
+    """
+    LNS over the lean model. The start is `initial_schedule` (repaired) or
+    the greedy roster; if neither meets the cap / min-staff rows, the full
+    model gets one sub_time_limit run to find an incumbent.
+    Stops at time_limit (seconds, None = no limit), after `patience`
+    iterations in a row without improvement, when stop (threading.Event) is
+    set or once the roster meets `target` (a known lower bound, e.g. the LP
+    bound of bounds.py; "Optimal" then).
+    on_iteration(record) is called after every iteration with a dict
+    {"iteration", "neighbourhood", "objective", "improved", "elapsed"}.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T)
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=rest_pairs,
+        closing_slot=closing_slot,
+        max_closings=max_closings,
+        weekend_only=weekend_only,
+        weekend_days=weekend_days,
+        require_min_staff=require_min_staff,
+    )
+    start = time.time()
+    rng = random.Random(seed)
+    k = k_workers or max(2, min(10, len(W) // 3))
+
+    if initial_schedule is not None:
+        schedule = repair_schedule(initial_schedule, W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    else:
+        schedule = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)[2]
+    if not schedule:
+        # Some worker has no legal week at all
+        return "Infeasible", None, [], {}
+
+    objective, metrics = schedule_metrics(schedule, D, T, Demand)
+    if not coverage_ok(metrics, Max_Deviation, require_min_staff):
+        # The start breaks the cap / min-staff rows: one short full solve for an incumbent
+        model, v = build_shift_model("Shift_Scheduling_LNS", W, D, T, S, MinHw, MaxHw, Demand,
+                                     formulation="lean", **rules)
+        set_initial_values(v, schedule, W, D, T, S, Demand)
+        model.solve(pulp_solver(backend, time_limit=sub_time_limit, warm_start=True))
+        if pulp.LpStatus[model.status] in ("Infeasible", "Not Solved") or pulp.value(model.objective) is None:
+            return pulp.LpStatus[model.status], None, [], {}
+        schedule = extract_schedule(v, W, D, T, S)
+        objective, metrics = schedule_metrics(schedule, D, T, Demand)
+
+    bound = 0.0 if target is None else target
+    iteration = stall = 0
+    while not reached(objective, bound) and stall < patience:
+        if stop is not None and stop.is_set():
+            break
+        remaining = sub_time_limit if time_limit is None else time_limit - (time.time() - start)
+        if remaining <= 0:
+            break
+        kind = NEIGHBOURHOODS[iteration % len(NEIGHBOURHOODS)]
+        iteration += 1
+        free = choose_neighbourhood(kind, schedule, metrics, W, D, k, rng)
+        candidate = solve_neighbourhood(free, schedule, W, D, T, S, MinHw, MaxHw, Demand,
+                                        time_limit=min(sub_time_limit, remaining), backend=backend, **rules)
+        improved = False
+        if candidate is not None:
+            value, candidate_metrics = schedule_metrics(candidate, D, T, Demand)
+            if value < objective - 1e-6:
+                schedule, objective, metrics, improved = candidate, value, candidate_metrics, True
+        stall = 0 if improved else stall + 1
+        if on_iteration is not None:
+            on_iteration({
+                "iteration": iteration,
+                "neighbourhood": kind,
+                "objective": objective,
+                "improved": improved,
+                "elapsed": time.time() - start,
+            })
+
+    return ("Optimal" if reached(objective, bound) else "Feasible"), objective, schedule, metrics
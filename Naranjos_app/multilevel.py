@@ -0,0 +1,152 @@
+import math
+import time
+
+from backends import solve_matrix_model
+from bounds import slot_distances
+from matrix_model import build_matrix_model
+from progress import reached
+from reduction import candidate_shifts
+from warm_start import schedule_patterns
+
+# Multilevel engine for fine time grids (half-hour or quarter-hour slots,
+# where the shift set grows with the square of the slots per day). The week is
+# first solved on a coarse grid of `factor` consecutive slots per block: block
+# demand is the mean of its slots, hours are counted in blocks (MinHw rounded
+# down, MaxHw up) and the shifts are the fine shifts that start and end on
+# block edges. Its roster then guides the fine solve: days off stay off, and on
+# each worked day only fine shifts whose start and end lie within `radius`
+# slots of the coarse shift's keep a b column. The coarse roster, spread back
+# to fine slots and repaired, is the MIP start. If the guided model has no
+# roster, the direct fine model finishes from that start.
+
+
+def coarse_blocks(T, factor):
+    """Consecutive runs of `factor` slots of T (the last one may be shorter)."""
+    T = list(T)
+    return [T[i:i + factor] for i in range(0, len(T), factor)]
+
+
+def coarsen_instance(
+    T, S, MinHw, MaxHw, Demand,
+    factor=2,
+    rest_pairs=(),
+    closing_slot=None,
+):
+    """
+    Coarse (Tc, Sc, MinHc, MaxHc, Demand_c, rest_pairs_c, closing_c) plus
+    {coarse slot: fine slots}; slot k of Tc is block k of T.
+    """
+    T = list(T)
+    blocks = coarse_blocks(T, factor)
+    block_of = {t: k + 1 for k, block in enumerate(blocks) for t in block}
+    Tc = list(range(1, len(blocks) + 1))
+    first = {block[0]: k + 1 for k, block in enumerate(blocks)}
+    last = {block[-1]: k + 1 for k, block in enumerate(blocks)}
+    Sc = sorted({(first[s], last[e]) for s, e in S if s in first and e in last})
+    if not Sc:
+        raise ValueError(f"No shift starts and ends on {factor}-slot block edges")
+    index = {t: i for i, t in enumerate(T)}
+    Demand_c = {d: [sum(Demand[d][index[t]] for t in block) / len(block) for block in blocks] for d in Demand}
+    MinHc = {w: math.floor(MinHw[w] / factor + 1e-9) for w in MinHw}
+    MaxHc = {w: math.ceil(MaxHw[w] / factor - 1e-9) for w in MaxHw}
+    rest_c = sorted({(block_of[late], block_of[early]) for late, early in rest_pairs
+                     if late in block_of and early in block_of})
+    closing_c = block_of.get(closing_slot)
+    return Tc, Sc, MinHc, MaxHc, Demand_c, rest_c, closing_c, dict(zip(Tc, blocks))
+
+
+def guided_candidates(coarse_schedule, fine_candidates, W, D, blocks, radius):
+    """{(w, d): fine shifts} near each coarse shift; none on coarse days off."""
+    patterns = schedule_patterns(coarse_schedule, W, D)
+    guided = {}
+    for w in W:
+        for d, shift in zip(D, patterns[w]):
+            if shift is None:
+                guided[(w, d)] = []
+                continue
+            start, end = blocks[shift[0]][0], blocks[shift[1]][-1]
+            guided[(w, d)] = [(s, e) for s, e in fine_candidates[(w, d)]
+                              if abs(s - start) <= radius and abs(e - end) <= radius]
+    return guided
+
+
+def expand_schedule(coarse_schedule, blocks):
+    """Fine (w, d, t) rows for a coarse (w, d, block) schedule."""
+    return [(w, d, t) for w, d, k in coarse_schedule for t in blocks[k]]
+
+
+def solve_multilevel(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    factor=2,
+    radius=None,
+    time_limit=120,
+    backend="auto",
+    on_iteration=None,
+):
+    """
+    Coarse solve on `factor`-slot blocks, then the fine model on the shifts
+    near the coarse roster (radius fine slots, default `factor`).
+    "Optimal" only if the fine roster meets the analytic lower bound, else
+    "Feasible": the guided model is a restriction of the direct one.
+    on_iteration(record) gets {"level", "status", "objective", "columns", "elapsed"}
+    per level ("coarse", "guided", "direct").
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T)
+    radius = factor if radius is None else radius
+    rules = dict(
+        max_closings=max_closings,
+        weekend_only=weekend_only,
+        weekend_days=weekend_days,
+        require_min_staff=require_min_staff,
+    )
+    fine_rules = dict(rules, Max_Deviation=Max_Deviation, rest_pairs=rest_pairs, closing_slot=closing_slot)
+    start = time.time()
+
+    def remaining():
+        return None if time_limit is None else max(1, time_limit - (time.time() - start))
+
+    def report(level, result, mm):
+        if on_iteration is not None:
+            on_iteration({"level": level, "status": result[0], "objective": result[1],
+                          "columns": mm["shape"][1], "elapsed": time.time() - start})
+
+    # Coarse level: a block's staff is constant, so within Max_Deviation of
+    # every slot's demand means within it of the block mean
+    Tc, Sc, MinHc, MaxHc, Demand_c, rest_c, closing_c, blocks = coarsen_instance(
+        T, S, MinHw, MaxHw, Demand, factor=factor, rest_pairs=rest_pairs, closing_slot=closing_slot)
+    coarse = build_matrix_model(W, D, Tc, Sc, MinHc, MaxHc, Demand_c, Max_Deviation=Max_Deviation,
+                                rest_pairs=rest_c, closing_slot=closing_c, **rules)
+    limit = None if time_limit is None else time_limit / 3
+    result = solve_matrix_model(coarse, backend=backend, time_limit=limit)
+    report("coarse", result, coarse)
+    guide = expand_schedule(result[2], blocks) if result[1] is not None else None
+
+    # Fine level, guided by the coarse roster
+    target = sum(slot_distances(W, D, T, Demand, require_min_staff=require_min_staff,
+                                weekend_only=set(weekend_only), weekend_days=weekend_days).values())
+    fine_candidates = candidate_shifts(W, D, T, S, MinHw, MaxHw, Demand, **fine_rules)
+    status, objective = "Not Solved", None
+    if guide is not None:
+        candidates = guided_candidates(result[2], fine_candidates, W, D, blocks, radius)
+        mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=candidates, **fine_rules)
+        result = solve_matrix_model(mm, backend=backend, time_limit=remaining(), initial_schedule=guide,
+                                    target=target)
+        report("guided", result, mm)
+        status, objective, schedule, metrics = result
+
+    if objective is None:
+        # The guide left no roster: the direct model, started from the guide
+        mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=fine_candidates, **fine_rules)
+        result = solve_matrix_model(mm, backend=backend, time_limit=remaining(), initial_schedule=guide,
+                                    target=target)
+        report("direct", result, mm)
+        return result
+    return ("Optimal" if reached(objective, target) else "Feasible"), objective, schedule, metrics
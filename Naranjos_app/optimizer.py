@@ -1,6 +1,31 @@
 
+import functools
 import time
-import pulp
+
+from aggregated import solve_aggregated
+from backends import select_backend, solve_matrix_model
+from bounds import objective_bounds
+from column_generation import solve_columns
+from diagnosis import diagnose_infeasibility
+from greedy import greedy_schedule
+from lagrangian import solve_lagrangian
+from lazy import solve_lazy
+from lns import solve_lns
+from local_search import solve_local_search
+from matrix_model import build_matrix_model
+from multilevel import solve_multilevel
+from portfolio import solve_portfolio
+from progress import SolveResult, gap_stopped, progress_event, reached, with_lower_bound
+from reduction import candidate_shifts, describe_candidates
+from schedule_model import checkin_model, checkout_model
+from screening import screen_instance
+from shift_model import build_shift_set
+from two_stage import solve_two_stage
+from validation import schedule_violations
+
+# 12h rest: only t=13 (late) vs next day t=1 (early); closing shifts at t=13
+REST_PAIRS = [(13, 1)]
+CLOSING_SLOT = 13
 
 def solve_schedule(
     W,
@@ -11,6 +36,17 @@ def solve_schedule(
     Demand=None,
     Max_Deviation=2.5,
     require_min_staff=True,
+    solver_time_limit=None,
+    formulation="lean",
+    engine="mip",
+    initial_schedule=None,
+    on_iteration=None,
+    backend="auto",
+    gap=None,
+    on_progress=None,
+    stop=None,
+    diagnose=False,
+    prune="exact",
 ):
     W = list(W); D = list(D); T = list(T)
     if MinHw is None or MaxHw is None:
@@ -24,75 +60,242 @@ def solve_schedule(
             if len(Demand[d]) != len(T):
                 raise ValueError(f"Demand[day={d}] length should be {len(T)}, got {len(Demand[d])}")
 
-    # Shift set 4..8 inclusive
-    S = [(s,e) for s in T for e in T if s<=e and 4 <= (e - s + 1) <= 8]
+    # Shift set with inclusive length 4..8
+    S = build_shift_set(T, 4, 8)
 
-    model = pulp.LpProblem("Shift_Scheduling_Naranjos", pulp.LpMinimize)
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=REST_PAIRS,
+        closing_slot=CLOSING_SLOT,
+        require_min_staff=require_min_staff,
+    )
 
-    x = pulp.LpVariable.dicts("x", (W, D, T), cat="Binary")
-    y = pulp.LpVariable.dicts("y", (W, D), cat="Binary")
-    z = pulp.LpVariable.dicts("z", (W, range(1,7)), cat="Binary")
-    b = pulp.LpVariable.dicts("b", (W, D, S), cat="Binary")
-    under = pulp.LpVariable.dicts("under", (D, T), lowBound=0)
-    over  = pulp.LpVariable.dicts("over",  (D, T), lowBound=0)
+    # Every path returns a SolveResult: the 4-tuple plus what was found on the
+    # way (portfolio winner, bounds, lower bound, candidates, diagnostics)
+    info = {}
 
-    # Objective
-    model += pulp.lpSum(under[d][t] + over[d][t] for d in D for t in T)
+    def done(status, objective, schedule, metrics):
+        return SolveResult(status, objective, schedule, metrics, **info)
 
-    # Link & daily min/max
-    for w in W:
-        for d in D:
-            model += pulp.lpSum(b[w][d][se] for se in S) <= 1
-            for t in T:
-                model += x[w][d][t] == pulp.lpSum(b[w][d][se] for se in S if se[0] <= t <= se[1])
-            model += y[w][d] == pulp.lpSum(b[w][d][se] for se in S)
-            model += pulp.lpSum(x[w][d][t] for t in T) >= 4 * y[w][d]
-            model += pulp.lpSum(x[w][d][t] for t in T) <= 8 * y[w][d]
-
-    # Weekly hours
-    for w in W:
-        model += pulp.lpSum(x[w][d][t] for d in D for t in T) >= MinHw[w]
-        model += pulp.lpSum(x[w][d][t] for d in D for t in T) <= MaxHw[w]
-
-    # Two consecutive rest days
-    for w in W:
-        model += pulp.lpSum(z[w][d] for d in range(1,7)) == 1
-        for d in range(1,7):
-            model += z[w][d] <= 1 - y[w][d]
-            model += z[w][d] <= 1 - y[w][d+1]
-
-    # 12h rest only between t=13 and next day t=1
-    if 13 in T and 1 in T:
-        for w in W:
-            for d in range(1,7):
-                model += x[w][d][13] + x[w][d+1][1] <= 1
-
-    # Max 2 closing (t=13)
-    if 13 in T:
-        for w in W:
-            model += pulp.lpSum(x[w][d][13] for d in D) <= 2
-
-    # Demand + bounds
-    for d in D:
-        for idx, t in enumerate(T):
-            model += pulp.lpSum(x[w][d][t] for w in W) + under[d][t] - over[d][t] == Demand[d][idx]
-            model += under[d][t] + over[d][t] <= Max_Deviation
-            if require_min_staff:
-                model += pulp.lpSum(x[w][d][t] for w in W) >= 1
+    # Screening (screening.py): inputs the rows cannot satisfy are rejected
+    # with diagnostics before any model is built
+    problems = screen_instance(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    if problems:
+        info.update(diagnostics=problems, diagnosed_by="screening")
+        return done("Infeasible", None, [], {})
+
+    # Heuristic shift prune (reduction.py): if it removed shifts the rows need,
+    # the instance is solved again with the exact candidates
+    exact = functools.partial(
+        solve_schedule, W, D, T, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+        require_min_staff=require_min_staff, solver_time_limit=solver_time_limit, formulation=formulation,
+        engine=engine,
+        initial_schedule=initial_schedule, on_iteration=on_iteration, backend=backend, gap=gap,
+        on_progress=on_progress, stop=stop, diagnose=diagnose, prune="exact")
+
+    def infeasible():
+        if prune == "demand":
+            return exact()
+        # The rows conflict after all: one elastic solve (diagnosis.py) names
+        # the constraint groups to relax
+        if diagnose:
+            groups = diagnose_infeasibility(W, D, T, S, MinHw, MaxHw, Demand, backend=backend, **rules)[0]
+            info.update(diagnostics=groups, diagnosed_by="diagnosis")
+        return done("Infeasible", None, [], {})
+
+    if engine == "multilevel":
+        # Two-slot blocks first, then the slot model on shifts near that roster
+        status, objective, schedule, metrics = solve_multilevel(
+            W, D, T, S, MinHw, MaxHw, Demand, time_limit=solver_time_limit, backend=backend,
+            on_iteration=on_iteration, **rules)
+        if status == "Infeasible":
+            return infeasible()
+        return done(status, objective, schedule, metrics)
+
+    # Greedy rosters: the quick preview engine, the default MIP start and the
+    # fallback when CBC is missing or returns no incumbent
+    greedy = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    if engine == "greedy":
+        return done(*greedy)
+
+    backend = select_backend(backend)
+    if backend is None and engine != "local_search":
+        # No solver installed: degraded mode
+        return done(*greedy)
+
+    # Model reduction (reduction.py): b columns only for each (worker, day)'s
+    # candidate shifts, always including the MIP start's
+    candidates = candidate_shifts(W, D, T, S, MinHw, MaxHw, Demand, prune=prune,
+                                  required=greedy[2] if initial_schedule is None else initial_schedule, **rules)
+    info["candidates"] = describe_candidates(candidates, S)
+
+    if engine == "two_stage":
+        # Shift counts per day first, then the lean model on the shifts they
+        # use (two_stage.py); the full model only finishes what they leave open
+        status, objective, schedule, metrics, lower_bound = solve_two_stage(
+            W, D, T, S, MinHw, MaxHw, Demand, time_limit=solver_time_limit, backend=backend, candidates=candidates,
+            initial_schedule=greedy[2] if initial_schedule is None else initial_schedule,
+            on_iteration=on_iteration, **rules)
+        # The counts' bound holds for the greedy fallback too
+        info["lower_bound"] = lower_bound
+        if objective is None and status != "Infeasible" and greedy[2]:
+            return done(*greedy)
+        if status == "Infeasible":
+            return infeasible()
+        return done(status, objective, schedule, metrics)
+
+    # Lower bounds (bounds.py) on the matrix model: an infeasible LP relaxation
+    # ends the solve here, a greedy roster that meets the bound is already
+    # optimal, and the solvers stop as soon as their incumbent meets it. The
+    # bounds reach the caller as result["bounds"] and in the first on_progress
+    # event.
+    mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=candidates, **rules)
+    bounds = objective_bounds(mm, backend=backend)
+    info["bounds"] = bounds
+    if bounds["infeasible"]:
+        return infeasible()
+    target = bounds["lower_bound"]
+    if greedy[0] == "Feasible" and reached(greedy[1], target):
+        return done("Optimal", *greedy[1:])
+    if on_progress is not None:
+        incumbent = greedy[1] if greedy[0] == "Feasible" else None
+        on_progress(dict(progress_event(incumbent, target, 0, 0.0),
+                         analytic_bound=bounds["analytic"], lp_bound=bounds["lp"]))
+        on_progress = with_lower_bound(on_progress, target)
+
+    def mip_done(status, objective, schedule, metrics):
+        # A solver stopped at `gap` says "Optimal" too: only the bound proves it
+        if gap_stopped(status, objective, gap, target):
+            status, info["gap_stopped"] = "Feasible", True
+        return done(status, objective, schedule, metrics)
+
+    # Engines outside the MIP below: they start from the greedy roster (or
+    # initial_schedule), stop at the bound above, the time limit or `stop`,
+    # and report each iteration to on_progress too
+    if engine in ("aggregated", "columns", "lns", "local_search", "lagrangian"):
+        start = greedy[2] if initial_schedule is None else initial_schedule
+
+        def report(record):
+            if on_iteration is not None:
+                on_iteration(record)
+            if on_progress is not None:
+                on_progress(progress_event(record["objective"], record.get("lower_bound"), 0, record["elapsed"]))
+
+        if engine in ("aggregated", "columns"):
+            # Weekly patterns: integer counts per contract class or one roster
+            # column per worker
+            solve = solve_aggregated if engine == "aggregated" else solve_columns
+            result = solve(W, D, T, S, MinHw, MaxHw, Demand, time_limit=solver_time_limit, initial_schedule=start,
+                           backend=backend, gap=gap, stop=stop, **rules)
+        elif engine == "lns":
+            result = solve_lns(W, D, T, S, MinHw, MaxHw, Demand, time_limit=solver_time_limit, initial_schedule=start,
+                               on_iteration=report, target=target, backend=backend, stop=stop, **rules)
+        elif engine == "local_search":
+            # No MIP solver: it also runs without a backend, on the analytic bound
+            budget = {} if solver_time_limit is None else {"time_limit": solver_time_limit}
+            result = solve_local_search(W, D, T, S, MinHw, MaxHw, Demand, initial_schedule=start, target=target,
+                                        on_iteration=report, stop=stop, **budget, **rules)
+        else:
+            # Weekly rows relaxed, one MIP per day in a process pool; it stops
+            # once the repaired roster meets the dual bound or the bound above
+            result = solve_lagrangian(W, D, T, S, MinHw, MaxHw, Demand, time_limit=solver_time_limit, target=target,
+                                      on_iteration=report, backend=backend, stop=stop, **rules)
+            info["lower_bound"] = result[4]
+        if result[0] == "Infeasible":
+            return infeasible()
+        return done(*result[:4])
+
+    if engine == "lazy":
+        # 12h-rest and closing rows only where an incumbent breaks them (lazy.py)
+        status, objective, schedule, metrics = solve_lazy(
+            W, D, T, S, MinHw, MaxHw, Demand, candidates=candidates, backend=backend, time_limit=solver_time_limit,
+            initial_schedule=greedy[2] if initial_schedule is None else initial_schedule,
+            target=target, on_iteration=on_iteration, **rules)
+        if objective is None and status != "Infeasible" and greedy[2]:
+            return done(*greedy)
+        if status == "Infeasible":
+            return infeasible()
+        return done(status, objective, schedule, metrics)
+
+    if engine == "portfolio":
+        # Solver configurations (seeds, settings, CBC / HiGHS) raced on the matrix
+        # model, one process per core; the first to prove optimality stops the rest
+        status, objective, schedule, metrics, report = solve_portfolio(
+            mm, time_limit=solver_time_limit,
+            initial_schedule=greedy[2] if initial_schedule is None else initial_schedule,
+            incumbent=greedy, on_result=on_iteration, gap=gap, stop=stop, target=target)
+        if status == "Infeasible":
+            return infeasible()
+        info["winner"] = report["winner"]
+        return mip_done(status, objective, schedule, metrics)
 
+    if engine == "matrix" or backend != "cbc":
+        # Lean model assembled with NumPy straight into sparse arrays; CBC reads
+        # them from an MPS file, HiGHS takes them in-process
+        status, objective, schedule, metrics = solve_matrix_model(
+            mm, backend=backend, time_limit=solver_time_limit, msg=True,
+            initial_schedule=greedy[2] if initial_schedule is None else initial_schedule,
+            gap=gap, on_progress=on_progress, stop=stop, target=target)
+        if objective is None and status != "Infeasible" and greedy[2]:
+            return done(*greedy)
+        if status == "Infeasible":
+            return infeasible()
+        return mip_done(status, objective, schedule, metrics)
+
+    # Persistent model: built once per (days, slots, shifts, rules) and updated
+    # in place for the current staff, hours, demand and cap on later solves
+    sm = checkout_model("Shift_Scheduling_Naranjos", W, D, T, S, MinHw, MaxHw, Demand,
+                        formulation=formulation, **rules)
+    sm.restrict_shifts(candidates)
+
+    # MIP start from a previous (w, d, t) schedule repaired to the current rules,
+    # else from the greedy roster (CBC closes the gap faster from it than from
+    # the model's last optimum)
+    if initial_schedule is None:
+        initial_schedule = greedy[2]
+
+    # Solve
     start = time.time()
-    model.solve(pulp.PULP_CBC_CMD(msg=True))
+    status, objective, schedule, metrics = sm.solve(time_limit=solver_time_limit, msg=True,
+                                                    initial_schedule=initial_schedule,
+                                                    gap=gap, on_progress=on_progress, stop=stop, target=target)
     end = time.time()
+    checkin_model(sm)
+    if objective is None and status != "Infeasible" and greedy[2]:
+        # CBC stopped without an incumbent: keep the greedy roster
+        return done(*greedy)
+    if status == "Infeasible":
+        return infeasible()
 
-    status = pulp.LpStatus[model.status]
-    objective = pulp.value(model.objective)
-
-    schedule = [(w,d,t) for w in W for d in D for t in T if pulp.value(x[w][d][t]) > 0.5]
+    return mip_done(status, objective, schedule, metrics)
 
-    metrics = {}
-    for d in D:
-        for idx, t in enumerate(T):
-            staffed = sum(1 for w in W if pulp.value(x[w][d][t]) > 0.5)
-            metrics[(d,t)] = (pulp.value(under[d][t]), pulp.value(over[d][t]), staffed, Demand[d][idx])
 
-    return status, objective, schedule, metrics
+def validate_schedule(
+    schedule,
+    W,
+    D=range(1,8),
+    T=range(1,14),  # 13 slots (1..13)
+    MinHw=None,
+    MaxHw=None,
+    Demand=None,
+    Max_Deviation=2.5,
+    require_min_staff=True,
+    S=None,
+):
+    """
+    Returns: list of broken rules (validation.py), empty if legal
+      - schedule: list[(worker, day, slot)], e.g. edited or imported
+      - Demand: optional; adds the deviation and min-staff rules
+      - S: shift set giving the legal lengths; default the 4..8 h shifts
+        solve_schedule uses
+    """
+    W = list(W); D = list(D); T = list(T)
+    if MinHw is None or MaxHw is None:
+        raise ValueError("MinHw and MaxHw must be provided.")
+    if S is None:
+        S = build_shift_set(T, 4, 8)
+    lengths = [e - s + 1 for s, e in S]
+    return schedule_violations(schedule, W, D, T, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+                               rest_pairs=REST_PAIRS, closing_slot=CLOSING_SLOT,
+                               require_min_staff=require_min_staff, min_len=min(lengths),
+                               max_len=max(lengths))
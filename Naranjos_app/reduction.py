@@ -0,0 +1,103 @@
+import math
+
+import numpy as np
+
+from screening import TOLERANCE, working_days
+from warm_start import schedule_patterns
+
+# Model reduction: a candidate shift list per (worker, day), so the matrix
+# model only gets b columns for shifts a roster can use. The "exact" rules
+# only drop shifts that no feasible roster contains, so the optimum is
+# unchanged:
+#   - days a weekend-only worker may not work (no shifts at all)
+#   - shift lengths that cannot be part of any week within the worker's
+#     MinHw..MaxHw (whole hours, at most their working days)
+#   - shifts through a slot whose demand + Max_Deviation is below one
+#     (that slot must stay empty)
+#   - shifts through the closing slot when max_closings is 0
+# prune="demand" also drops shifts whose slots all have demand below
+# DEMAND_FLOOR (each worker on them only adds overstaffing). That rule is a
+# heuristic: the min-staff, hours and rest rows can still need such a shift,
+# so the optimizers fall back to the exact candidates when the pruned model
+# is infeasible, and its optimum is only optimal over the pruned shift set.
+# The shifts of the MIP start (required=) always stay candidates, so neither
+# rule cuts the start short.
+
+PRUNE_MODES = ("none", "exact", "demand")
+DEMAND_FLOOR = 0.5
+
+
+def usable_lengths(lengths, low, high, days, min_len, max_len):
+    """Shift lengths that fit in some week of 1..days shifts with low..high hours."""
+    usable = set()
+    for length in lengths:
+        for k in range(1, days + 1):
+            if max(low, length + (k - 1) * min_len) <= min(high, length + (k - 1) * max_len):
+                usable.add(length)
+                break
+    return usable
+
+
+def candidate_shifts(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    prune="exact",
+    required=(),
+):
+    """
+    {(w, d): [shifts]} for an instance with Demand[d] aligned with T.
+    prune: "none" (every shift), "exact" or "demand" (exact plus the heuristic).
+    required: (w, d, t) rows, e.g. the MIP start, whose shifts are kept.
+    """
+    if prune not in PRUNE_MODES:
+        raise ValueError(f"prune must be one of {PRUNE_MODES}, got {prune!r}")
+    W = list(W); D = list(D); T = list(T); S = list(S)
+    if prune == "none":
+        return {(w, d): list(S) for w in W for d in D}
+    weekend_only = set(weekend_only)
+    lengths = np.array([e - s + 1 for s, e in S])
+    t = np.array(T)
+    cover = (np.array([s for s, _ in S])[:, None] <= t) & (t <= np.array([e for _, e in S])[:, None])
+    demand = np.array([[Demand[d][i] for i in range(len(T))] for d in D], dtype=float)
+
+    # Per day: shifts through a slot that must stay empty (and closing shifts)
+    blocked = np.floor(demand + Max_Deviation + TOLERANCE) < 1
+    open_shift = ~(cover[None, :, :] & blocked[:, None, :]).any(axis=2)
+    if closing_slot in T and max_closings <= 0:
+        open_shift &= ~cover[:, T.index(closing_slot)][None, :]
+    if prune == "demand":
+        low_demand = demand < DEMAND_FLOOR
+        open_shift &= ~(~cover[None, :, :] | low_demand[:, None, :]).all(axis=2)
+
+    candidates = {}
+    for w in W:
+        allowed = [d for d in D if w not in weekend_only or d in weekend_days]
+        fits = usable_lengths(set(lengths.tolist()), math.ceil(MinHw[w] - TOLERANCE),
+                              math.floor(MaxHw[w] + TOLERANCE), working_days(D, allowed),
+                              lengths.min(), lengths.max())
+        fits = np.isin(lengths, list(fits))
+        for i, d in enumerate(D):
+            keep = open_shift[i] & fits if d in allowed else np.zeros(len(S), bool)
+            candidates[(w, d)] = [S[k] for k in np.flatnonzero(keep)]
+
+    patterns = schedule_patterns(required, W, D)
+    for w in W:
+        for d, cur in zip(D, patterns[w]):
+            if cur in S and cur not in candidates[(w, d)]:
+                candidates[(w, d)].append(cur)
+    return candidates
+
+
+def count_candidates(candidates):
+    return sum(len(shifts) for shifts in candidates.values())
+
+
+def describe_candidates(candidates, S):
+    total = len(candidates) * len(S)
+    return f"Candidate shifts: {count_candidates(candidates)} of {total} (worker, day, shift) columns"
@@ -1,3 +1,5 @@
+import functools
+
 import streamlit as st
 
 # Guarded imports
@@ -8,7 +10,13 @@ except Exception as e:
     st.error("Please install pandas and numpy: pip install -r requirements.txt")
     st.stop()
 
-from optimizer import solve_schedule
+from bounds import describe_bounds
+from edit_panel import fragment, roster_editor, worker_editors
+from editing import RosterEditor
+from optimizer import solve_schedule, validate_schedule
+from progress import SolveJob
+from roster import Schedule
+from solve_panel import follow_solve
 
 st.set_page_config(page_title="Naranjos Shift Scheduler (12-24)", layout="wide")
 st.title("Naranjos Shift Scheduler (12:00–24:00)")
@@ -34,6 +42,9 @@ DEFAULT_STAFF = [
 with st.sidebar:
     st.header("Configuration")
     max_dev = st.number_input("Max deviation per slot", min_value=0.0, value=2.5, step=0.1)
+    quick_preview = st.checkbox("Quick preview (greedy, no solver)", value=False)
+    race_solvers = st.checkbox("Race solver configurations (one per CPU core)", value=False)
+    gap_pct = st.number_input("Stop at relative gap (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.5)
     ensure_min_staff = st.checkbox("Require at least 1 staff per slot", value=True)
 
     st.subheader("Staff table")
@@ -82,59 +93,80 @@ MinHw = to_hours_dict(staff_df, "min_week_hours")
 MaxHw = to_hours_dict(staff_df, "max_week_hours")
 W = [str(w) for w in staff_df["name"].tolist()]
 
+Demand = {d: list(map(float, demand_df.iloc[d-1].tolist())) for d in D}
+
 if st.button("Solve", type="primary"):
-    with st.spinner("Solving..."):
-        Demand = {d: list(map(float, demand_df.iloc[d-1].tolist())) for d in D}
-        status, obj, schedule, metrics = solve_schedule(
-            W=W, D=D, T=T,
-            MinHw=MinHw, MaxHw=MaxHw,
-            Demand=Demand,
-            Max_Deviation=max_dev,
-            require_min_staff=ensure_min_staff,
-        )
+    st.session_state["solve_job"] = SolveJob(
+        solve_schedule,
+        W=W, D=D, T=T,
+        MinHw=MinHw, MaxHw=MaxHw,
+        Demand=Demand,
+        Max_Deviation=max_dev,
+        engine="greedy" if quick_preview else ("portfolio" if race_solvers else "mip"),
+        require_min_staff=ensure_min_staff,
+        gap=gap_pct / 100,
+        diagnose=True,
+    )
 
-    st.success(f"Status: {status}; Total deviation: {obj:.4f}")
+job = st.session_state.get("solve_job")
+if job is not None:
+    result = follow_solve(job)
+    if result.get("diagnosed_by") == "screening":
+        # Rejected by the pre-solve screen, before any model was built
+        st.error("These inputs cannot produce a schedule:\n" + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+    if result.get("diagnostics"):
+        # The MIP was infeasible: the elastic solve (diagnosis.py) names the rules to relax
+        st.error("No roster meets every rule; relax one of these:\n"
+                 + "\n".join(f"- {msg}" for msg in result["diagnostics"]))
+        st.stop()
+
+    status, obj, schedule, metrics = result
+    if obj is None:
+        st.error(f"Status: {status}; no schedule found.")
+        st.stop()
 
-    # Schedule table
-    sched_df = pd.DataFrame(schedule, columns=["worker","day","slot"]).sort_values(["day","slot","worker"])
-    st.dataframe(sched_df, use_container_width=True)
-
-    # Coverage table
-    rows = []
-    for (d,t),(u,o,staffed,dem) in metrics.items():
-        rows.append({"day":d,"slot":t,"staffed":staffed,"demand":dem,"under":u,"over":o})
-    cov_df = pd.DataFrame(rows).sort_values(["day","slot"])
-    st.dataframe(cov_df, use_container_width=True)
-
-    # Downloads
-    st.download_button("Download schedule CSV", sched_df.to_csv(index=False).encode("utf-8"),
-                       file_name="naranjos_schedule.csv", mime="text/csv")
-    st.download_button("Download coverage CSV", cov_df.to_csv(index=False).encode("utf-8"),
-                       file_name="naranjos_coverage.csv", mime="text/csv")
-
-    # Per-worker 7x13 tables
-    st.markdown("### Per-worker Schedule (7×13, color = scheduled)")
-    workers = [str(w) for w in staff_df["name"].tolist()]
-    def style_schedule(df):
-        return df.style.apply(lambda s: ['background-color: #C6F6D5' if v==1 else '' for v in s], axis=1)
-    worker_tables = {}
-    if not sched_df.empty:
-        import numpy as np
-        for w in workers:
-            mat = np.zeros((7,13), dtype=int)
-            sub = sched_df[sched_df["worker"] == w]
-            for _, r in sub.iterrows():
-                d = int(r["day"]) - 1
-                t = int(r["slot"]) - 1
-                if 0 <= d < 7 and 0 <= t < 13:
-                    mat[d, t] = 1
-            idx = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
-            dfw = pd.DataFrame(mat, columns=SLOT_LABELS, index=idx)
-            worker_tables[w] = dfw
-    for w in workers:
-        if w in worker_tables:
-            with st.expander(w):
-                st.dataframe(style_schedule(worker_tables[w]), use_container_width=True)
+    st.success(f"Status: {status}; Total deviation: {obj:.4f}")
+    if result.get("gap_stopped"):
+        st.caption(f"Stopped at the {gap_pct:g} % gap: not proven optimal")
+    if result.get("winner"):
+        st.caption(f"Portfolio winner: {result['winner']}")
+    if result.get("candidates"):
+        st.caption(result["candidates"])
+    if result.get("bounds"):
+        st.caption(describe_bounds(result["bounds"]))
+
+    # Manual edits (editing.py): cells switched in the per-worker tables update
+    # the coverage table in place, with no new solve
+    def start_editing():
+        roster = Schedule.from_rows(schedule, W, D, T)
+        return RosterEditor(roster, pd.DataFrame(roster.coverage_columns(Demand)),
+                            validate=functools.partial(validate_schedule, W=W, D=D, T=T, MinHw=MinHw, MaxHw=MaxHw,
+                                                       Demand=Demand, Max_Deviation=max_dev,
+                                                       require_min_staff=ensure_min_staff))
+    editor = roster_editor(job, start_editing)
+
+    @fragment
+    def results():
+        # Schedule table
+        sched_df = pd.DataFrame(editor.schedule(), columns=["worker","day","slot"]).sort_values(["day","slot","worker"])
+        st.dataframe(sched_df, use_container_width=True)
+
+        # Coverage table
+        cov_df = editor.coverage_df
+        st.dataframe(cov_df, use_container_width=True)
+
+        # Downloads
+        st.download_button("Download schedule CSV", sched_df.to_csv(index=False).encode("utf-8"),
+                           file_name="naranjos_schedule.csv", mime="text/csv")
+        st.download_button("Download coverage CSV", cov_df.to_csv(index=False).encode("utf-8"),
+                           file_name="naranjos_coverage.csv", mime="text/csv")
+
+        # Per-worker 7x13 tables, editable
+        st.markdown("### Per-worker Schedule (7×13, ticked = scheduled; tick or untick to adjust)")
+        worker_editors(editor, SLOT_LABELS, ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"])
+
+    results()
 
 # Template download (7x13, no header)
 templ = pd.DataFrame([default_demand[d] for d in D])
@@ -0,0 +1,142 @@
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+from backends import backend_available, solve_arrays
+from matrix_model import initial_values, matrix_schedule
+from progress import gap_stopped, reached
+from warm_start import repair_schedule
+
+# Solver portfolio: the same matrix model raced by several solver
+# configurations, one process each. MIP solve times swing widely with the seed
+# and the search settings (Alcazar: 4 s to 69 s over the configurations below),
+# so the first configuration to prove optimality (or infeasibility) wins and
+# the others are stopped. With a time limit every configuration stops at it and
+# the best incumbent wins. Only as many configurations as there are cores run,
+# in PORTFOLIO order.
+
+PORTFOLIO = (
+    {"name": "cbc", "backend": "cbc"},
+    {"name": "cbc-seed-2", "backend": "cbc", "options": {"randomCbcSeed": 2, "randomSeed": 2}},
+    {"name": "highs", "backend": "highs"},
+    {"name": "cbc-strategy-2", "backend": "cbc", "options": {"strategy": 2}},
+    {"name": "cbc-seed-3", "backend": "cbc", "options": {"randomCbcSeed": 3, "randomSeed": 3}},
+    {"name": "highs-seed-1", "backend": "highs", "options": {"random_seed": 1}},
+    {"name": "cbc-proximity", "backend": "cbc", "options": {"proximity": "on"}},
+    {"name": "cbc-root-cuts", "backend": "cbc", "options": {"cuts": "root"}},
+)
+
+# Seconds past the time limit the solvers get to write out their incumbents
+GRACE = 10
+POLL = 1.0
+
+
+def _race(index, config, mm, time_limit, x0, gap, target, results):
+    # Own process group, so stopping this configuration also stops CBC's process
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    start = time.time()
+    try:
+        status, x = solve_arrays(mm, backend=config["backend"], time_limit=time_limit, x0=x0,
+                                 options=config.get("options"), gap=gap, target=target)
+    except Exception:
+        status, x = "Not Solved", None
+    results.put((index, status, x, time.time() - start))
+
+
+def _record(config, status="Stopped", objective=None, elapsed=None, proven=False):
+    return {"config": config["name"], "backend": config["backend"], "status": status,
+            "objective": objective, "elapsed": elapsed, "proven": proven}
+
+
+def _stop(process):
+    if process.is_alive():
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            process.kill()
+    process.join()
+
+
+def solve_portfolio(mm, configs=None, time_limit=None, processes=None, initial_schedule=None,
+                    incumbent=None, on_result=None, gap=None, stop=None, target=None):
+    """
+    Race solver configurations on a matrix model, one process each.
+    configs: dicts {"name", "backend", "options"} (default PORTFOLIO; missing backends are skipped)
+    processes: how many run at once (default: one per core)
+    incumbent: (status, objective, schedule, metrics) already in hand, e.g. the
+    greedy roster; it wins as "incumbent" if no configuration beats it
+    on_result(record) gets {"config", "backend", "status", "objective", "elapsed", "proven"}
+    as each configuration finishes. gap: relative gap every configuration stops
+    at (a stop there only ends the race if the objective reaches target);
+    stop (threading.Event): end the race with the best incumbent so far;
+    target: a lower bound (bounds.py) - the first configuration to reach it wins.
+    Returns: status, objective, schedule, metrics, report {"winner", "results"}
+    """
+    configs = [c for c in (PORTFOLIO if configs is None else configs) if backend_available(c["backend"])]
+    if not configs:
+        raise ValueError("No solver backend installed for the portfolio")
+    configs = configs[:max(1, processes or os.cpu_count() or 1)]
+
+    inst = mm["instance"]
+    x0 = None
+    if initial_schedule:
+        start = repair_schedule(initial_schedule, inst["W"], inst["D"], inst["T"], inst["S"],
+                                inst["MinHw"], inst["MaxHw"], inst["Demand"], **mm["rules"])
+        if start is not None:
+            x0 = initial_values(mm, start)
+
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=_race, args=(i, c, mm, time_limit, x0, gap, target, results), daemon=True)
+               for i, c in enumerate(configs)]
+    for p in workers:
+        p.start()
+
+    deadline = None if time_limit is None else time.time() + time_limit + GRACE
+    records = {}
+    best, winner = None, None
+    try:
+        while len(records) < len(configs):
+            if (deadline is not None and time.time() >= deadline) or (stop is not None and stop.is_set()):
+                break
+            try:
+                i, status, x, elapsed = results.get(timeout=POLL)
+            except queue.Empty:
+                # A configuration that died without reporting counts as not solved
+                for i, p in enumerate(workers):
+                    if i not in records and p.exitcode not in (None, 0):
+                        records[i] = _record(configs[i], "Not Solved")
+                continue
+            # A solver that stops before the time limit has closed the gap,
+            # unless `gap` let it stop short of the lower bound
+            objective = float(mm["c"] @ x) if status == "Optimal" and x is not None else None
+            closed = (status in ("Optimal", "Infeasible", "Unbounded")
+                      and not gap_stopped(status, objective, gap, target))
+            proven = (closed and (time_limit is None or elapsed < time_limit)) or reached(objective, target)
+            records[i] = _record(configs[i], status, objective, elapsed, proven)
+            if on_result is not None:
+                on_result(records[i])
+            if proven:
+                best, winner = (status, objective, x), i
+                break
+            if objective is not None and (best is None or objective < best[1] - 1e-9):
+                best, winner = (status, objective, x), i
+    finally:
+        for p in workers:
+            _stop(p)
+
+    report = {"winner": None, "results": [records.get(i, _record(c)) for i, c in enumerate(configs)]}
+    if incumbent is not None and incumbent[1] is not None and (
+            best is None or (best[1] is not None and incumbent[1] < best[1] - 1e-9)):
+        report["winner"] = "incumbent"
+        return (*incumbent[:4], report)
+    if best is None:
+        return "Not Solved", None, [], {}, report
+    report["winner"] = configs[winner]["name"]
+    status, objective, x = best
+    if objective is None:
+        return status, None, [], {}, report
+    schedule, metrics = matrix_schedule(mm, x)
+    return status, objective, schedule, metrics, report
@@ -0,0 +1,218 @@
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import pty
+except ImportError:  # Windows: CBC's log comes through a pipe, in blocks
+    pty = None
+
+# Anytime solving: the solvers report their progress as events
+#   {"incumbent", "bound", "gap", "nodes", "elapsed"}
+# to on_progress(event), and setting a threading.Event `stop` ends the search
+# early with the incumbent kept ("stop and use current best"). CBC's log is
+# read through a pseudo-terminal so it arrives line by line (through a pipe it
+# is block-buffered until the end); stopping sends CBC the Ctrl-C signal, after
+# which it writes its best solution as usual. target= stops the same way once
+# the incumbent reaches a known lower bound (bounds.py). SolveJob runs a whole
+# optimizer call in a background thread for the Streamlit apps to poll;
+# SolveResult is the tuple the store optimizers hand back, with extra keys.
+
+_NUMBER = r"(-?\d+(?:\.\d*)?(?:e[+-]?\d+)?)"
+_CBC_PROGRESS = (
+    # Cbc0010I After 100 nodes, 51 on tree, 39.86 best solution, best possible 39.4 (8.49 seconds)
+    (re.compile(rf"After (\d+) nodes, \d+ on tree, {_NUMBER} best solution, best possible {_NUMBER}"),
+     ("nodes", "incumbent", "bound")),
+    # Cbc0004I Integer solution of 39.84 found after 20200 iterations and 149 nodes (9.84 seconds)
+    (re.compile(rf"Integer solution of {_NUMBER} found .*?after \d+ iterations and (\d+) nodes"),
+     ("incumbent", "nodes")),
+    # Cbc0001I Search completed - best objective 39.4, took 47975 iterations and 376 nodes (15.87 seconds)
+    (re.compile(rf"Search completed - best objective {_NUMBER}, took \d+ iterations and (\d+) nodes"),
+     ("optimum", "nodes")),
+    # Cbc0005I Partial search - best objective 50.04 (best possible 39.4), took 5166 iterations and 22 nodes (4.89 seconds)
+    (re.compile(rf"Partial search - best objective {_NUMBER} \(best possible {_NUMBER}\), took \d+ iterations and (\d+) nodes"),
+     ("incumbent", "bound", "nodes")),
+    # Continuous objective value is 39.4 - 0.52 seconds
+    (re.compile(rf"Continuous objective value is {_NUMBER}"), ("bound",)),
+)
+# CBC prints 1e+50 for "no solution yet"
+_NO_VALUE = 1e49
+
+
+def reached(objective, bound, tolerance=1e-6):
+    """True once an objective is within tolerance of a lower bound (so it is optimal)."""
+    return objective is not None and bound is not None and objective <= bound + tolerance * max(1.0, abs(bound))
+
+
+def gap_stopped(status, objective, gap, bound):
+    """
+    True if a solver given a relative `gap` says "Optimal" for an objective
+    short of the lower bound: it may have stopped at the gap, not the optimum.
+    """
+    return status == "Optimal" and bool(gap) and not reached(objective, bound)
+
+
+def progress_event(incumbent, bound, nodes, elapsed):
+    """Progress event with the relative gap |incumbent - bound| / |incumbent|."""
+    gap = None
+    if incumbent is not None and bound is not None:
+        gap = abs(incumbent - bound) / max(abs(incumbent), 1e-9)
+    return {"incumbent": incumbent, "bound": bound, "gap": gap, "nodes": int(nodes), "elapsed": elapsed}
+
+
+def with_lower_bound(on_progress, lower_bound):
+    """Wrap on_progress so every event's bound is at least `lower_bound`."""
+    if on_progress is None or lower_bound is None:
+        return on_progress
+
+    def report(event):
+        bound = lower_bound if event["bound"] is None else max(event["bound"], lower_bound)
+        on_progress(progress_event(event["incumbent"], bound, event["nodes"], event["elapsed"]))
+
+    return report
+
+
+def cbc_progress(line, state):
+    """Update `state` from one CBC log line; returns True if it carried progress."""
+    for pattern, fields in _CBC_PROGRESS:
+        match = pattern.search(line)
+        if match:
+            break
+    else:
+        return False
+    values = dict(zip(fields, map(float, match.groups())))
+    if "optimum" in values:
+        values["incumbent"] = values["bound"] = values.pop("optimum")
+    if values.get("incumbent", 0) >= _NO_VALUE:
+        del values["incumbent"]
+    state.update(values)
+    return True
+
+
+def _lines(fd):
+    buffer = b""
+    while True:
+        try:
+            chunk = os.read(fd, 4096)
+        except OSError:  # pseudo-terminal closed
+            chunk = b""
+        if not chunk:
+            break
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode(errors="replace").rstrip("\r")
+    if buffer:
+        yield buffer.decode(errors="replace").rstrip("\r")
+
+
+def _watch(process, stop):
+    while process.poll() is None:
+        if stop.wait(0.2):
+            process.send_signal(signal.SIGINT if os.name == "posix" else signal.SIGTERM)
+            return
+
+
+def run_cbc(args, msg=False, on_progress=None, stop=None, target=None):
+    """Run the CBC binary with `args`, streaming progress events and honouring `stop` / `target`."""
+    if on_progress is None and stop is None and target is None:
+        out = None if msg else subprocess.DEVNULL
+        subprocess.run(args, stdout=out, stderr=out, stdin=subprocess.DEVNULL, check=True)
+        return
+
+    start = time.time()
+    if pty is not None:
+        fd, terminal = pty.openpty()
+        process = subprocess.Popen(args, stdout=terminal, stderr=terminal, stdin=subprocess.DEVNULL)
+        os.close(terminal)
+    else:
+        process = subprocess.Popen(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   stdin=subprocess.DEVNULL)
+        fd = process.stdout.fileno()
+    if stop is not None:
+        threading.Thread(target=_watch, args=(process, stop), daemon=True).start()
+
+    state = {"nodes": 0}
+    interrupted = False
+    try:
+        for line in _lines(fd):
+            if msg:
+                print(line, file=sys.stdout)
+            if not cbc_progress(line, state):
+                continue
+            if on_progress is not None:
+                on_progress(progress_event(state.get("incumbent"), state.get("bound"), state["nodes"],
+                                           time.time() - start))
+            if not interrupted and reached(state.get("incumbent"), target):
+                # The incumbent meets the lower bound: it is optimal
+                process.send_signal(signal.SIGINT if os.name == "posix" else signal.SIGTERM)
+                interrupted = True
+    finally:
+        if pty is not None:
+            os.close(fd)
+        process.wait()
+    if process.returncode != 0 and not interrupted and not (stop is not None and stop.is_set()):
+        raise subprocess.CalledProcessError(process.returncode, args)
+
+
+class SolveJob:
+    """
+    Run solve(*args, on_progress=..., stop=..., **kwargs) in a background
+    thread, keeping the progress events for a UI to poll.
+    """
+
+    def __init__(self, solve, *args, **kwargs):
+        self.events = []
+        self.result = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(solve, args, kwargs), daemon=True)
+        self._thread.start()
+
+    def _run(self, solve, args, kwargs):
+        try:
+            self.result = solve(*args, on_progress=self.events.append, stop=self._stop, **kwargs)
+        except Exception as e:
+            self.error = e
+
+    def stop(self):
+        """Stop the search; the job finishes with the best roster found so far."""
+        self._stop.set()
+
+    def stopping(self):
+        return self._stop.is_set()
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def latest(self):
+        return self.events[-1] if self.events else None
+
+
+class SolveResult(tuple):
+    """
+    (status, objective, schedule, metrics), as solve_schedule has always
+    returned it, that also carries what the solve found on the way (e.g.
+    "winner", "bounds", "candidates", "diagnostics", "gap_stopped"): result["bounds"] or
+    result.get("winner") read it as from the Alcazar result dict.
+    """
+
+    def __new__(cls, status, objective, schedule, metrics, **info):
+        result = super().__new__(cls, (status, objective, schedule, metrics))
+        result.info = dict(info, status=status, objective=objective)
+        return result
+
+    def __getnewargs_ex__(self):
+        return tuple(self), {k: v for k, v in self.info.items() if k not in ("status", "objective")}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.info[key]
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        return self.info.get(key, default)
@@ -0,0 +1,317 @@
+import math
+import os
+import tempfile
+import threading
+
+import pulp
+
+from progress import run_cbc
+from shift_model import build_shift_model, extract_schedule, shifts_covering, slot_metrics
+from warm_start import warm_start
+
+# Persistent weekly model. The rows only depend on the days, slots, shift set
+# and store rules, so one model is built per signature and then updated in
+# place between solves: demand and the deviation cap are right-hand sides,
+# hours are the right-hand sides of the worker's hours rows, weekend-only is a
+# bound on b, and a worker leaving just has its b fixed to 0 (as do shifts
+# outside the candidate lists of reduction.py, see restrict_shifts). A new worker gets
+# their own rows appended and their b terms added to the coverage rows. In the
+# flow formulation the start / end arcs take b's place. A removed worker's
+# columns stay in the model (they come back if the worker does); once more
+# than MAX_REMOVED_WORKERS of them pile up, checkout_model builds afresh.
+# The optimizers keep one model per signature between Solve clicks
+# (checkout_model / checkin_model) and start CBC from the previous solution.
+
+MAX_CACHED = 4
+MAX_REMOVED_WORKERS = 8
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+class ScheduleModel:
+    """Weekly shift model that can be re-solved after in-place updates."""
+
+    def __init__(
+        self, name, W, D, T, S, MinHw, MaxHw, Demand,
+        Max_Deviation=2.5,
+        rest_pairs=(),
+        closing_slot=None,
+        max_closings=2,
+        weekend_only=(),
+        weekend_days=(5, 6, 7),
+        require_min_staff=True,
+        formulation="lean",
+    ):
+        self.name = name
+        self.D = list(D); self.T = list(T); self.S = list(S)
+        self.formulation = formulation
+        self.structure = dict(
+            rest_pairs=rest_pairs,
+            closing_slot=closing_slot,
+            max_closings=max_closings,
+            weekend_days=weekend_days,
+        )
+        self.require_min_staff = require_min_staff
+        self.cover = shifts_covering(self.S, self.T)
+        # Weekend-only is kept out of the rows so it can change with the hours
+        self.model, self.v = build_shift_model(name, W, D, T, S, MinHw, MaxHw, Demand,
+                                               Max_Deviation=Max_Deviation,
+                                               require_min_staff=require_min_staff,
+                                               formulation=formulation,
+                                               **self.structure)
+        self.workers = list(W)
+        self.active = set(W)
+        self.weekend_only = set()
+        self.MinHw = dict(MinHw); self.MaxHw = dict(MaxHw)
+        self.Demand = {d: list(Demand[d]) for d in self.D}
+        self.Max_Deviation = Max_Deviation
+        self.schedule = []
+        for w in weekend_only:
+            self.set_weekend_only(w, True)
+
+    # Right-hand sides
+
+    def set_demand(self, Demand):
+        """New demand per (day, slot); Demand[d] is a list aligned with T."""
+        for d in self.D:
+            for idx, t in enumerate(self.T):
+                self.v["balance"][d][t].changeRHS(Demand[d][idx])
+        self.Demand = {d: list(Demand[d]) for d in self.D}
+
+    def set_max_deviation(self, Max_Deviation):
+        for d in self.D:
+            for t in self.T:
+                self.v["cap"][d][t].changeRHS(Max_Deviation)
+        self.Max_Deviation = Max_Deviation
+
+    def set_hours(self, w, min_h, max_h):
+        """Weekly hours bounds of an active worker."""
+        if self.formulation != "compact":
+            low, high = math.ceil(min_h - 1e-9), math.floor(max_h + 1e-9)
+        else:
+            low, high = min_h, max_h
+        self.v["min_hours"][w].changeRHS(low)
+        self.v["max_hours"][w].changeRHS(high)
+        self.MinHw[w], self.MaxHw[w] = min_h, max_h
+
+    def _shift_vars(self, w, d):
+        """Variables that put w on a shift on day d: b, or the start / end arcs of the flow model."""
+        if "b" in self.v:
+            return list(self.v["b"][w][d].values())
+        return list(self.v["start"][w][d].values()) + list(self.v["end"][w][d].values())
+
+    def set_weekend_only(self, w, weekend_only):
+        """Restrict an active worker to the weekend days (or lift it)."""
+        days = self.structure["weekend_days"]
+        for d in self.D:
+            up = 0 if weekend_only and d not in days else 1
+            for var in self._shift_vars(w, d):
+                var.upBound = up
+        if weekend_only:
+            self.weekend_only.add(w)
+        else:
+            self.weekend_only.discard(w)
+
+    def restrict_shifts(self, candidates):
+        """
+        Fix b to 0 outside candidates {(w, d): [shifts]} for the active workers
+        (until the next sync). The flow model fixes the start / end arcs no
+        candidate uses, so it keeps any shift of S made of a kept start and end.
+        """
+        for w in self.active:
+            for d in self.D:
+                allowed = set(candidates[(w, d)])
+                if "b" not in self.v:
+                    for key, side in (("start", 0), ("end", 1)):
+                        used = {se[side] for se in allowed}
+                        for slot, var in self.v[key][w][d].items():
+                            if slot not in used:
+                                var.upBound = 0
+                    continue
+                for se in self.S:
+                    if se not in allowed:
+                        self.v["b"][w][d][se].upBound = 0
+
+    # Staff
+
+    def remove_worker(self, w):
+        """Take a worker out of the roster; their rows stay, with every shift fixed to 0."""
+        if w not in self.active:
+            return
+        for d in self.D:
+            for var in self._shift_vars(w, d):
+                var.upBound = 0
+                var.setInitialValue(0)
+            if isinstance(self.v["y"][w][d], pulp.LpVariable):
+                self.v["y"][w][d].setInitialValue(0)
+            for var in self.v["x"][w][d].values():
+                if isinstance(var, pulp.LpVariable):
+                    var.setInitialValue(0)
+        for d in self.v["z"][w]:
+            self.v["z"][w][d].setInitialValue(int(d == 1))
+        for i, var in self.v.get("p", {}).get(w, {}).items():
+            var.setInitialValue(int(not self.v["patterns"][i]))
+        self.v["min_hours"][w].changeRHS(0)
+        self.active.discard(w)
+        self.weekend_only.discard(w)
+
+    def add_worker(self, w, min_h, max_h, weekend_only=False):
+        """Bring a worker (back) into the roster with the given hours."""
+        if w not in self.v["min_hours"]:
+            self._append_worker(w, min_h, max_h)
+        self.active.add(w)
+        self.set_hours(w, min_h, max_h)
+        self.set_weekend_only(w, weekend_only)
+
+    def _append_worker(self, w, min_h, max_h):
+        # The worker's own rows come from a one-worker model; its coverage rows
+        # (with zero demand) are dropped and its b terms go into ours instead
+        sub, sv = build_shift_model(self.name, [w], self.D, self.T, self.S, {w: min_h}, {w: max_h},
+                                    {d: [0] * len(self.T) for d in self.D},
+                                    require_min_staff=False,
+                                    formulation=self.formulation,
+                                    **self.structure)
+        coverage = {id(sv[key][d][t]) for key in ("balance", "cap") for d in self.D for t in self.T}
+        for row in sub.constraints.values():
+            if id(row) not in coverage:
+                self.model += row
+        for d in self.D:
+            for t in self.T:
+                if self.formulation in ("compact", "flow"):
+                    staffed = sv["x"][w][d][t]
+                else:
+                    staffed = pulp.lpSum(sv["b"][w][d][se] for se in self.cover[t])
+                self.v["balance"][d][t].addInPlace(staffed)
+                if self.require_min_staff:
+                    self.v["min_staff"][d][t].addInPlace(staffed)
+        for key in ("x", "y", "z", "p", "b", "start", "end", "min_hours", "max_hours"):
+            if key in sv:
+                self.v[key][w] = sv[key][w]
+        self.workers.append(w)
+
+    def sync(self, W, MinHw, MaxHw, Demand, Max_Deviation=2.5, weekend_only=()):
+        """Bring staff, hours, demand and cap in line with a new instance."""
+        for w in list(self.active):
+            if w not in W:
+                self.remove_worker(w)
+        for w in W:
+            self.add_worker(w, MinHw[w], MaxHw[w], weekend_only=w in weekend_only)
+        self.workers = list(W) + [w for w in self.workers if w not in W]
+        self.set_demand(Demand)
+        self.set_max_deviation(Max_Deviation)
+
+    # Solve
+
+    def rules(self):
+        return dict(Max_Deviation=self.Max_Deviation,
+                    weekend_only=sorted(self.weekend_only, key=self.workers.index),
+                    require_min_staff=self.require_min_staff,
+                    **self.structure)
+
+    def solve(self, time_limit=None, msg=False, initial_schedule=None, gap=None, on_progress=None, stop=None,
+              target=None):
+        """
+        Solve with CBC, started from `initial_schedule` or else the previous
+        solution (repaired to the current data). gap, on_progress, stop and
+        target as in progress.py.
+        Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+        """
+        W = [w for w in self.workers if w in self.active]
+        start = self.schedule if initial_schedule is None else initial_schedule
+        start = [row for row in start if row[0] in self.active]
+        try:
+            warm = bool(start) and warm_start(self.v, start, W, self.D, self.T, self.S,
+                                              self.MinHw, self.MaxHw, self.Demand, **self.rules())
+        except ValueError:
+            # The start uses a shift restrict_shifts fixed to 0: solve cold,
+            # without the part of the start already set
+            for var in self.model.variables():
+                var.varValue = None
+            warm = False
+        _solve_cbc(self.model, time_limit, msg, warm, gap, on_progress, stop, target)
+        status = pulp.LpStatus[self.model.status]
+        objective = pulp.value(self.model.objective)
+        if objective is None or status == "Infeasible":
+            # CBC leaves the values of its last iterate on an infeasible model
+            return status, None, [], {}
+        schedule = extract_schedule(self.v, W, self.D, self.T, self.S)
+        self.schedule = schedule
+        return status, objective, schedule, slot_metrics(self.v, schedule, self.D, self.T, self.Demand)
+
+
+def _solve_cbc(model, time_limit, msg, warm, gap, on_progress, stop, target):
+    # PuLP's CBC call (MPS, MIP start, solution file), run through progress.py
+    # so the log can be streamed and the search stopped
+    cmd = pulp.PULP_CBC_CMD()
+    with tempfile.TemporaryDirectory() as tmp:
+        mps, mst, sol = (os.path.join(tmp, f"shifts.{ext}") for ext in ("mps", "mst", "sol"))
+        variables, variable_names, row_names, _ = model.writeMPS(mps, rename=1)
+        args = [cmd.path, mps]
+        if warm:
+            cmd.writesol(mst, model, variables, variable_names, row_names)
+            args += ["-mips", mst]
+        if time_limit is not None:
+            args += ["-sec", str(int(time_limit)), "-timeMode", "elapsed"]
+        if gap is not None:
+            args += ["-ratioGap", str(gap)]
+        args += ["-solve", "-printingOptions", "all", "-solution", sol]
+        run_cbc(args, msg=msg, on_progress=on_progress, stop=stop, target=target)
+        if not os.path.exists(sol):
+            raise pulp.PulpSolverError("Pulp: Error while executing " + cmd.path)
+        status, values, _, _, _, sol_status = cmd.readsol_MPS(sol, model, variables, variable_names, row_names)
+    model.assignVarsVals(values)
+    model.assignStatus(status, sol_status)
+
+
+def model_key(name, D, T, S, formulation="lean", rest_pairs=(), closing_slot=None, max_closings=2,
+              weekend_days=(5, 6, 7), require_min_staff=True):
+    """Cache key: everything that shapes the rows (staff, hours, demand and cap are updated in place)."""
+    return (name, tuple(D), tuple(T), tuple(S), formulation, tuple(map(tuple, rest_pairs)), closing_slot,
+            max_closings, tuple(weekend_days), require_min_staff)
+
+
+def checkout_model(
+    name, W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    formulation="lean",
+):
+    """
+    The cached model for this signature synced to the instance, or a new one.
+    The model is taken out of the cache until checkin_model, so concurrent
+    sessions never share it.
+    """
+    structure = dict(rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings,
+                     weekend_days=weekend_days, require_min_staff=require_min_staff)
+    key = model_key(name, D, T, S, formulation=formulation, **structure)
+    with _cache_lock:
+        sm = _cache.pop(key, None)
+    if sm is not None and sum(1 for w in sm.workers if w not in W) > MAX_REMOVED_WORKERS:
+        # Too many dead columns: rebuild, keeping the last roster as the start
+        previous = sm.schedule
+        sm = ScheduleModel(name, W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+                           weekend_only=weekend_only, formulation=formulation, **structure)
+        sm.schedule = previous
+        return sm
+    if sm is None:
+        return ScheduleModel(name, W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+                             weekend_only=weekend_only, formulation=formulation, **structure)
+    sm.sync(W, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation, weekend_only=weekend_only)
+    return sm
+
+
+def checkin_model(sm):
+    """Put a model back in the cache for the next solve."""
+    key = model_key(sm.name, sm.D, sm.T, sm.S, formulation=sm.formulation,
+                    require_min_staff=sm.require_min_staff, **sm.structure)
+    with _cache_lock:
+        _cache.pop(key, None)
+        _cache[key] = sm
+        while len(_cache) > MAX_CACHED:
+            _cache.pop(next(iter(_cache)))
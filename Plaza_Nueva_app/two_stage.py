@@ -0,0 +1,208 @@
+import math
+import time
+
+import pulp
+
+from backends import solve_matrix_model
+from matrix_model import build_matrix_model
+from progress import reached
+from screening import TOLERANCE, working_days
+from shift_model import rest_cliques, shifts_covering
+from warm_start import schedule_patterns
+
+# Two-stage engine. Stage 1 decides how many workers take each shift (s, e)
+# on each day: an integer program with no worker index, holding the coverage,
+# deviation cap and min-staff rows plus aggregate rows every roster meets
+# (staff per day, total hours, working days and closings, 12h-rest cliques).
+# It is a relaxation of the full model, so its optimum is a lower bound.
+# Stage 2 hands shifts to named workers: the lean matrix model with b columns
+# only for the (day, shift) pairs stage 1 has chosen so far (reduction.py's
+# candidate lists), solved until it meets the stage 1 bound. A roster that
+# meets it is optimal. If stage 2 ends below its round time limit without
+# meeting it, no roster has those counts: a no-good cut removes them from
+# stage 1, whose next solution brings its shifts into stage 2. Counts are not
+# a flow problem on their own: the weekly hours, rest days and closing cap tie
+# each worker's days together, which is why stage 2 is a MIP and not a
+# transportation problem. After max_rounds (or when a round times out) the
+# full model finishes, seeded with the best roster and stopped at the bound.
+
+
+def _count_model(W, D, T, S, MinHw, MaxHw, Demand, allowed, rules):
+    """Stage 1: shift counts n[d][s] with the per-slot rows and aggregate worker rows."""
+    cover = shifts_covering(S, T)
+    lengths = {se: se[1] - se[0] + 1 for se in S}
+    available = {d: sum(1 for w in W if d in allowed[w]) for d in D}
+    days = {w: working_days(D, allowed[w]) for w in W}
+    low = {w: math.ceil(MinHw[w] - TOLERANCE) for w in W}
+    high = {w: math.floor(MaxHw[w] + TOLERANCE) for w in W}
+
+    model = pulp.LpProblem("Shift_Counts", pulp.LpMinimize)
+    n = {d: {se: pulp.LpVariable(f"n_{d}_{se[0]}_{se[1]}", lowBound=0, upBound=available[d], cat="Integer")
+             for se in S} for d in D}
+    under = pulp.LpVariable.dicts("under", (D, T), lowBound=0)
+    over = pulp.LpVariable.dicts("over", (D, T), lowBound=0)
+    model += pulp.lpSum(under[d][t] + over[d][t] for d in D for t in T)
+
+    for d in D:
+        model += pulp.lpSum(n[d].values()) <= available[d]
+        for idx, t in enumerate(T):
+            staffed = pulp.lpSum(n[d][se] for se in cover[t])
+            model += staffed + under[d][t] - over[d][t] == Demand[d][idx]
+            model += under[d][t] + over[d][t] <= rules["Max_Deviation"]
+            if rules["require_min_staff"]:
+                model += staffed >= 1
+
+    # Aggregates of the worker rows
+    hours = pulp.lpSum(lengths[se] * n[d][se] for d in D for se in S)
+    model += hours >= sum(low.values())
+    model += hours <= sum(high.values())
+    shifts = pulp.lpSum(n[d][se] for d in D for se in S)
+    model += shifts <= sum(days.values())
+    model += shifts >= sum(math.ceil(low[w] / max(lengths.values())) for w in W)
+    closing_slot = rules["closing_slot"]
+    if closing_slot in T:
+        model += pulp.lpSum(n[d][se] for d in D for se in cover[closing_slot]) <= \
+            sum(min(rules["max_closings"], days[w]) for w in W)
+    # A worker is in at most one shift of a 12h-rest clique
+    for late, early in rest_cliques(S, rules["rest_pairs"]):
+        for d in range(1, 7):
+            both = sum(1 for w in W if d in allowed[w] or d + 1 in allowed[w])
+            model += pulp.lpSum(n[d][se] for se in late) + pulp.lpSum(n[d + 1][se] for se in early) <= both
+    return model, n
+
+
+def _no_good(model, n, counts, cut):
+    """Cut off one count vector: some n[d][s] must differ from counts[(d, s)]."""
+    changed = []
+    for (d, se), k in counts.items():
+        var = n[d][se]
+        if k == 0:
+            changed.append(var)
+            continue
+        up = pulp.LpVariable(f"up_{cut}_{d}_{se[0]}_{se[1]}", cat="Binary")
+        down = pulp.LpVariable(f"down_{cut}_{d}_{se[0]}_{se[1]}", cat="Binary")
+        model += var >= (k + 1) * up
+        model += var <= k - 1 + (var.upBound - k + 1) * (1 - down)
+        changed += [up, down]
+    model += pulp.lpSum(changed) >= 1
+
+
+def _chosen_shifts(schedule, W, D, S):
+    """(day, shift) pairs worked in a (w, d, t) schedule."""
+    patterns = schedule_patterns(schedule, W, D)
+    return {(d, se) for pattern in patterns.values() for d, se in zip(D, pattern) if se in S}
+
+
+def solve_two_stage(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    max_rounds=3,
+    round_time_limit=10,
+    backend="auto",
+    candidates=None,
+    initial_schedule=None,
+    on_iteration=None,
+):
+    """
+    Shift counts (stage 1), then the lean model on the shifts they use
+    (stage 2), with no-good cuts until a roster meets the counts' bound, then
+    the full model (b columns for `candidates`, every shift if None).
+    initial_schedule's shifts join stage 2 so it stays a valid MIP start.
+    "Optimal" once a roster meets the stage 1 bound or the full model is
+    solved; "Feasible" with the best roster when time_limit ends it first.
+    on_iteration(record) gets {"round", "lower_bound", "objective", "shifts", "elapsed"}.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict, lower_bound
+    """
+    W = list(W); D = list(D); T = list(T)
+    rest_pairs = [(late, early) for late, early in rest_pairs if late in T and early in T]
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=rest_pairs,
+        closing_slot=closing_slot,
+        max_closings=max_closings,
+        weekend_only=weekend_only,
+        weekend_days=weekend_days,
+        require_min_staff=require_min_staff,
+    )
+    allowed = {w: [d for d in D if w not in weekend_only or d in weekend_days] for w in W}
+    if candidates is None:
+        candidates = {(w, d): list(S) if d in allowed[w] else [] for w in W for d in D}
+    start = time.time()
+
+    def remaining():
+        return None if time_limit is None else time_limit - (time.time() - start)
+
+    model, n = _count_model(W, D, T, S, MinHw, MaxHw, Demand, allowed, rules)
+    chosen = _chosen_shifts(initial_schedule, W, D, S) if initial_schedule else set()
+    best = None  # (status, objective, schedule, metrics)
+    bound = None
+    for round_ in range(max_rounds):
+        left = remaining()
+        if left is not None and left <= 0:
+            break
+        model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=None if left is None else max(1, int(left))))
+        if model.status == pulp.LpStatusInfeasible:
+            if best is None:
+                return "Infeasible", None, [], {}, None
+            # Every other count vector is cut off: the best roster is optimal
+            bound = best[1]
+            break
+        if model.sol_status != pulp.LpSolutionOptimal:
+            break
+        bound = pulp.value(model.objective)
+        if best is not None and reached(best[1], bound):
+            break
+
+        # Stage 2 on every (day, shift) chosen so far
+        counts = {(d, se): round(n[d][se].value()) for d in D for se in S}
+        chosen |= {key for key, k in counts.items() if k > 0}
+        restricted = {(w, d): [se for se in shifts if (d, se) in chosen] for (w, d), shifts in candidates.items()}
+        mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=restricted, **rules)
+        limit = round_time_limit if remaining() is None else min(round_time_limit, remaining())
+        began = time.time()
+        result = solve_matrix_model(mm, backend=backend, time_limit=limit,
+                                    initial_schedule=best[2] if best is not None else initial_schedule,
+                                    target=bound)
+        timed_out = time.time() - began >= limit - 1
+        if result[1] is not None and (best is None or result[1] < best[1]):
+            best = result
+        if on_iteration is not None:
+            on_iteration({"round": round_ + 1, "lower_bound": bound, "objective": result[1],
+                          "shifts": len(chosen), "elapsed": time.time() - start})
+        if timed_out or (best is not None and reached(best[1], bound)):
+            break
+        # Stage 2 finished above the counts' deviation: no roster has them
+        _no_good(model, n, counts, round_)
+
+    if best is not None and reached(best[1], bound):
+        return ("Optimal",) + tuple(best[1:]) + (bound,)
+
+    # Full model, stopped once it meets the bound. It starts from
+    # initial_schedule when there is one: as in the optimizers, CBC closes
+    # the gap faster from the greedy roster than from a near-optimal one.
+    left = remaining()
+    if left is not None and left <= 0:
+        if best is None:
+            return "Not Solved", None, [], {}, bound
+        return ("Feasible",) + tuple(best[1:]) + (bound,)
+    mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=candidates, **rules)
+    began = time.time()
+    status, objective, schedule, metrics = solve_matrix_model(
+        mm, backend=backend, time_limit=left, initial_schedule=initial_schedule or (best[2] if best else None),
+        target=bound)
+    if objective is None or (best is not None and best[1] < objective):
+        if best is None:
+            return status, None, [], {}, bound
+        return ("Feasible",) + tuple(best[1:]) + (bound,)
+    # A solve stopped by the time limit may still be short of the optimum
+    if status == "Optimal" and left is not None and time.time() - began >= left - 1 \
+            and not reached(objective, bound):
+        status = "Feasible"
+    return status, objective, schedule, metrics, bound
@@ -0,0 +1,270 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bounds import slot_distances
+from greedy import coverage_ok, greedy_schedule
+from patterns import pattern_schedule, pattern_violations, shift_hours
+from progress import reached
+from roster import shift_mask
+from shift_model import schedule_metrics
+from warm_start import VIOLATION_WEIGHT, coverage_violation, repair_schedule, schedule_patterns
+
+# Local-search engine (no MIP solver): simulated annealing with a short tabu
+# list over the weekly roster. Each worker-day is a bitmask of its slots (bit i
+# is slot T[i], 0 on a day off) and the staffing of every (day, slot) is
+# cached, so a move is scored from the bits that change (old ^ new) alone, in
+# O(|T|) per day it touches. Moves:
+# - start/end: one shift starts or ends a slot earlier or later
+# - day off: one worker's shift moves to one of their days off
+# - swap workers: two workers exchange their shifts (or day off) on one day
+# - rest pair: one worker's shifts on two consecutive days move onto their
+#   consecutive days off
+# Every move keeps each week legal (pattern_violations: hours, two
+# consecutive days off, 12h rest, closings, weekend-only days); the cap /
+# min-staff rows are VIOLATION_WEIGHT penalties, as in the greedy engine.
+# A move is accepted if it is not worse, or with probability exp(-delta / temp)
+# as the temperature cools from temp_start to temp_end; the (worker, day)
+# cells it changed are tabu for `tenure` moves unless a move beats the best.
+# After `patience` moves without a new best the chain goes back to the best.
+
+MOVES = ("start/end", "day off", "swap workers", "rest pair")
+
+
+def _chain(args, report=None, stop=None):
+    """
+    One annealing chain from {w: pattern}; report(record) gets every new best
+    and stop (threading.Event) ends the chain.
+    Returns (best penalised objective, best patterns, improvement records).
+    """
+    (patterns, W, D, T, S, MinHw, MaxHw, Demand, rules, time_limit, iterations,
+     temp_start, temp_end, tenure, patience, target, seed, chain) = args
+    rng = random.Random(seed)
+    start = time.time()
+    first = T[0]
+    nD = len(D)
+    shifts = set(S)
+    allowed = {w: (list(rules["weekend_days"]) if w in rules["weekend_only"] else None) for w in W}
+    week_rules = dict(rest_pairs=rules["rest_pairs"], closing_slot=rules["closing_slot"],
+                      max_closings=rules["max_closings"])
+    cover = dict(Max_Deviation=rules["Max_Deviation"], require_min_staff=rules["require_min_staff"])
+
+    # cost[i][idx][n]: penalised deviation of n staff in (D[i], T[idx])
+    cost = [[[abs(n - Demand[d][idx]) + VIOLATION_WEIGHT * coverage_violation(n, Demand[d][idx], **cover)
+              for n in range(len(W) + 2)] for idx in range(len(T))] for d in D]
+    patterns = {w: list(patterns[w]) for w in W}
+    staffed = [[0] * len(T) for _ in D]
+    for w in W:
+        for i, se in enumerate(patterns[w]):
+            mask = shift_mask(se, first)
+            while mask:
+                low = mask & -mask
+                staffed[i][low.bit_length() - 1] += 1
+                mask ^= low
+    current = sum(cost[i][idx][staffed[i][idx]] for i in range(nD) for idx in range(len(T)))
+
+    def move_day(i, old, new):
+        """Apply one worker-day change to the counts; returns the cost delta."""
+        new_mask = shift_mask(new, first)
+        changed = shift_mask(old, first) ^ new_mask
+        delta = 0.0
+        while changed:
+            low = changed & -changed
+            idx = low.bit_length() - 1
+            n = staffed[i][idx]
+            m = n + 1 if new_mask & low else n - 1
+            delta += cost[i][idx][m] - cost[i][idx][n]
+            staffed[i][idx] = m
+            changed ^= low
+        return delta
+
+    def legal(w, pattern):
+        return not pattern_violations(pattern, D, MinHw[w], MaxHw[w], allowed_days=allowed[w], **week_rules)
+
+    def propose():
+        """[(w, i, new shift)] for a random legal move, or None."""
+        kind = rng.choice(MOVES)
+        w = rng.choice(W)
+        pattern = patterns[w]
+        on = [i for i in range(nD) if pattern[i] is not None]
+        off = [i for i in range(nD) if pattern[i] is None
+               and (allowed[w] is None or D[i] in allowed[w])]
+        if kind == "start/end":
+            if not on:
+                return kind, None
+            i = rng.choice(on)
+            s, e = pattern[i]
+            new = rng.choice(((s - 1, e), (s + 1, e), (s, e - 1), (s, e + 1), (s - 1, e - 1), (s + 1, e + 1)))
+            if new not in shifts:
+                return kind, None
+            changes = [(w, i, new)]
+            if shift_hours(new) != shift_hours((s, e)) and len(on) > 1 and rng.random() < 0.5:
+                # Same weekly hours: another day gives the slot back
+                j = rng.choice([j for j in on if j != i])
+                s, e = pattern[j]
+                grow = shift_hours(new) < shift_hours((s, e))
+                other = rng.choice(((s - 1, e), (s, e + 1)) if grow else ((s + 1, e), (s, e - 1)))
+                if other not in shifts:
+                    return kind, None
+                changes.append((w, j, other))
+        elif kind == "day off":
+            if not on or not off:
+                return kind, None
+            i, j = rng.choice(on), rng.choice(off)
+            changes = [(w, i, None), (w, j, pattern[i])]
+        elif kind == "swap workers":
+            v = rng.choice(W)
+            i = rng.randrange(nD)
+            if v == w or patterns[v][i] == pattern[i]:
+                return kind, None
+            changes = [(w, i, patterns[v][i]), (v, i, pattern[i])]
+        else:
+            pairs = [i for i in range(nD - 1) if pattern[i] is None and pattern[i + 1] is None]
+            worked = [j for j in range(nD - 1) if pattern[j] is not None or pattern[j + 1] is not None]
+            if not pairs or not worked:
+                return kind, None
+            i, j = rng.choice(pairs), rng.choice(worked)
+            if abs(i - j) < 2:
+                return kind, None
+            changes = [(w, i, pattern[j]), (w, i + 1, pattern[j + 1]), (w, j, None), (w, j + 1, None)]
+        # Every week the move touches must stay legal
+        weeks = {}
+        for v, i, new in changes:
+            weeks.setdefault(v, list(patterns[v]))[i] = new
+        if not all(legal(v, tuple(week)) for v, week in weeks.items()):
+            return kind, None
+        return kind, changes
+
+    best, best_patterns = current, {w: tuple(p) for w, p in patterns.items()}
+    history = []
+    tabu = {}
+    since_best = 0
+    for iteration in range(1, iterations + 1 if iterations else 1 << 62):
+        elapsed = time.time() - start
+        if time_limit is not None and elapsed >= time_limit:
+            break
+        if target is not None and reached(best, target):
+            break
+        if stop is not None and stop.is_set():
+            break
+        progress = max(elapsed / time_limit if time_limit else 0.0, iteration / iterations if iterations else 0.0)
+        temp = temp_start * (temp_end / temp_start) ** min(1.0, progress)
+        kind, changes = propose()
+        if changes is None:
+            continue
+        olds = [(v, i, patterns[v][i]) for v, i, _ in changes]
+        delta = 0.0
+        for v, i, new in changes:
+            delta += move_day(i, patterns[v][i], new)
+            patterns[v][i] = new
+        aspiration = current + delta < best - 1e-9
+        is_tabu = any(tabu.get((v, i), 0) > iteration for v, i, _ in changes)
+        if (is_tabu and not aspiration) or (delta > 1e-9 and rng.random() >= math.exp(-delta / temp)):
+            for v, i, old in reversed(olds):
+                move_day(i, patterns[v][i], old)
+                patterns[v][i] = old
+            continue
+        current += delta
+        for v, i, _ in changes:
+            tabu[(v, i)] = iteration + tenure
+        since_best += 1
+        if aspiration:
+            best, best_patterns, since_best = current, {w: tuple(p) for w, p in patterns.items()}, 0
+            history.append({"chain": chain, "iteration": iteration, "move": kind, "objective": best,
+                            "temperature": temp, "elapsed": time.time() - start})
+            if report is not None:
+                report(history[-1])
+        elif since_best >= patience:
+            # Back to the best roster
+            for w in W:
+                for i in range(nD):
+                    if patterns[w][i] != best_patterns[w][i]:
+                        move_day(i, patterns[w][i], best_patterns[w][i])
+                        patterns[w][i] = best_patterns[w][i]
+            current, since_best = best, 0
+    return best, best_patterns, history
+
+
+def solve_local_search(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    iterations=None,
+    chains=1,
+    temp_start=2.0,
+    temp_end=0.05,
+    tenure=20,
+    patience=20000,
+    initial_schedule=None,
+    target=None,
+    seed=0,
+    on_iteration=None,
+    stop=None,
+):
+    """
+    Simulated annealing with a tabu list from `initial_schedule` (repaired)
+    or the greedy roster. Stops at time_limit (seconds), after `iterations`
+    moves per chain (None = no limit; one of the two must be set) or at the
+    lower bound: the analytic one, or `target` (e.g. the LP bound of
+    bounds.py) if that is higher. chains > 1 runs that many independent chains
+    (seeds seed, seed + 1, ...) in a process pool and keeps the best.
+    on_iteration(record) gets {"chain", "iteration", "move", "objective",
+    "temperature", "elapsed"} for every new best of a chain (as it is found
+    with one chain, after the pool ends with more); the objective carries
+    the cap / min-staff penalties. stop (threading.Event) ends the search
+    with the best roster so far (one chain only; the pool runs to its limit).
+    "Optimal" if the roster meets the bound, "Feasible" if it meets the
+    cap / min-staff rows, else "Not Solved".
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T); S = list(S)
+    if time_limit is None and iterations is None:
+        raise ValueError("solve_local_search needs a time_limit or an iterations count")
+    rest_pairs = [(late, early) for late, early in rest_pairs if late in T and early in T]
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=rest_pairs,
+        closing_slot=closing_slot if closing_slot in T else None,
+        max_closings=max_closings,
+        weekend_only=set(weekend_only),
+        weekend_days=weekend_days,
+        require_min_staff=require_min_staff,
+    )
+    if initial_schedule is not None:
+        schedule = repair_schedule(initial_schedule, W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    else:
+        schedule = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)[2]
+    if not schedule:
+        # Some worker has no legal week at all
+        return "Infeasible", None, [], {}
+    analytic = sum(slot_distances(W, D, T, Demand, require_min_staff=require_min_staff,
+                                  weekend_only=rules["weekend_only"], weekend_days=weekend_days).values())
+    target = analytic if target is None else max(analytic, target)
+
+    patterns = schedule_patterns(schedule, W, D)
+    tasks = [(patterns, W, D, T, S, MinHw, MaxHw, Demand, rules, time_limit, iterations,
+              temp_start, temp_end, tenure, patience, target, seed + k, k) for k in range(chains)]
+    if chains > 1:
+        with ProcessPoolExecutor(chains) as pool:
+            results = list(pool.map(_chain, tasks))
+        if on_iteration is not None:
+            for _, _, history in results:
+                for record in history:
+                    on_iteration(record)
+    else:
+        results = [_chain(tasks[0], report=on_iteration, stop=stop)]
+
+    # Lowest penalised objective: a chain under the cap beats one over it
+    _, found, _ = min(results, key=lambda result: result[0])
+    schedule = [row for w in W for row in pattern_schedule(w, found[w], D, T)]
+    objective, metrics = schedule_metrics(schedule, D, T, Demand)
+    if not coverage_ok(metrics, Max_Deviation, require_min_staff):
+        return "Not Solved", objective, schedule, metrics
+    return ("Optimal" if reached(objective, target) else "Feasible"), objective, schedule, metrics
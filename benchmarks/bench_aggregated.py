@@ -0,0 +1,72 @@
+"""
+Per-worker lean MIP vs the pattern engines (contract classes / per-worker
+columns), large-neighbourhood search and local search on scaled stores.
+
+Every staff member and every demand value is copied `k` times
+(Max_Deviation scales with k), so the optimum grows roughly linearly.
+
+    python benchmarks/bench_aggregated.py [store] [k ...]
+"""
+import sys
+import time
+
+import pulp
+
+from stores import STORES, load_optimizer, store_instance
+
+
+TIME_LIMIT = 120
+ENGINES = ("mip", "aggregated", "columns", "lns", "local_search")
+
+
+def scaled_instance(key, k):
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    Wk = [f"{w}_{i}" for i in range(k) for w in W]
+    MinHk = {f"{w}_{i}": MinHw[w] for i in range(k) for w in W}
+    MaxHk = {f"{w}_{i}": MaxHw[w] for i in range(k) for w in W}
+    Demandk = {d: [v * k for v in Demand[d]] for d in D}
+    return Wk, D, T, MinHk, MaxHk, Demandk
+
+
+def bench(key, k, engine):
+    opt = load_optimizer(STORES[key]["folder"])
+    import shift_model
+    import aggregated
+    import column_generation
+    import lns
+    import local_search
+    W, D, T, MinHw, MaxHw, Demand = scaled_instance(key, k)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    rules = dict(
+        Max_Deviation=2.5 * k,
+        rest_pairs=opt.REST_PAIRS,
+        closing_slot=opt.CLOSING_SLOT,
+        weekend_only=weekend_only,
+    )
+
+    start = time.perf_counter()
+    if engine in ("aggregated", "columns", "lns", "local_search"):
+        solve = {"aggregated": aggregated.solve_aggregated, "columns": column_generation.solve_columns,
+                 "lns": lns.solve_lns, "local_search": local_search.solve_local_search}[engine]
+        status, objective, _, _ = solve(W, D, T, S, MinHw, MaxHw, Demand, time_limit=TIME_LIMIT, **rules)
+    else:
+        model, _ = shift_model.build_shift_model("bench", W, D, T, S, MinHw, MaxHw, Demand, **rules)
+        model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=TIME_LIMIT))
+        status, objective = pulp.LpStatus[model.status], pulp.value(model.objective)
+    return {"staff": len(W), "time": time.perf_counter() - start, "status": status, "objective": objective}
+
+
+def main():
+    key = sys.argv[1] if len(sys.argv) > 1 else "Alcazar"
+    scales = [int(a) for a in sys.argv[2:]] or [1, 6, 22]
+    print(f"{'store':<20} {'staff':>5} {'engine':<12} {'time s':>8} {'status':<10} {'obj':>9}")
+    for k in scales:
+        for engine in ENGINES:
+            r = bench(key, k, engine)
+            obj = "-" if r["objective"] is None else f"{r['objective']:.2f}"
+            print(f"{key:<20} {r['staff']:>5} {engine:<12} {r['time']:>8.2f} {r['status']:<10} {obj:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Solver backends on the matrix model: CBC from an MPS file vs HiGHS in-process
+(highspy, scipy milp), one solve per store plus a batch of small solves.
+
+    python benchmarks/bench_backends.py [batch size]
+"""
+import sys
+import time
+
+from stores import STORES, load_optimizer, store_instance
+
+
+TIME_LIMIT = 120
+BATCH_STORE = "Plaza Nueva"
+
+
+def instance(key):
+    opt = load_optimizer(STORES[key]["folder"])
+    import backends
+    import greedy
+    import matrix_model
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    rules = dict(rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT, weekend_only=weekend_only)
+    mm = matrix_model.build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    start = greedy.greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)[2]
+    return backends, mm, start
+
+
+def main():
+    batch = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'store':<20} {'backend':<8} {'time s':>8} {'status':<11} {'obj':>8}")
+    for key in STORES:
+        backends, mm, start = instance(key)
+        for backend in backends.available_backends():
+            t0 = time.perf_counter()
+            status, objective, _, _ = backends.solve_matrix_model(mm, backend=backend, time_limit=TIME_LIMIT,
+                                                                  initial_schedule=start)
+            obj = "-" if objective is None else f"{objective:.2f}"
+            print(f"{key:<20} {backend:<8} {time.perf_counter() - t0:>8.3f} {status:<11} {obj:>8}")
+
+    backends, mm, start = instance(BATCH_STORE)
+    print(f"\n{batch} solves of {BATCH_STORE}")
+    for backend in backends.available_backends():
+        t0 = time.perf_counter()
+        for _ in range(batch):
+            backends.solve_matrix_model(mm, backend=backend, initial_schedule=start)
+        print(f"{backend:<8} {(time.perf_counter() - t0) / batch:>8.3f} s per solve")
+
+
+if __name__ == "__main__":
+    main()
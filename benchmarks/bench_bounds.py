@@ -0,0 +1,44 @@
+"""
+Lower bounds (bounds.py): the analytic bound, the LP-relaxation bound and the
+optimum per store, then each backend solved from the greedy roster without and
+with the bound as a stop target.
+
+    python benchmarks/bench_bounds.py [store ...]
+"""
+import sys
+import time
+
+from bench_backends import TIME_LIMIT, instance
+from stores import STORES
+
+
+def main():
+    keys = sys.argv[1:] or list(STORES)
+    print(f"{'store':<20} {'analytic':>9} {'ms':>7} {'lp':>9} {'ms':>7}")
+    for key in keys:
+        backends, mm, start = instance(key)
+        import bounds
+        t0 = time.perf_counter()
+        distances = bounds.slot_distances(mm["instance"]["W"], mm["instance"]["D"], mm["instance"]["T"],
+                                          mm["instance"]["Demand"],
+                                          weekend_only=set(mm["rules"].get("weekend_only", ())))
+        analytic_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        found = bounds.objective_bounds(mm)
+        lp_ms = (time.perf_counter() - t0) * 1000
+        lp = "infeasible" if found["infeasible"] else f"{found['lp']:.2f}"
+        print(f"{key:<20} {sum(distances.values()):>9.2f} {analytic_ms:>7.2f} {lp:>9} {lp_ms:>7.1f}")
+        if found["infeasible"]:
+            continue
+        for backend in backends.available_backends():
+            for target in (None, found["lower_bound"]):
+                t0 = time.perf_counter()
+                status, objective, _, _ = backends.solve_matrix_model(mm, backend=backend, time_limit=TIME_LIMIT,
+                                                                      initial_schedule=start, target=target)
+                obj = "-" if objective is None else f"{objective:.2f}"
+                label = f"{backend}{'' if target is None else ' +target'}"
+                print(f"{'':<20} {label:<14} {time.perf_counter() - t0:>8.3f} s {status:<11} {obj:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Manual edits on a solved week: one (worker, day, slot) cell switched, then
+the coverage table, via a rebuild from the edited (w, d, t) rows (what an app
+rerun did before) vs RosterEditor.set_cell's in-place update (editing.py).
+Random weeks from bench_roster for growing staff, Alcazar's 15 slots.
+
+    python benchmarks/bench_editing.py [staff ...]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_roster import D, T, random_week
+from stores import STORES, load_optimizer
+
+EDITS = 200
+
+
+def main():
+    load_optimizer(STORES["Alcazar"]["folder"])
+    import editing
+    import roster
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 500]
+    print(f"{'staff':>6} {'rows':>7} {'rebuild ms':>11} {'set_cell us':>12}")
+    for n in sizes:
+        W, Demand, schedule = random_week(n)
+        rng = random.Random(1)
+        cells = [(rng.randrange(n), rng.randrange(len(D)), rng.randrange(len(T)), rng.random() < 0.5)
+                 for _ in range(EDITS)]
+
+        rows = set(schedule)
+        t0 = time.perf_counter()
+        for i, j, k, on in cells:
+            (rows.add if on else rows.discard)((W[i], D[j], T[k]))
+            r = roster.Schedule.from_rows(sorted(rows), W, D, T)
+            rebuilt = pd.DataFrame(r.coverage_columns(Demand))
+        rebuild = (time.perf_counter() - t0) / EDITS
+
+        r = roster.Schedule.from_rows(schedule, W, D, T)
+        editor = editing.RosterEditor(r, pd.DataFrame(r.coverage_columns(Demand)))
+        t0 = time.perf_counter()
+        for i, j, k, on in cells:
+            editor.set_cell(i, j, k, on)
+        update = (time.perf_counter() - t0) / EDITS
+
+        cols = ["staffed", "under", "over"]
+        assert np.allclose(rebuilt[cols].to_numpy(float), editor.coverage_df[cols].to_numpy(float))
+        print(f"{n:>6} {len(schedule):>7} {rebuild * 1e3:>11.2f} {update * 1e6:>12.0f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compact vs lean vs rest-pattern vs flow formulation: model size, LP bound,
+build time and CBC time per store.
+
+    python benchmarks/bench_formulations.py [store ...]
+"""
+import sys
+import time
+
+import pulp
+
+from stores import STORES, load_optimizer, store_instance
+
+
+TIME_LIMIT = 300
+
+
+def bench(key, formulation):
+    opt = load_optimizer(STORES[key]["folder"])
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+
+    start = time.perf_counter()
+    model, v = shift_model.build_shift_model(
+        "bench", W, D, T, S, MinHw, MaxHw, Demand,
+        rest_pairs=opt.REST_PAIRS,
+        closing_slot=opt.CLOSING_SLOT,
+        weekend_only=weekend_only,
+        formulation=formulation,
+    )
+    build = time.perf_counter() - start
+
+    # LP relaxation (the variables are shared, so their types are put back)
+    cats = {var.name: var.cat for var in model.variables()}
+    for var in model.variables():
+        var.cat = pulp.LpContinuous
+    model.solve(pulp.PULP_CBC_CMD(msg=False))
+    lp = pulp.value(model.objective) if model.status == pulp.LpStatusOptimal else None
+    for var in model.variables():
+        var.cat = cats[var.name]
+
+    start = time.perf_counter()
+    model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=TIME_LIMIT))
+    solve = time.perf_counter() - start
+    return {
+        "vars": model.numVariables(),
+        "rows": model.numConstraints(),
+        "lp": lp,
+        "build": build,
+        "solve": solve,
+        "status": pulp.LpStatus[model.status],
+        "objective": pulp.value(model.objective),
+    }
+
+
+def main():
+    keys = sys.argv[1:] or list(STORES)
+    print(f"{'store':<20} {'form':<14} {'vars':>6} {'rows':>6} {'lp':>8} {'build s':>8} {'cbc s':>8} "
+          f"{'status':<10} {'obj':>8}")
+    for key in keys:
+        for formulation in ("compact", "lean", "rest_patterns", "flow"):
+            r = bench(key, formulation)
+            lp = "-" if r["lp"] is None else f"{r['lp']:.2f}"
+            obj = "-" if r["objective"] is None else f"{r['objective']:.4f}"
+            print(f"{key:<20} {formulation:<14} {r['vars']:>6} {r['rows']:>6} {lp:>8} {r['build']:>8.3f} "
+                  f"{r['solve']:>8.2f} {r['status']:<10} {obj:>8}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
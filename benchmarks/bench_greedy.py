@@ -0,0 +1,49 @@
+"""
+Greedy constructive engine vs CBC, and CBC started cold vs from the greedy roster.
+
+    python benchmarks/bench_greedy.py
+"""
+import time
+
+import pulp
+
+from stores import STORES, load_optimizer, store_instance
+
+
+TIME_LIMIT = 300
+
+
+def bench(key):
+    opt = load_optimizer(STORES[key]["folder"])
+    import greedy
+    import shift_model
+    import warm_start
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    rules = dict(rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT, weekend_only=weekend_only)
+
+    start = time.perf_counter()
+    status, objective, schedule, _ = greedy.greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    out = {"greedy": (time.perf_counter() - start, status, objective)}
+    for mode in ("cold", "greedy start"):
+        model, v = shift_model.build_shift_model("bench", W, D, T, S, MinHw, MaxHw, Demand,
+                                                 formulation="lean", **rules)
+        start = time.perf_counter()
+        warm = mode != "cold" and bool(schedule) and warm_start.warm_start(v, schedule, W, D, T, S,
+                                                                          MinHw, MaxHw, Demand, **rules)
+        model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=TIME_LIMIT, warmStart=warm))
+        out[mode] = (time.perf_counter() - start, pulp.LpStatus[model.status], pulp.value(model.objective))
+    return out
+
+
+def main():
+    print(f"{'store':<20} {'run':<13} {'time s':>8} {'status':<11} {'obj':>8}")
+    for key in STORES:
+        for run, (seconds, status, objective) in bench(key).items():
+            obj = "-" if objective is None or status == "Infeasible" else f"{objective:.2f}"
+            print(f"{key:<20} {run:<13} {seconds:>8.3f} {status:<11} {obj:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Lagrangian day decomposition: lower bound and repaired roster per store.
+
+    python benchmarks/bench_lagrangian.py [processes]
+"""
+import sys
+import time
+
+from stores import STORES, load_optimizer, store_instance
+
+
+TIME_LIMIT = 60
+
+
+def bench(key, processes):
+    opt = load_optimizer(STORES[key]["folder"])
+    import lagrangian
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    start = time.perf_counter()
+    status, objective, _, _, lower_bound = lagrangian.solve_lagrangian(
+        W, D, T, S, MinHw, MaxHw, Demand, rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT,
+        weekend_only=weekend_only, time_limit=TIME_LIMIT, processes=processes)
+    return time.perf_counter() - start, status, lower_bound, objective
+
+
+def main():
+    processes = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    print(f"{'store':<20} {'time s':>7} {'status':<11} {'bound':>8} {'obj':>8}")
+    for key in STORES:
+        seconds, status, bound, objective = bench(key, processes)
+        bound = "-" if bound is None else f"{bound:.2f}"
+        obj = "-" if objective is None else f"{objective:.2f}"
+        print(f"{key:<20} {seconds:>7.2f} {status:<11} {bound:>8} {obj:>8}")
+
+
+if __name__ == "__main__":
+    main()
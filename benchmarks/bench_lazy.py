@@ -0,0 +1,55 @@
+"""
+Lazy rest and closing rows (lazy.py) vs the full matrix model on stores
+scaled k times (bench_aggregated.scaled_instance), both from the greedy
+roster with CBC: time, objective, rounds and the rows the loop added.
+
+    python benchmarks/bench_lazy.py [store] [k ...]
+"""
+import sys
+import time
+
+from bench_aggregated import scaled_instance
+from stores import STORES, load_optimizer
+
+TIME_LIMIT = 300
+
+
+def main():
+    key = sys.argv[1] if len(sys.argv) > 1 else "Alcazar"
+    ks = [int(k) for k in sys.argv[2:]] or [1, 2, 3]
+    opt = load_optimizer(STORES[key]["folder"])
+    import backends
+    import greedy
+    import lazy
+    import matrix_model
+    import shift_model
+    print(f"{'store':<20} {'k':>2} {'engine':<6} {'rows':>6} {'time s':>8} {'status':<11} {'obj':>8} {'rounds':>6}")
+    for k in ks:
+        W, D, T, MinHw, MaxHw, Demand = scaled_instance(key, k)
+        S = shift_model.build_shift_set(T, 4, 8)
+        weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+        rules = dict(Max_Deviation=2.5 * k, rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT,
+                     weekend_only=weekend_only)
+        start = greedy.greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)[2]
+
+        t0 = time.perf_counter()
+        mm = matrix_model.build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+        status, objective, _, _ = backends.solve_matrix_model(mm, backend="cbc", time_limit=TIME_LIMIT,
+                                                              initial_schedule=start)
+        obj = "-" if objective is None else f"{objective:.2f}"
+        print(f"{key:<20} {k:>2} {'full':<6} {mm['shape'][0]:>6} {time.perf_counter() - t0:>8.3f} "
+              f"{status:<11} {obj:>8} {'-':>6}", flush=True)
+
+        rounds = []
+        t0 = time.perf_counter()
+        status, objective, _, _ = lazy.solve_lazy(W, D, T, S, MinHw, MaxHw, Demand, backend="cbc",
+                                                  time_limit=TIME_LIMIT, initial_schedule=start,
+                                                  on_iteration=rounds.append, **rules)
+        obj = "-" if objective is None else f"{objective:.2f}"
+        rows = rounds[-1]["rows"] if rounds else "-"
+        print(f"{key:<20} {k:>2} {'lazy':<6} {rows:>6} {time.perf_counter() - t0:>8.3f} "
+              f"{status:<11} {obj:>8} {len(rounds):>6}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
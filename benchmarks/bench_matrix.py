@@ -0,0 +1,57 @@
+"""
+Model assembly: PuLP expressions (compact / lean) vs the NumPy matrix builder,
+and writing each as MPS, on Alcazar scaled to ~200 workers over several weeks.
+
+Every staff member and every demand value is copied `k` times and the week is
+repeated `weeks` times (the weekly rest rows stay on days 1..7, as in
+build_shift_model, so this measures size, not a multi-week rule set).
+
+    python benchmarks/bench_matrix.py [k] [weeks]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from bench_aggregated import scaled_instance
+from stores import STORES, load_optimizer
+
+
+def main():
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 22
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    opt = load_optimizer(STORES["Alcazar"]["folder"])
+    import matrix_model
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = scaled_instance("Alcazar", k)
+    D = list(range(1, 7 * weeks + 1))
+    Demand = {d: Demand[(d - 1) % 7 + 1] for d in D}
+    S = shift_model.build_shift_set(T, 4, 8)
+    rules = dict(Max_Deviation=2.5 * k, rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT)
+
+    print(f"{len(W)} workers, {len(D)} days, {len(T)} slots, {len(S)} shifts")
+    print(f"{'builder':<16} {'build s':>8} {'write MPS s':>12} {'rows':>8} {'cols':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.mps")
+        for formulation in ("compact", "lean"):
+            start = time.perf_counter()
+            model, _ = shift_model.build_shift_model("bench", W, D, T, S, MinHw, MaxHw, Demand,
+                                                     formulation=formulation, **rules)
+            build = time.perf_counter() - start
+            start = time.perf_counter()
+            model.writeMPS(path)
+            write = time.perf_counter() - start
+            print(f"{'pulp ' + formulation:<16} {build:>8.3f} {write:>12.3f} "
+                  f"{len(model.constraints):>8} {len(model.variables()):>8}")
+            del model
+        start = time.perf_counter()
+        mm = matrix_model.build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        matrix_model.write_mps(mm, path)
+        write = time.perf_counter() - start
+        print(f"{'numpy matrix':<16} {build:>8.3f} {write:>12.3f} {mm['shape'][0]:>8} {mm['shape'][1]:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Multilevel engine (multilevel.py) on half-hour versions of the stores: every
+hourly slot split in two with the same demand, hours doubled, 4-8 h shifts
+as 8-16 slots. Direct fine model vs the coarse (hourly blocks) + guided fine
+solve, with twice the hourly optimum as reference (any hourly roster is a
+half-hour roster with twice the deviation).
+
+    python benchmarks/bench_multilevel.py [store ...]
+"""
+import sys
+import time
+
+from stores import STORES, load_optimizer, store_instance
+
+TIME_LIMIT = 300
+
+
+def half_hour_instance(key):
+    """Instance and rules of a store with each slot split into two half-hours."""
+    opt = load_optimizer(STORES[key]["folder"])
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    T2 = list(range(1, 2 * len(T) + 1))
+    S2 = shift_model.build_shift_set(T2, 8, 16)
+    Demand2 = {d: [Demand[d][i // 2] for i in range(len(T2))] for d in D}
+    MinHw2 = {w: 2 * MinHw[w] for w in W}
+    MaxHw2 = {w: 2 * MaxHw[w] for w in W}
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    rest_pairs = [(2 * late - i, 2 * early - j) for late, early in opt.REST_PAIRS for i in (0, 1) for j in (0, 1)]
+    rules = dict(rest_pairs=rest_pairs, closing_slot=2 * opt.CLOSING_SLOT, weekend_only=weekend_only)
+    hourly = dict(rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT, weekend_only=weekend_only)
+    return (W, D, T2, S2, MinHw2, MaxHw2, Demand2), rules, (W, D, T, MinHw, MaxHw, Demand), hourly
+
+
+def main():
+    keys = sys.argv[1:] or [key for key in STORES if key != "Avenida (15 slots)"]
+    print(f"{'store':<20} {'solve':<10} {'columns':>8} {'time s':>8} {'status':<11} {'obj':>8} {'2 x hourly':>10}")
+    for key in keys:
+        inst, rules, (W, D, T, MinHw, MaxHw, Demand), hourly = half_hour_instance(key)
+        import backends
+        import matrix_model
+        import multilevel
+        import reduction
+        import shift_model
+        S = shift_model.build_shift_set(T, 4, 8)
+        mm = matrix_model.build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, **hourly)
+        reference = backends.solve_matrix_model(mm, backend="cbc", time_limit=TIME_LIMIT)[1]
+        ref = "-" if reference is None else f"{2 * reference:.2f}"
+
+        t0 = time.perf_counter()
+        candidates = reduction.candidate_shifts(*inst, **rules)
+        mm = matrix_model.build_matrix_model(*inst, candidates=candidates, **rules)
+        status, objective, _, _ = backends.solve_matrix_model(mm, backend="cbc", time_limit=TIME_LIMIT)
+        obj = "-" if objective is None else f"{objective:.2f}"
+        print(f"{key:<20} {'direct':<10} {mm['shape'][1]:>8} {time.perf_counter() - t0:>8.3f} {status:<11} "
+              f"{obj:>8} {ref:>10}", flush=True)
+
+        levels = []
+        t0 = time.perf_counter()
+        status, objective, _, _ = multilevel.solve_multilevel(*inst, time_limit=TIME_LIMIT, backend="cbc",
+                                                               on_iteration=levels.append, **rules)
+        obj = "-" if objective is None else f"{objective:.2f}"
+        print(f"{key:<20} {'multilevel':<10} {levels[-1]['columns']:>8} {time.perf_counter() - t0:>8.3f} "
+              f"{status:<11} {obj:>8} {ref:>10}", flush=True)
+        for level in levels:
+            value = "-" if level["objective"] is None else f"{level['objective']:.2f}"
+            print(f"{'':<20}   {level['level']:<8} {level['columns']:>8} {level['elapsed']:>8.3f} "
+                  f"{level['status']:<11} {value:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Rebuilding the lean model per Solve click vs updating the persistent
+ScheduleModel in place (new demand, cap and hours, one worker out, one in).
+
+    python benchmarks/bench_persistent.py [store] [k ...]
+"""
+import sys
+import time
+
+from bench_aggregated import scaled_instance
+from stores import STORES, load_optimizer
+
+
+REPEATS = 5
+
+
+def bench(key, k):
+    opt = load_optimizer(STORES[key]["folder"])
+    import schedule_model
+    import shift_model
+    W, D, T, MinHw, MaxHw, Demand = scaled_instance(key, k)
+    S = shift_model.build_shift_set(T, 4, 8)
+    rules = dict(rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT)
+
+    start = time.perf_counter()
+    sm = schedule_model.ScheduleModel("bench", W, D, T, S, MinHw, MaxHw, Demand,
+                                      Max_Deviation=2.5 * k, **rules)
+    first = time.perf_counter() - start
+
+    rebuild = update = 0.0
+    for i in range(REPEATS):
+        # Each click: demand up 5 %, a looser cap, one worker swapped for a new hire
+        demand = {d: [v * (1.05 + 0.01 * i) for v in Demand[d]] for d in D}
+        staff = W[1:] + [f"new_{i}"]
+        min_h = dict(MinHw, **{f"new_{i}": 20.0})
+        max_h = dict(MaxHw, **{f"new_{i}": 26.0})
+        start = time.perf_counter()
+        shift_model.build_shift_model("bench", staff, D, T, S, min_h, max_h, demand,
+                                      Max_Deviation=3.0 * k, formulation="lean", **rules)
+        rebuild += time.perf_counter() - start
+        start = time.perf_counter()
+        sm.sync(staff, min_h, max_h, demand, Max_Deviation=3.0 * k)
+        update += time.perf_counter() - start
+    return {"staff": len(W), "first": first, "rebuild": rebuild / REPEATS, "update": update / REPEATS}
+
+
+def main():
+    key = sys.argv[1] if len(sys.argv) > 1 else "Alcazar"
+    scales = [int(a) for a in sys.argv[2:]] or [1, 6, 22]
+    print(f"{'staff':>6} {'first build s':>14} {'rebuild s':>10} {'update s':>9}")
+    for k in scales:
+        r = bench(key, k)
+        print(f"{r['staff']:>6} {r['first']:>14.3f} {r['rebuild']:>10.3f} {r['update']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
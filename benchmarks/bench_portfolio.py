@@ -0,0 +1,52 @@
+"""
+Solver portfolio: every configuration in portfolio.PORTFOLIO solved alone on
+each store, then the race itself. The race latency on a box with one core per
+configuration is the fastest proven configuration; the single-process default
+is "cbc".
+
+    python benchmarks/bench_portfolio.py [store ...]
+"""
+import os
+import sys
+import time
+
+from bench_backends import TIME_LIMIT, instance
+from stores import STORES
+
+
+def main():
+    keys = sys.argv[1:] or list(STORES)
+    print(f"{os.cpu_count()} cores")
+    print(f"{'store':<20} {'configuration':<16} {'time s':>8} {'status':<11} {'obj':>8}")
+    for key in keys:
+        backends, mm, start = instance(key)
+        import matrix_model
+        import portfolio
+        x0 = matrix_model.initial_values(mm, start)
+        times = {}
+        for config in portfolio.PORTFOLIO:
+            if not backends.backend_available(config["backend"]):
+                continue
+            t0 = time.perf_counter()
+            status, x = backends.solve_arrays(mm, backend=config["backend"], time_limit=TIME_LIMIT, x0=x0,
+                                              options=config.get("options"))
+            elapsed = time.perf_counter() - t0
+            if elapsed < TIME_LIMIT:
+                times[config["name"]] = elapsed
+            obj = "-" if x is None or status != "Optimal" else f"{float(mm['c'] @ x):.2f}"
+            print(f"{key:<20} {config['name']:<16} {elapsed:>8.3f} {status:<11} {obj:>8}")
+        if times:
+            best = min(times, key=times.get)
+            print(f"{key:<20} default {times.get('cbc', float('nan')):.3f} s, "
+                  f"slowest {max(times.values()):.3f} s, fastest {best} {times[best]:.3f} s")
+
+        t0 = time.perf_counter()
+        status, objective, _, _, report = portfolio.solve_portfolio(mm, time_limit=TIME_LIMIT,
+                                                                    initial_schedule=start)
+        obj = "-" if objective is None else f"{objective:.2f}"
+        print(f"{key:<20} {'race':<16} {time.perf_counter() - t0:>8.3f} {status:<11} {obj:>8} "
+              f"won by {report['winner']}\n")
+
+
+if __name__ == "__main__":
+    main()
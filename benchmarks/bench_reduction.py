@@ -0,0 +1,59 @@
+"""
+Model reduction (reduction.py): b columns of the matrix model and solve times
+with every shift, the exact candidate lists and the demand heuristic, per
+store and on Alcazar with three weekend-only 15 h contracts.
+
+    python benchmarks/bench_reduction.py [store ...]
+"""
+import sys
+import time
+
+from bench_backends import TIME_LIMIT, instance
+from stores import STORES
+
+WEEKEND_CASE = "Alcazar + weekend-only"
+
+
+def weekend_instance():
+    """Alcazar with its first three workers on 15-20 h weekend-only contracts."""
+    backends, mm, _ = instance("Alcazar")
+    import greedy
+    inst, rules = mm["instance"], dict(mm["rules"])
+    W = inst["W"]
+    MinHw, MaxHw = dict(inst["MinHw"]), dict(inst["MaxHw"])
+    for w in W[:3]:
+        MinHw[w], MaxHw[w] = 15, 20
+    rules.update(weekend_only=W[:3], Max_Deviation=3.5)
+    inst = dict(inst, MinHw=MinHw, MaxHw=MaxHw)
+    start = greedy.greedy_schedule(W, inst["D"], inst["T"], inst["S"], MinHw, MaxHw, inst["Demand"], **rules)[2]
+    return backends, inst, rules, start
+
+
+def main():
+    keys = sys.argv[1:] or list(STORES) + [WEEKEND_CASE]
+    print(f"{'store':<24} {'prune':<7} {'columns':>8} {'backend':<8} {'time s':>8} {'status':<11} {'obj':>8}")
+    for key in keys:
+        if key == WEEKEND_CASE:
+            backends, inst, rules, start = weekend_instance()
+        else:
+            backends, mm, start = instance(key)
+            inst, rules = mm["instance"], mm["rules"]
+        import matrix_model
+        import reduction
+        for prune in reduction.PRUNE_MODES:
+            candidates = reduction.candidate_shifts(inst["W"], inst["D"], inst["T"], inst["S"], inst["MinHw"],
+                                                    inst["MaxHw"], inst["Demand"], prune=prune,
+                                                    required=start, **rules)
+            mm = matrix_model.build_matrix_model(inst["W"], inst["D"], inst["T"], inst["S"], inst["MinHw"],
+                                                 inst["MaxHw"], inst["Demand"], candidates=candidates, **rules)
+            for backend in backends.available_backends():
+                t0 = time.perf_counter()
+                status, objective, _, _ = backends.solve_matrix_model(mm, backend=backend, time_limit=TIME_LIMIT,
+                                                                      initial_schedule=start)
+                obj = "-" if objective is None else f"{objective:.2f}"
+                print(f"{key:<24} {prune:<7} {reduction.count_candidates(candidates):>8} {backend:<8} "
+                      f"{time.perf_counter() - t0:>8.3f} {status:<11} {obj:>8}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
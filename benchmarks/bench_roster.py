@@ -0,0 +1,83 @@
+"""
+App post-processing of a solved week: coverage table, weekly hours and the
+per-worker 7 x |T| grids, from the (w, d, t) list with the loops the apps
+used before vs the bitmask Schedule (roster.py). Random legal-looking weeks
+(4-8 h shifts on about five days) for growing staff, Alcazar's 15 slots.
+
+    python benchmarks/bench_roster.py [staff ...]
+"""
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from stores import STORES, load_optimizer
+
+D = list(range(1, 8))
+T = list(range(1, 16))
+
+
+def random_week(n, seed=0):
+    rng = random.Random(seed)
+    W = [f"w{i}" for i in range(n)]
+    Demand = {d: [rng.uniform(0, n / 5) for _ in T] for d in D}
+    schedule = []
+    for w in W:
+        for d in D:
+            if rng.random() < 5 / 7:
+                length = rng.randint(4, 8)
+                s = rng.randint(T[0], T[-1] - length + 1)
+                schedule += [(w, d, t) for t in range(s, s + length)]
+    return W, Demand, schedule
+
+
+def with_loops(W, Demand, schedule):
+    rows = []
+    for d in D:
+        for t in T:
+            staffed = sum(1 for (w_, d_, t_) in schedule if d_ == d and t_ == t)
+            demand_val = Demand[d][t - 1]
+            rows.append({"day": d, "slot": t, "demand": demand_val, "staffed": staffed,
+                         "under": max(0.0, demand_val - staffed), "over": max(0.0, staffed - demand_val)})
+    coverage = pd.DataFrame(rows)
+    hours = pd.DataFrame([{"name": w, "total_hours": sum(1 for (w_, _, _) in schedule if w_ == w)} for w in W])
+    sched_df = pd.DataFrame(schedule, columns=["worker", "day", "slot"])
+    tables = {}
+    for w in W:
+        mat = np.zeros((len(D), len(T)), dtype=int)
+        for _, r in sched_df[sched_df["worker"] == w].iterrows():
+            mat[int(r["day"]) - 1, int(r["slot"]) - 1] = 1
+        tables[w] = pd.DataFrame(mat)
+    return coverage, hours, tables
+
+
+def with_schedule(W, Demand, schedule):
+    import roster
+    r = roster.Schedule.from_rows(schedule, W, D, T)
+    coverage = pd.DataFrame(r.coverage_columns(Demand))
+    hours = pd.DataFrame({"name": W, "total_hours": r.hours()})
+    grid = r.grid()
+    tables = {w: pd.DataFrame(grid[i]) for i, w in enumerate(W)}
+    return coverage, hours, tables
+
+
+def main():
+    load_optimizer(STORES["Alcazar"]["folder"])
+    sizes = [int(a) for a in sys.argv[1:]] or [10, 100, 500]
+    print(f"{'staff':>6} {'rows':>7} {'loops s':>9} {'Schedule s':>11}")
+    for n in sizes:
+        W, Demand, schedule = random_week(n)
+        t0 = time.perf_counter()
+        old = with_loops(W, Demand, schedule)
+        t1 = time.perf_counter()
+        new = with_schedule(W, Demand, schedule)
+        t2 = time.perf_counter()
+        assert (old[0]["staffed"].to_numpy() == new[0]["staffed"].to_numpy()).all()
+        assert (old[1]["total_hours"].to_numpy() == new[1]["total_hours"].to_numpy()).all()
+        print(f"{n:>6} {len(schedule):>7} {t1 - t0:>9.3f} {t2 - t1:>11.3f}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+Two-stage engine (two_stage.py) vs the monolithic matrix model, both from the
+greedy roster, per store and backend: time, objective, the shift-count bound
+and the stage rounds.
+
+    python benchmarks/bench_two_stage.py [store ...]
+"""
+import sys
+import time
+
+from bench_backends import TIME_LIMIT, instance
+from stores import STORES
+
+
+def main():
+    keys = sys.argv[1:] or list(STORES)
+    print(f"{'store':<20} {'engine':<10} {'backend':<8} {'time s':>8} {'status':<11} {'obj':>8} "
+          f"{'bound':>8} {'rounds':>6}")
+    for key in keys:
+        backends, mm, start = instance(key)
+        import two_stage
+        inst, rules = mm["instance"], mm["rules"]
+        for backend in backends.available_backends():
+            t0 = time.perf_counter()
+            status, objective, _, _ = backends.solve_matrix_model(mm, backend=backend, time_limit=TIME_LIMIT,
+                                                                  initial_schedule=start)
+            obj = "-" if objective is None else f"{objective:.2f}"
+            print(f"{key:<20} {'matrix':<10} {backend:<8} {time.perf_counter() - t0:>8.3f} {status:<11} "
+                  f"{obj:>8} {'-':>8} {'-':>6}", flush=True)
+
+            rounds = []
+            t0 = time.perf_counter()
+            status, objective, _, _, bound = two_stage.solve_two_stage(
+                inst["W"], inst["D"], inst["T"], inst["S"], inst["MinHw"], inst["MaxHw"], inst["Demand"],
+                time_limit=TIME_LIMIT, backend=backend, initial_schedule=start, on_iteration=rounds.append,
+                **rules)
+            obj = "-" if objective is None else f"{objective:.2f}"
+            low = "-" if bound is None else f"{bound:.2f}"
+            print(f"{key:<20} {'two_stage':<10} {backend:<8} {time.perf_counter() - t0:>8.3f} {status:<11} "
+                  f"{obj:>8} {low:>8} {len(rounds):>6}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Schedule validator (validation.py): microseconds per call on each store's
+greedy roster (which must come back clean) and on random weeks (4-8 h shifts
+on about five days, many of them breaking rules) for growing staff, with
+Alcazar's rules, from (w, d, t) rows and from a ready roster.Schedule (the
+per-edit case in an app).
+
+    python benchmarks/bench_validation.py [staff ...]
+"""
+import sys
+import time
+
+from bench_roster import D, T, random_week
+from stores import STORES, load_optimizer
+
+REPEAT = 200
+
+
+def per_call(fn):
+    t0 = time.perf_counter()
+    for _ in range(REPEAT):
+        out = fn()
+    return out, (time.perf_counter() - t0) / REPEAT * 1e6
+
+
+def main():
+    print(f"{'instance':<20} {'staff':>6} {'rows':>7} {'found':>6} {'rows us':>9} {'Schedule us':>12}")
+    for key, store in STORES.items():
+        opt = load_optimizer(store["folder"])
+        import greedy
+        import roster
+        import shift_model
+        W = list(store["staff"])
+        MinHw = {w: h[0] for w, h in store["staff"].items()}
+        MaxHw = {w: h[1] for w, h in store["staff"].items()}
+        Demand = store["demand"]
+        weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+        S = shift_model.build_shift_set(store["T"], 4, 8)
+        schedule = greedy.greedy_schedule(W, D, store["T"], S, MinHw, MaxHw, Demand, rest_pairs=opt.REST_PAIRS,
+                                          closing_slot=opt.CLOSING_SLOT, weekend_only=weekend_only)[2]
+        if not schedule:
+            print(f"{key:<20} {len(W):>6} {'-':>7} (no greedy roster)", flush=True)
+            continue
+        found, rows_us = per_call(lambda: opt.validate_schedule(schedule, W, D, store["T"], MinHw=MinHw, MaxHw=MaxHw,
+                                                                S=S))
+        r = roster.Schedule.from_rows(schedule, W, D, store["T"])
+        _, schedule_us = per_call(lambda: opt.validate_schedule(r, W, D, store["T"], MinHw=MinHw, MaxHw=MaxHw, S=S))
+        assert not found, found
+        print(f"{key:<20} {len(W):>6} {len(schedule):>7} {len(found):>6} {rows_us:>9.0f} {schedule_us:>12.0f}",
+              flush=True)
+
+    opt = load_optimizer(STORES["Alcazar"]["folder"])
+    import roster
+    import shift_model
+    S = shift_model.build_shift_set(T, 4, 8)
+    for n in [int(a) for a in sys.argv[1:]] or [9, 100, 500]:
+        W, Demand, schedule = random_week(n)
+        MinHw = {w: 25.0 for w in W}
+        MaxHw = {w: 32.5 for w in W}
+        Demand = {d: [Demand[d][t - 1] for t in T] for d in D}
+        found, rows_us = per_call(lambda: opt.validate_schedule(schedule, W, D, T, S, MinHw, MaxHw, Demand))
+        r = roster.Schedule.from_rows(schedule, W, D, T)
+        _, schedule_us = per_call(lambda: opt.validate_schedule(r, W, D, T, S, MinHw, MaxHw, Demand))
+        print(f"{'random':<20} {n:>6} {len(schedule):>7} {len(found):>6} {rows_us:>9.0f} {schedule_us:>12.0f}",
+              flush=True)
+
+
+if __name__ == "__main__":
+    main()
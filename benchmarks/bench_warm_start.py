@@ -0,0 +1,62 @@
+"""
+Cold vs warm-started CBC after a small demand change.
+
+The store's default week is solved first; every demand value is then moved
+by up to +-20% (fixed seed) and the new week is solved under a short time
+limit, cold and with the previous schedule as `initial_schedule`.
+
+    python benchmarks/bench_warm_start.py
+"""
+import random
+import time
+
+import pulp
+
+from stores import STORES, load_optimizer, store_instance
+
+
+BASE_TIME_LIMIT = 60
+TIME_LIMIT = 5
+
+
+def bench(key):
+    opt = load_optimizer(STORES[key]["folder"])
+    import shift_model
+    import warm_start
+    W, D, T, MinHw, MaxHw, Demand = store_instance(key)
+    S = shift_model.build_shift_set(T, 4, 8)
+    weekend_only = [w for w in W if abs(MinHw[w] - 15) < 1e-6] if hasattr(opt, "WEEKEND_DAYS") else []
+    rules = dict(rest_pairs=opt.REST_PAIRS, closing_slot=opt.CLOSING_SLOT, weekend_only=weekend_only)
+
+    model, v = shift_model.build_shift_model("base", W, D, T, S, MinHw, MaxHw, Demand, formulation="lean", **rules)
+    model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=BASE_TIME_LIMIT))
+    if pulp.value(model.objective) is None:
+        return None
+    previous = shift_model.extract_schedule(v, W, D, T, S)
+
+    rng = random.Random(1)
+    Demand = {d: [x * rng.uniform(0.8, 1.2) for x in Demand[d]] for d in D}
+    out = {}
+    for mode in ("cold", "warm"):
+        model, v = shift_model.build_shift_model("bench", W, D, T, S, MinHw, MaxHw, Demand,
+                                                 formulation="lean", **rules)
+        start = time.perf_counter()
+        warm = mode == "warm" and warm_start.warm_start(v, previous, W, D, T, S, MinHw, MaxHw, Demand, **rules)
+        model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=TIME_LIMIT, warmStart=warm))
+        out[mode] = (time.perf_counter() - start, pulp.value(model.objective))
+    return out
+
+
+def main():
+    print(f"{'store':<20} {'cold s':>7} {'cold obj':>9} {'warm s':>7} {'warm obj':>9}")
+    for key in STORES:
+        r = bench(key)
+        if r is None:
+            print(f"{key:<20} infeasible")
+            continue
+        (cs, co), (ws, wo) = r["cold"], r["warm"]
+        print(f"{key:<20} {cs:>7.2f} {co:>9.2f} {ws:>7.2f} {wo:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
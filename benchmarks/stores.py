@@ -0,0 +1,135 @@
+"""
+Default store instances for the benchmark scripts.
+
+Staff and demand are the defaults shown by each store's Streamlit app.
+`load_optimizer(folder)` imports that app's optimizer.py in isolation so
+stores with different rules can be benchmarked from one process.
+"""
+import importlib
+import math
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that live next to each optimizer.py and must be re-imported per store
+_APP_MODULES = ["optimizer", "shift_model", "patterns", "column_generation", "aggregated", "warm_start", "greedy", "lns", "lagrangian", "schedule_model", "matrix_model", "backends", "portfolio", "progress", "bounds", "screening", "diagnosis", "reduction", "two_stage", "multilevel", "lazy", "local_search", "roster", "validation", "editing"]
+
+
+def _round_half(x):
+    return math.floor(x * 2 + 0.5) / 2.0
+
+
+def _alcazar_staff():
+    mins = {"Jade": 35, "Ulisses": 25, "Angela": 20, "Jesus": 25, "Carla": 25,
+            "Macarena_Sevilla": 25, "Rafael": 25, "Aitana": 25, "Diana": 25}
+    return {w: (float(h), _round_half(min(40.0, h * 1.3))) for w, h in mins.items()}
+
+
+STORES = {
+    "Alcazar": {
+        "folder": "Alcazar_app",
+        "api": "build_and_solve_shift_model",
+        "T": list(range(1, 16)),
+        "staff": _alcazar_staff(),
+        "demand": {
+            1: [0.00, 0.89, 1.08, 1.15, 2.51, 3.11, 2.16, 4.06, 1.64, 1.45, 1.31, 2.68, 2.73, 2.14, 0.86],
+            2: [0.37, 1.08, 0.90, 0.59, 2.64, 3.40, 3.26, 3.97, 0.86, 1.51, 1.63, 1.77, 2.53, 2.58, 0.07],
+            3: [0.12, 0.80, 1.67, 2.64, 2.43, 2.64, 2.87, 2.25, 2.61, 1.62, 1.60, 0.88, 1.90, 2.25, 0.72],
+            4: [0.63, 1.00, 1.67, 2.46, 1.56, 1.91, 2.58, 2.04, 2.63, 2.11, 1.04, 1.34, 2.31, 2.12, 0.61],
+            5: [0.31, 0.74, 1.39, 1.88, 2.77, 1.75, 4.15, 3.55, 1.85, 2.22, 1.57, 1.34, 3.27, 3.07, 0.76],
+            6: [0.66, 0.48, 0.64, 1.05, 1.85, 3.61, 4.63, 3.06, 1.99, 2.04, 1.77, 1.82, 2.87, 3.40, 0.88],
+            7: [0.26, 0.52, 1.46, 2.39, 1.43, 3.18, 3.79, 3.23, 2.91, 1.41, 2.06, 2.28, 2.18, 2.03, 0.86],
+        },
+    },
+    "Avenida (13 slots)": {
+        "folder": "Avenida_app",
+        "api": "solve_schedule",
+        "T": list(range(1, 14)),
+        "staff": {"Cristina_Mata": (25.0, 32.5), "Gabriela_Velasco": (20.0, 26.0), "Javi": (27.0, 27.5),
+                  "Lorena": (25.0, 32.5), "Aurora": (25.0, 32.5), "Clara_Nogales": (25.0, 32.5)},
+        "demand": {
+            1: [0.23, 0.25, 0.70, 1.39, 0.80, 1.16, 1.27, 0.28, 0.89, 1.18, 0.91, 0.08, 0.26],
+            2: [0.76, 0.77, 0.56, 0.79, 0.45, 0.29, 0.45, 1.43, 1.42, 0.05, 0.73, 0.75, 0.99],
+            3: [0.31, 0.38, 0.29, 0.53, 0.49, 1.63, 0.53, 0.35, 0.01, 0.26, 0.29, 0.88, 0.35],
+            4: [0.86, 0.65, 0.37, 1.71, 1.33, 2.14, 0.69, 0.17, 0.29, 0.72, 0.80, 1.59, 0.72],
+            5: [0.30, 0.75, 1.05, 1.28, 0.56, 1.09, 0.55, 0.80, 1.20, 0.43, 0.97, 0.50, 0.74],
+            6: [2.23, 1.25, 0.21, 0.23, 0.59, 1.10, 1.74, 1.60, 1.09, 0.92, 1.17, 0.24, 1.13],
+            7: [0.37, 0.59, 1.10, 1.74, 1.60, 1.09, 0.92, 1.17, 0.24, 1.13, 1.89, 0.80, 0.00],
+        },
+    },
+    "Avenida (15 slots)": {
+        "folder": "Avenida_streamlit_app",
+        "api": "solve_schedule",
+        "T": list(range(1, 16)),
+        "staff": {"Cristina_Mata": (25.0, 32.5), "Gabriela_Velasco": (20.0, 26.0), "Javi": (27.5, 27.5),
+                  "Lorena": (25.0, 32.5), "Aurora": (25.0, 32.5), "Clara_Nogales": (25.0, 32.5)},
+        "demand": {
+            1: [0.23, 0.25, 0.70, 1.39, 0.80, 1.16, 1.27, 0.28, 0.89, 1.18, 0.91, 0.08, 0.26, 0.22, 0.44],
+            2: [0.76, 0.77, 0.56, 0.79, 0.45, 0.29, 0.45, 1.43, 1.42, 0.05, 0.73, 0.75, 0.99, 0.41, 0.36],
+            3: [0.31, 0.38, 0.29, 0.53, 0.49, 1.63, 0.53, 0.35, 0.01, 0.26, 0.29, 0.88, 0.35, 0.54, 0.67],
+            4: [0.86, 0.65, 0.37, 1.71, 1.33, 2.14, 0.69, 0.17, 0.29, 0.72, 0.80, 1.59, 0.72, 0.91, 0.28],
+            5: [0.30, 0.75, 1.05, 1.28, 0.56, 1.09, 0.55, 0.80, 1.20, 0.43, 0.97, 0.50, 0.74, 1.04, 1.45],
+            6: [2.23, 1.25, 0.21, 0.23, 0.59, 1.10, 1.74, 1.60, 1.09, 0.92, 1.17, 0.24, 1.13, 1.89, 0.80],
+            7: [0.37, 0.59, 1.10, 1.74, 1.60, 1.09, 0.92, 1.17, 0.24, 1.13, 1.89, 0.80, 0.00, 0.00, 0.00],
+        },
+    },
+    "Naranjos": {
+        "folder": "Naranjos_app",
+        "api": "solve_schedule",
+        "T": list(range(1, 14)),
+        "staff": {"Sara": (35.0, 40.0), "Paula": (15.0, 19.5), "Claudia": (20.0, 26.0),
+                  "Vanessa_V": (20.0, 26.0), "Valentyna": (25.0, 32.5), "Paz": (25.0, 32.5),
+                  "Kevin": (30.0, 39.0), "Ariadna": (25.0, 32.5), "Aroa": (25.0, 32.5)},
+        "demand": {
+            1: [0.88, 1.00, 2.61, 2.49, 2.45, 2.01, 2.32, 1.00, 1.22, 1.71, 1.29, 1.99, 0.57],
+            2: [2.07, 2.30, 2.48, 2.27, 2.01, 0.37, 0.82, 1.33, 1.72, 2.13, 0.24, 0.75, 1.59],
+            3: [1.87, 1.15, 0.53, 1.32, 0.96, 0.72, 1.18, 1.96, 0.09, 0.67, 2.10, 1.90, 2.50],
+            4: [2.51, 0.68, 1.30, 1.65, 2.14, 1.73, 0.22, 0.81, 1.31, 1.81, 2.17, 1.46, 1.58],
+            5: [1.00, 0.80, 1.50, 2.75, 1.86, 0.29, 0.43, 1.87, 1.19, 1.89, 2.27, 3.22, 1.72],
+            6: [1.37, 2.66, 1.97, 1.29, 0.16, 0.33, 0.45, 1.42, 1.68, 1.42, 2.24, 2.23, 2.67],
+            7: [1.48, 2.03, 2.06, 0.37, 1.60, 0.91, 0.90, 1.40, 1.20, 1.61, 1.72, 1.92, 1.77],
+        },
+    },
+    "Plaza Nueva": {
+        "folder": "Plaza_Nueva_app",
+        "api": "solve_schedule",
+        "T": list(range(1, 14)),
+        "staff": {"Irene": (35.0, 40.0), "Leslie_Ann": (25.0, 32.5), "Leonardo": (25.0, 32.5),
+                  "Gabriela_Martinez": (30.0, 39.0), "Eulogio": (25.0, 32.5),
+                  "Antonio_S_Garcia": (20.0, 26.0)},
+        "demand": {
+            1: [0.12, 0.27, 0.36, 0.49, 1.45, 0.35, 1.23, 1.54, 1.30, 1.84, 1.01, 0.43, 0.05],
+            2: [0.97, 0.43, 0.72, 0.60, 0.50, 0.55, 0.65, 1.11, 1.47, 0.91, 0.43, 0.00, 0.00],
+            3: [0.19, 0.19, 0.19, 0.19, 0.19, 0.19, 0.19, 0.61, 0.54, 0.50, 0.06, 0.74, 1.39],
+            4: [1.00, 1.31, 1.16, 0.48, 0.61, 0.18, 1.45, 0.71, 1.35, 0.98, 0.68, 0.60, 0.48],
+            5: [1.11, 0.10, 0.36, 0.13, 0.29, 2.31, 0.11, 1.49, 1.03, 0.65, 1.16, 1.34, 0.96],
+            6: [1.08, 0.26, 0.07, 0.24, 0.80, 0.63, 0.83, 0.27, 0.59, 0.41, 0.44, 1.12, 1.84],
+            7: [0.74, 0.43, 0.48, 0.35, 0.64, 0.70, 0.74, 0.96, 1.05, 0.88, 0.63, 0.71, 0.79],
+        },
+    },
+}
+
+
+_loaded_path = None
+
+
+def load_optimizer(folder):
+    """Import `<folder>/optimizer.py` (and its sibling modules) fresh."""
+    global _loaded_path
+    for name in _APP_MODULES:
+        sys.modules.pop(name, None)
+    if _loaded_path in sys.path:
+        sys.path.remove(_loaded_path)
+    _loaded_path = os.path.join(ROOT, folder)
+    sys.path.insert(0, _loaded_path)
+    return importlib.import_module("optimizer")
+
+
+def store_instance(key):
+    """(W, D, T, MinHw, MaxHw, Demand) for a store in STORES."""
+    store = STORES[key]
+    W = list(store["staff"])
+    MinHw = {w: lo for w, (lo, _) in store["staff"].items()}
+    MaxHw = {w: hi for w, (_, hi) in store["staff"].items()}
+    return W, list(range(1, 8)), list(store["T"]), MinHw, MaxHw, store["demand"]
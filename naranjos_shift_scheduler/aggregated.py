@@ -0,0 +1,51 @@
+from column_generation import solve_seeded
+
+# Aggregated engine: workers with the same contract (MinHw, MaxHw, weekend-only)
+# are interchangeable, so the master only decides how many workers of each
+# class follow each weekly pattern (see column_generation.py); the patterns
+# are then handed to the class's workers in order.
+
+
+def contract_classes(W, MinHw, MaxHw, weekend_only=()):
+    """{(min, max, weekend_only): [workers]} in the order workers appear in W."""
+    weekend_only = set(weekend_only)
+    classes = {}
+    for w in W:
+        key = (float(MinHw[w]), float(MaxHw[w]), w in weekend_only)
+        classes.setdefault(key, []).append(w)
+    return classes
+
+
+def solve_aggregated(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    initial_schedule=None,
+    backend="auto",
+    gap=None,
+    stop=None,
+):
+    """
+    Contract-class pattern model. "Feasible" means the rosters are valid but
+    not proven optimal within time_limit (seconds). Falls back to the
+    per-worker model if the patterns cannot meet the cap / min-staff rows.
+    The weekly patterns of `initial_schedule` (repaired) or the greedy
+    roster seed the master, and that roster is returned if the master ends
+    worse (see column_generation.solve_seeded); backend, gap and stop as in
+    solve_pattern_groups.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T)
+    classes = contract_classes(W, MinHw, MaxHw, weekend_only)
+    groups = {key: (len(ws), key[0], key[1], key[2]) for key, ws in classes.items()}
+    return solve_seeded(groups, classes, W, D, T, S, MinHw, MaxHw, Demand,
+                        weekend_only=weekend_only, time_limit=time_limit, initial_schedule=initial_schedule,
+                        backend=backend, gap=gap, stop=stop, Max_Deviation=Max_Deviation,
+                        rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings,
+                        weekend_days=weekend_days, require_min_staff=require_min_staff)
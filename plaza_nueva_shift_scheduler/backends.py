@@ -0,0 +1,204 @@
+import importlib.util
+import os
+import tempfile
+
+import numpy as np
+import pulp
+
+from matrix_model import column_major, initial_values, matrix_schedule, read_cbc_solution, write_mps
+from progress import progress_event, reached, run_cbc
+from warm_start import repair_schedule
+
+# Solver backends for the matrix model (matrix_model.py). "cbc" writes an MPS
+# file for PuLP's CBC binary, "highs" passes the arrays to HiGHS in-process
+# through highspy (no files, no subprocess) and "scipy" through
+# scipy.optimize.milp (HiGHS as well, but without a MIP start).
+# backend="auto" takes the first one installed in BACKENDS order: CBC solves
+# the store models fastest on one core, HiGHS takes over where PuLP's binary
+# cannot run. Every backend returns the statuses PuLP uses ("Optimal" also
+# when a time limit stops the search with an incumbent). options= passes solver
+# settings through: CBC command-line parameters ({"randomCbcSeed": 2} becomes
+# "-randomCbcSeed 2") or HiGHS option names; scipy ignores them. gap= stops at
+# that relative gap; on_progress / stop (see progress.py) stream incumbent and
+# bound and end the search early on CBC and HiGHS, and target= ends it once the
+# incumbent reaches a known lower bound (bounds.py).
+
+BACKENDS = ("cbc", "highs", "scipy")
+
+
+def backend_available(backend):
+    if backend == "highs":
+        return importlib.util.find_spec("highspy") is not None
+    if backend == "scipy":
+        return importlib.util.find_spec("scipy") is not None
+    if backend == "cbc":
+        return pulp.PULP_CBC_CMD().available()
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def available_backends():
+    return [b for b in BACKENDS if backend_available(b)]
+
+
+def select_backend(backend="auto"):
+    """Resolve "auto" to the first installed backend; None if there is none."""
+    if backend == "auto":
+        return next(iter(available_backends()), None)
+    if not backend_available(backend):
+        raise ValueError(f"Backend not installed: {backend}")
+    return backend
+
+
+def _solve_cbc(mm, time_limit, msg, x0, options, gap, on_progress, stop, target):
+    with tempfile.TemporaryDirectory() as tmp:
+        mps, mst, sol = (os.path.join(tmp, f"shifts.{ext}") for ext in ("mps", "mst", "sol"))
+        write_mps(mm, mps)
+        args = [pulp.PULP_CBC_CMD().path, mps]
+        if x0 is not None:
+            with open(mst, "w") as f:
+                f.write("Stopped on time - objective value 0\n")
+                f.writelines(f"{j:>7} X{j} {v:>15} 0\n" for j, v in enumerate(x0.tolist()))
+            args += ["-mips", mst]
+        if time_limit is not None:
+            args += ["-sec", str(int(time_limit)), "-timeMode", "elapsed"]
+        if gap is not None:
+            args += ["-ratioGap", str(gap)]
+        for key, value in options.items():
+            args += [f"-{key}", str(value)]
+        args += ["-solve", "-solution", sol]
+        run_cbc(args, msg=msg, on_progress=on_progress, stop=stop, target=target)
+        if not os.path.exists(sol):
+            return "Not Solved", None
+        return read_cbc_solution(sol, mm["shape"][1])
+
+
+def _highs_progress(on_progress, stop, target=None, every=1.0):
+    # MIP interrupt callback: progress when the incumbent or bound moves (else
+    # once a second) and the user interrupt once `stop` is set or the incumbent
+    # reaches `target`
+    last = {"key": None, "time": 0.0}
+
+    def callback(event):
+        out = event.data_out
+        if on_progress is not None:
+            incumbent = out.mip_primal_bound if abs(out.mip_primal_bound) < 1e30 else None
+            bound = out.mip_dual_bound if abs(out.mip_dual_bound) < 1e30 else None
+            key = (incumbent, bound)
+            if key != last["key"] or out.running_time - last["time"] >= every:
+                last["key"], last["time"] = key, out.running_time
+                on_progress(progress_event(incumbent, bound, out.mip_node_count, out.running_time))
+        if (stop is not None and stop.is_set()) or reached(out.mip_primal_bound, target):
+            event.interrupt()
+
+    return callback
+
+
+def _solve_highs(mm, time_limit, msg, x0, options, gap, on_progress, stop, target):
+    import highspy
+    n_rows, n_cols = mm["shape"]
+    starts, rows, vals = column_major(mm)
+    lp = highspy.HighsLp()
+    lp.num_col_, lp.num_row_ = n_cols, n_rows
+    lp.col_cost_, lp.col_lower_, lp.col_upper_ = mm["c"], mm["lower"], mm["upper"]
+    lp.row_lower_, lp.row_upper_ = mm["row_lower"], mm["row_upper"]
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    lp.a_matrix_.start_, lp.a_matrix_.index_, lp.a_matrix_.value_ = starts, rows, vals
+    lp.integrality_ = [highspy.HighsVarType.kInteger if i else highspy.HighsVarType.kContinuous
+                       for i in mm["integrality"]]
+    h = highspy.Highs()
+    h.setOptionValue("output_flag", bool(msg))
+    if time_limit is not None:
+        h.setOptionValue("time_limit", float(time_limit))
+    if gap is not None:
+        h.setOptionValue("mip_rel_gap", float(gap))
+    for key, value in options.items():
+        h.setOptionValue(key, value)
+    h.passModel(lp)
+    if x0 is not None:
+        start = highspy.HighsSolution()
+        start.col_value = x0.tolist()
+        start.value_valid = True
+        h.setSolution(start)
+    if on_progress is not None or stop is not None or target is not None:
+        h.cbMipInterrupt.subscribe(_highs_progress(on_progress, stop, target))
+    h.run()
+    model_status = h.getModelStatus()
+    has_solution = h.getInfo().primal_solution_status == highspy.SolutionStatus.kSolutionStatusFeasible
+    x = np.array(h.getSolution().col_value) if has_solution else None
+    if model_status == highspy.HighsModelStatus.kOptimal:
+        return "Optimal", x
+    if model_status in (highspy.HighsModelStatus.kInfeasible, highspy.HighsModelStatus.kUnboundedOrInfeasible):
+        return "Infeasible", None
+    if model_status == highspy.HighsModelStatus.kUnbounded:
+        return "Unbounded", None
+    return ("Optimal" if has_solution else "Not Solved"), x
+
+
+def _solve_scipy(mm, time_limit, msg, x0, options, gap, on_progress, stop, target):
+    from scipy.optimize import Bounds, LinearConstraint, milp
+    from scipy.sparse import coo_array
+    A = coo_array((mm["vals"], (mm["rows"], mm["cols"])), shape=mm["shape"]).tocsr()
+    options = {"disp": bool(msg)}
+    if time_limit is not None:
+        options["time_limit"] = float(time_limit)
+    if gap is not None:
+        options["mip_rel_gap"] = float(gap)
+    res = milp(mm["c"], integrality=mm["integrality"], bounds=Bounds(mm["lower"], mm["upper"]),
+               constraints=LinearConstraint(A, mm["row_lower"], mm["row_upper"]), options=options)
+    status = {0: "Optimal", 2: "Infeasible", 3: "Unbounded"}.get(res.status)
+    if status is None:
+        # Time / iteration limit or solver error: keep an incumbent if there is one
+        status = "Optimal" if res.x is not None else "Not Solved"
+    return status, (res.x if status == "Optimal" else None)
+
+
+_SOLVERS = {"cbc": _solve_cbc, "highs": _solve_highs, "scipy": _solve_scipy}
+
+
+def pulp_solver(backend="auto", time_limit=None, msg=False, gap_abs=None, gap=None, warm_start=False):
+    """
+    PuLP solver for a model built with PuLP (diagnosis.py, the pattern, LNS
+    and Lagrangian engines) on the chosen backend; "scipy" has no PuLP
+    interface, so it takes CBC or HiGHS as "auto" does. gap is relative;
+    warm_start passes the variables' initial values as a MIP start (CBC only).
+    """
+    name = select_backend(backend)
+    if name not in ("cbc", "highs"):
+        name = next((b for b in ("cbc", "highs") if backend_available(b)), None)
+    if name is None:
+        raise ValueError("No PuLP solver installed (PuLP's CBC or highspy)")
+    if name == "cbc":
+        return pulp.PULP_CBC_CMD(msg=msg, timeLimit=time_limit, gapAbs=gap_abs, gapRel=gap, warmStart=warm_start)
+    return pulp.HiGHS(msg=msg, timeLimit=time_limit, gapAbs=gap_abs, gapRel=gap)
+
+
+def solve_arrays(mm, backend="auto", time_limit=None, msg=False, x0=None, options=None, gap=None,
+                 on_progress=None, stop=None, target=None):
+    """Status and column vector (None without a solution) for a matrix model."""
+    name = select_backend(backend)
+    if name is None:
+        raise ValueError("No solver backend installed (highspy, scipy or PuLP's CBC)")
+    return _SOLVERS[name](mm, time_limit, msg, x0, options or {}, gap, on_progress, stop, target)
+
+
+def solve_matrix_model(mm, backend="auto", time_limit=None, msg=False, initial_schedule=None, gap=None,
+                       on_progress=None, stop=None, target=None):
+    """
+    Solve a matrix model with the chosen backend.
+    initial_schedule is repaired to the current rules and passed as a MIP start
+    (ignored by "scipy").
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    inst = mm["instance"]
+    x0 = None
+    if initial_schedule:
+        start = repair_schedule(initial_schedule, inst["W"], inst["D"], inst["T"], inst["S"],
+                                inst["MinHw"], inst["MaxHw"], inst["Demand"], **mm["rules"])
+        if start is not None:
+            x0 = initial_values(mm, start)
+    status, x = solve_arrays(mm, backend=backend, time_limit=time_limit, msg=msg, x0=x0, gap=gap,
+                             on_progress=on_progress, stop=stop, target=target)
+    if x is None or status != "Optimal":
+        return status, None, [], {}
+    schedule, metrics = matrix_schedule(mm, x)
+    return status, float(mm["c"] @ x), schedule, metrics
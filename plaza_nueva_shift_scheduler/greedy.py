@@ -0,0 +1,99 @@
+import numpy as np
+
+from patterns import best_pattern, pattern_schedule
+from shift_model import schedule_metrics
+from warm_start import VIOLATION_WEIGHT, schedule_patterns
+
+# Greedy constructive engine (no solver): workers are placed one at a time on
+# the legal week (pattern DP) that most reduces the current deviation, so the
+# most under-staffed (day, slot) cells are filled first and over-staffed ones
+# avoided. A few best-response passes then re-place each worker against the
+# others. Used for quick previews, as the CBC MIP start and when CBC is
+# missing or returns no incumbent.
+
+
+def slot_gains(staffed, demand, Max_Deviation=2.5, require_min_staff=True):
+    """Value of one more worker in every (day, slot) cell: deviation reduction, cap / min-staff rows first."""
+    dev = np.abs(staffed - demand) - np.abs(staffed + 1 - demand)
+    cap = np.maximum(0.0, np.abs(staffed - demand) - Max_Deviation) \
+        - np.maximum(0.0, np.abs(staffed + 1 - demand) - Max_Deviation)
+    if require_min_staff:
+        cap = cap + (staffed < 1)
+    return dev + VIOLATION_WEIGHT * cap
+
+
+def shift_values(gain, D, T, S):
+    """{d: {(s,e): sum of gain over the shift's slots}} via cumulative sums."""
+    first = T[0]
+    cum = np.zeros((len(D), len(T) + 1))
+    cum[:, 1:] = np.cumsum(gain, axis=1)
+    return {d: {se: cum[i, se[1] - first + 1] - cum[i, se[0] - first] for se in S} for i, d in enumerate(D)}
+
+
+def coverage_ok(metrics, Max_Deviation=2.5, require_min_staff=True):
+    """True if every (day, slot) in schedule metrics meets the cap / min-staff rows."""
+    return not any(abs(n - dem) > Max_Deviation + 1e-9 or (require_min_staff and n < 1)
+                   for _, _, n, dem in metrics.values())
+
+
+def greedy_schedule(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    passes=1,
+    initial_schedule=None,
+):
+    """
+    Greedy weekly rosters. Every worker gets a legal week (hours, two
+    consecutive days off, 12h rest, closings, weekend-only), so "Feasible"
+    means the cap / min-staff rows hold too; "Not Solved" keeps the schedule
+    but some of those rows are broken.
+    initial_schedule: legal (w, d, t) rows (e.g. from repair_schedule) to
+    improve instead of starting from an empty roster.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T)
+    weekend_only = set(weekend_only)
+    rules = dict(rest_pairs=rest_pairs, closing_slot=closing_slot, max_closings=max_closings)
+    cover = dict(Max_Deviation=Max_Deviation, require_min_staff=require_min_staff)
+    allowed = {w: (list(weekend_days) if w in weekend_only else None) for w in W}
+    demand = np.array([[float(Demand[d][idx]) for idx in range(len(T))] for d in D])
+    staffed = np.zeros_like(demand)
+    first = T[0]
+
+    def place(pattern, sign):
+        for i, se in enumerate(pattern):
+            if se is not None:
+                staffed[i, se[0] - first:se[1] - first + 1] += sign
+
+    # Least flexible contracts first: weekend-only, then the most minimum hours
+    order = sorted(W, key=lambda w: (w not in weekend_only, -float(MinHw[w])))
+    patterns = {}
+    if initial_schedule is not None:
+        patterns = schedule_patterns(initial_schedule, W, D)
+        for w in W:
+            place(patterns[w], 1)
+    for _ in range(passes + 1):
+        changed = False
+        for w in order:
+            if w in patterns:
+                place(patterns[w], -1)
+            day_value = shift_values(slot_gains(staffed, demand, **cover), D, T, S)
+            _, pattern = best_pattern(day_value, D, S, MinHw[w], MaxHw[w], allowed_days=allowed[w], **rules)
+            if pattern is None:
+                return "Infeasible", None, [], {}
+            changed = changed or patterns.get(w) != pattern
+            patterns[w] = pattern
+            place(pattern, 1)
+        if not changed:
+            break
+
+    schedule = [row for w in W for row in pattern_schedule(w, patterns[w], D, T)]
+    objective, metrics = schedule_metrics(schedule, D, T, Demand)
+    status = "Feasible" if coverage_ok(metrics, **cover) else "Not Solved"
+    return status, objective, schedule, metrics
@@ -0,0 +1,221 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pulp
+
+from backends import pulp_solver
+from greedy import greedy_schedule
+from patterns import shift_hours
+from progress import reached
+from shift_model import shifts_covering
+from warm_start import repair_schedule
+
+# Lagrangian day decomposition. The rows that tie days together (weekly hours,
+# the consecutive-rest-days z rows, 12h rest between d and d+1, the closing
+# cap) are moved into the objective with multipliers; what is left splits into
+# one small MIP per day (one shift per worker, demand balance, cap and
+# min-staff rows) plus a trivial choice of z per worker. The seven day MIPs are
+# solved in a process pool, the multipliers follow a Polyak subgradient step,
+# and every iteration's day solutions are repaired into a legal roster.
+
+
+def solve_day(task):
+    """One day's MIP under the current shift costs. Runs in a worker process."""
+    d, workers, S, T, cost, demand, Max_Deviation, require_min_staff, backend = task
+    cover = shifts_covering(S, T)
+    model = pulp.LpProblem(f"Day_{d}", pulp.LpMinimize)
+    b = pulp.LpVariable.dicts("b", (workers, S), cat="Binary")
+    under = pulp.LpVariable.dicts("under", T, lowBound=0)
+    over = pulp.LpVariable.dicts("over", T, lowBound=0)
+    model += pulp.lpSum(under[t] + over[t] for t in T) + pulp.lpSum(
+        cost[w][se] * b[w][se] for w in workers for se in S)
+    for w in workers:
+        model += pulp.lpSum(b[w][se] for se in S) <= 1
+    for idx, t in enumerate(T):
+        staffed = pulp.lpSum(b[w][se] for w in workers for se in cover[t])
+        model += staffed + under[t] - over[t] == demand[idx]
+        model += under[t] + over[t] <= Max_Deviation
+        if require_min_staff:
+            model += staffed >= 1
+    model.solve(pulp_solver(backend))
+    if pulp.LpStatus[model.status] != "Optimal":
+        return pulp.LpStatus[model.status], None, {}
+    chosen = {}
+    for w in workers:
+        for se in S:
+            if pulp.value(b[w][se]) > 0.5:
+                chosen[w] = se
+    return "Optimal", pulp.value(model.objective), chosen
+
+
+def solve_lagrangian(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    time_limit=60,
+    max_iterations=100,
+    target=None,
+    processes=None,
+    on_iteration=None,
+    backend="auto",
+    stop=None,
+):
+    """
+    Lagrangian relaxation of the weekly rows with per-day subproblems.
+    Stops at time_limit (seconds), after max_iterations, or once the best
+    roster meets the dual bound or `target` (a known lower bound, e.g. the
+    LP bound of bounds.py); "Optimal" in the last two cases. stop
+    (threading.Event) ends it between iterations.
+    processes: worker processes for the day MIPs (None = one per CPU,
+    1 = solve in this process).
+    on_iteration(record) gets {"iteration", "lower_bound", "objective", "elapsed"}.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict, lower_bound
+    """
+    W = list(W); D = list(D); T = list(T)
+    rest_pairs = [(late, early) for (late, early) in rest_pairs if late in T and early in T]
+    if closing_slot not in T:
+        closing_slot = None
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=rest_pairs,
+        closing_slot=closing_slot,
+        max_closings=max_closings,
+        weekend_only=weekend_only,
+        weekend_days=weekend_days,
+        require_min_staff=require_min_staff,
+    )
+    start = time.time()
+    lo = {w: math.ceil(MinHw[w] - 1e-9) for w in W}
+    hi = {w: math.floor(MaxHw[w] + 1e-9) for w in W}
+    pairs = range(1, 7)  # z[w][d]: days d and d+1 off, as in the MIP
+    works_on = {d: [w for w in W if w not in weekend_only or d in weekend_days] for d in D}
+    covers = {se: {t for t in T if se[0] <= t <= se[1]} for se in S}
+
+    # Upper bound: the greedy roster
+    status, best_obj, best, best_metrics = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand, **rules)
+    if status == "Infeasible":
+        return status, None, [], {}, None
+    if status != "Feasible":
+        best_obj = None
+
+    def proven():
+        return reached(best_obj, lower_bound) or reached(best_obj, target)
+
+    # Multipliers: hours (min / max), rest pair (z vs y on d and d+1), 12h rest, closings
+    mu_min = {w: 0.0 for w in W}
+    mu_max = {w: 0.0 for w in W}
+    mu_off = {(w, d, k): 0.0 for w in W for d in pairs for k in (0, 1)}
+    mu_rest = {(w, d, p): 0.0 for w in W for d in pairs for p in rest_pairs}
+    mu_close = {w: 0.0 for w in W}
+
+    lower_bound = None
+    theta, stale = 1.0, 0
+    pool = ProcessPoolExecutor(processes) if processes != 1 else None
+    try:
+        for iteration in range(1, max_iterations + 1):
+            if time_limit is not None and time.time() - start >= time_limit:
+                break
+            if stop is not None and stop.is_set():
+                break
+            if proven():
+                # The greedy roster already meets the caller's bound
+                break
+            # Shift costs per day from the multipliers
+            tasks = []
+            for d in D:
+                cost = {}
+                for w in works_on[d]:
+                    day_cost = 0.0
+                    if d in pairs:
+                        day_cost += mu_off[(w, d, 0)]
+                    if d - 1 in pairs:
+                        day_cost += mu_off[(w, d - 1, 1)]
+                    cost[w] = {}
+                    for se in S:
+                        c = day_cost + (mu_max[w] - mu_min[w]) * shift_hours(se)
+                        for p in rest_pairs:
+                            if d in pairs and p[0] in covers[se]:
+                                c += mu_rest[(w, d, p)]
+                            if d - 1 in pairs and p[1] in covers[se]:
+                                c += mu_rest[(w, d - 1, p)]
+                        if closing_slot in covers[se]:
+                            c += mu_close[w]
+                        cost[w][se] = c
+                tasks.append((d, works_on[d], S, T, cost, Demand[d], Max_Deviation, require_min_staff, backend))
+            results = list(pool.map(solve_day, tasks)) if pool is not None else [solve_day(t) for t in tasks]
+            if any(r[0] != "Optimal" for r in results):
+                # A day cannot meet its cap / min-staff rows with any staffing
+                return "Infeasible", None, [], {}, lower_bound
+            shift = {(w, d): results[i][2].get(w) for i, d in enumerate(D) for w in W}
+
+            # Dual value: day MIPs + best z per worker + constants
+            value = sum(r[1] for r in results)
+            for w in W:
+                value += min(mu_off[(w, d, 0)] + mu_off[(w, d, 1)] for d in pairs)
+                value += mu_min[w] * lo[w] - mu_max[w] * hi[w] - mu_close[w] * max_closings
+            value -= sum(mu_off.values()) + sum(mu_rest.values())
+            if lower_bound is None or value > lower_bound + 1e-9:
+                lower_bound, stale = value, 0
+            else:
+                stale += 1
+                if stale >= 10:
+                    theta, stale = theta / 2, 0
+
+            # Repair the day solutions into a legal roster
+            rows = [(w, d, t) for (w, d), se in shift.items() if se is not None for t in sorted(covers[se])]
+            repaired = repair_schedule(rows, W, D, T, S, MinHw, MaxHw, Demand, **rules)
+            if repaired is not None:
+                status, obj, schedule, metrics = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand,
+                                                                 initial_schedule=repaired, **rules)
+                if status == "Feasible" and (best_obj is None or obj < best_obj - 1e-9):
+                    best_obj, best, best_metrics = obj, schedule, metrics
+
+            if on_iteration is not None:
+                on_iteration({
+                    "iteration": iteration,
+                    "lower_bound": lower_bound,
+                    "objective": best_obj,
+                    "elapsed": time.time() - start,
+                })
+            if proven():
+                break
+
+            # Subgradients of the relaxed rows (row value - right-hand side)
+            g_min, g_max, g_off, g_rest, g_close = {}, {}, {}, {}, {}
+            for w in W:
+                hours = sum(shift_hours(shift[(w, d)]) for d in D if shift[(w, d)] is not None)
+                g_min[w] = lo[w] - hours
+                g_max[w] = hours - hi[w]
+                works = {d: shift[(w, d)] is not None for d in D}
+                z_day = min(pairs, key=lambda d: mu_off[(w, d, 0)] + mu_off[(w, d, 1)])
+                for d in pairs:
+                    g_off[(w, d, 0)] = int(d == z_day) + works[d] - 1
+                    g_off[(w, d, 1)] = int(d == z_day) + works[d + 1] - 1
+                    for p in rest_pairs:
+                        late = works[d] and p[0] in covers[shift[(w, d)]]
+                        early = works[d + 1] and p[1] in covers[shift[(w, d + 1)]]
+                        g_rest[(w, d, p)] = late + early - 1
+                g_close[w] = sum(1 for d in D if works[d] and closing_slot in covers[shift[(w, d)]]) - max_closings
+            groups = ((mu_min, g_min), (mu_max, g_max), (mu_off, g_off), (mu_rest, g_rest), (mu_close, g_close))
+            norm = sum(g * g for mu, grad in groups for key, g in grad.items() if g > 0 or mu[key] > 0)
+            if norm < 1e-12:
+                # The day solutions satisfy every relaxed row
+                break
+            estimate = best_obj if best_obj is not None else 1.05 * abs(lower_bound) + 1.0
+            step = theta * max(estimate - lower_bound, 1e-3) / norm
+            for mu, grad in groups:
+                for key, g in grad.items():
+                    mu[key] = max(0.0, mu[key] + step * g)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if best_obj is None:
+        return "Not Solved", None, [], {}, lower_bound
+    return ("Optimal" if proven() else "Feasible"), best_obj, best, best_metrics, lower_bound
@@ -0,0 +1,183 @@
+import math
+
+import numpy as np
+
+# Weekly patterns: one worker's roster as a tuple with a shift (s,e) or None per
+# day. best_pattern() is a dynamic program over (day, previous shift class,
+# closings, rest-pair found, hours) that returns the pattern with the highest
+# total value under every per-worker rule:
+# - at most one 4..8h shift per day (shifts come from S)
+# - weekly hours in [MinHw, MaxHw] (whole slots)
+# - at least one pair of consecutive rest days
+# - 12h rest: no late slot on d followed by the paired early slot on d+1
+# - at most max_closings shifts covering closing_slot
+# - only allowed_days (weekend-only contracts)
+
+NEG = -1e18
+
+
+def shift_hours(se):
+    return se[1] - se[0] + 1
+
+
+def pattern_hours(pattern):
+    return sum(shift_hours(se) for se in pattern if se is not None)
+
+
+def pattern_schedule(w, pattern, D, T):
+    """(w, d, t) rows for one worker's pattern."""
+    return [(w, d, t) for d, se in zip(D, pattern) if se is not None for t in T if se[0] <= t <= se[1]]
+
+
+def _forbidden_early(se, rest_pairs):
+    """Early slots that cannot be worked the day after shift se."""
+    if se is None:
+        return frozenset()
+    return frozenset(early for late, early in rest_pairs if se[0] <= late <= se[1])
+
+
+def _covers_any(se, slots):
+    return any(se[0] <= t <= se[1] for t in slots)
+
+
+def best_pattern(
+    day_value, D, S, min_h, max_h,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    allowed_days=None,
+    shift_filter=None,
+):
+    """
+    Highest-value weekly pattern.
+
+    - day_value[d][(s,e)]: value collected by working (s,e) on day d
+    - allowed_days: days the worker may work (None = all)
+    - shift_filter(d, se) -> bool: optional extra restriction per day/shift
+    Returns (value, pattern) or (None, None) if no pattern satisfies the rules.
+    """
+    D = list(D)
+    lo = max(0, math.ceil(min_h - 1e-9))
+    hi = math.floor(max_h + 1e-9)
+    if hi < lo:
+        return None, None
+    H = hi + 1
+    C = max_closings + 1 if closing_slot is not None else 1
+
+    # Previous-day classes: index 0 = off, then one per distinct forbidden set
+    forb = {se: _forbidden_early(se, rest_pairs) for se in S}
+    classes = [None] + sorted(set(forb.values()), key=sorted)
+    if frozenset() not in classes:
+        classes.append(frozenset())
+    cls_index = {f: i for i, f in enumerate(classes) if f is not None}
+    P = len(classes)
+    OFF = 0
+    start = cls_index[frozenset()]
+
+    is_close = {se: closing_slot is not None and se[0] <= closing_slot <= se[1] for se in S}
+    # Shifts allowed after each working class (12h rest)
+    after = {p: [se for se in S if not _covers_any(se, classes[p])] for p in range(1, P)}
+    # (previous class, (length, closing, outgoing class), shift), fixed for every day
+    moves = [(p, (shift_hours(se), int(is_close[se]), cls_index[forb[se]]), se)
+             for p in range(1, P) for se in after[p]]
+
+    # V[p, c, f, h]: best value with previous class p, c closings, f = rest pair found
+    V = np.full((P, C, 2, H), NEG)
+    V[start, 0, 0, 0] = 0.0
+    history = []
+    for d in D:
+        can_work = allowed_days is None or d in allowed_days
+        # Best shift per (previous class, length, closing, outgoing class)
+        choice = {}
+        if can_work:
+            values = day_value[d]
+            for p, kind, se in moves:
+                if shift_filter is not None and not shift_filter(d, se):
+                    continue
+                key = (p, kind)
+                if key not in choice or values[se] > choice[key][0]:
+                    choice[key] = (values[se], se)
+        N = np.full_like(V, NEG)
+        # Day off: a pair is found if the previous day was off too
+        N[OFF, :, 1, :] = np.maximum(N[OFF, :, 1, :], V[OFF, :, 0, :])
+        N[OFF, :, 1, :] = np.maximum(N[OFF, :, 1, :], V[OFF, :, 1, :])
+        for p in range(1, P):
+            N[OFF] = np.maximum(N[OFF], V[p])
+        # Work a shift
+        for (p, (L, cl, out)), (val, _) in choice.items():
+            if L > hi:
+                continue
+            src = V[p, :C - cl, :, :H - L] + val
+            N[out, cl:, :, L:] = np.maximum(N[out, cl:, :, L:], src)
+        # Previous day off also allows any shift
+        for (p, (L, cl, out)), (val, _) in choice.items():
+            if p != start or L > hi:
+                continue
+            src = V[OFF, :C - cl, :, :H - L] + val
+            N[out, cl:, :, L:] = np.maximum(N[out, cl:, :, L:], src)
+        history.append((V, choice))
+        V = N
+
+    final = V[:, :, 1, lo:]
+    best = final.max()
+    if best <= NEG / 2:
+        return None, None
+
+    # Backtrack from the best final state
+    p, c, h = np.unravel_index(np.argmax(final), final.shape)
+    f, h = 1, h + lo
+    pattern = []
+    for d, (Vp, choice) in zip(reversed(D), reversed(history)):
+        target = V[p, c, f, h]
+        found = False
+        if p == OFF:
+            # Came from any class on the previous day
+            for q in range(P):
+                if q == OFF and f == 0:
+                    continue
+                for fq in ((0, 1) if q == OFF else (f,)):
+                    if abs(Vp[q, c, fq, h] - target) <= 1e-6 * max(1.0, abs(target)):
+                        pattern.append(None)
+                        p, f, V, found = q, fq, Vp, True
+                        break
+                if found:
+                    break
+        else:
+            for (q, (L, cl, out)), (val, se) in choice.items():
+                if out != p or L > h or cl > c:
+                    continue
+                sources = [q] + ([OFF] if q == start else [])
+                for qs in sources:
+                    if abs(Vp[qs, c - cl, f, h - L] + val - target) <= 1e-6 * max(1.0, abs(target)):
+                        pattern.append(se)
+                        p, c, h, V, found = qs, c - cl, h - L, Vp, True
+                        break
+                if found:
+                    break
+        if not found:
+            raise RuntimeError("pattern backtrack failed")
+    pattern.reverse()
+    return float(best), tuple(pattern)
+
+
+def pattern_violations(pattern, D, min_h, max_h, rest_pairs=(), closing_slot=None,
+                       max_closings=2, allowed_days=None):
+    """List of rule names a pattern breaks (empty if valid)."""
+    out = []
+    h = pattern_hours(pattern)
+    if not (math.ceil(min_h - 1e-9) <= h <= math.floor(max_h + 1e-9)):
+        out.append("hours")
+    if not any(pattern[i] is None and pattern[i + 1] is None for i in range(len(pattern) - 1)):
+        out.append("rest_pair")
+    for i in range(len(pattern) - 1):
+        a, b = pattern[i], pattern[i + 1]
+        if a is not None and b is not None and _covers_any(b, _forbidden_early(a, rest_pairs)):
+            out.append("rest_12h")
+            break
+    if closing_slot is not None:
+        if sum(1 for se in pattern if se is not None and se[0] <= closing_slot <= se[1]) > max_closings:
+            out.append("closings")
+    if allowed_days is not None:
+        if any(se is not None and d not in allowed_days for d, se in zip(D, pattern)):
+            out.append("days")
+    return out
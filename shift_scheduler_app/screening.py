@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+
+from shift_model import shifts_covering
+
+# Pre-solve screening: necessary conditions on staff, demand and rules checked
+# with array arithmetic before any model is built. Every check is implied by
+# the model's rows, so an instance that fails one is infeasible and the
+# optimizers return at once with the diagnostics instead of running the solver.
+# Passing the screen does not prove feasibility (rest and closing rows interact
+# with the weekly hours in ways only the MIP sees).
+
+TOLERANCE = 1e-9
+# Slots listed per diagnostic before "and N more"
+MAX_LISTED = 6
+
+
+def _listed(items):
+    items = list(items)
+    text = ", ".join(str(i) for i in items[:MAX_LISTED])
+    return text + (f" and {len(items) - MAX_LISTED} more" if len(items) > MAX_LISTED else "")
+
+
+def working_days(D, allowed):
+    """Most days a worker can work: the allowed days outside the best pair of consecutive days off."""
+    pairs = [(d, d + 1) for d in D if d + 1 in D]
+    if not pairs:
+        return len(allowed)
+    return max(len(set(allowed) - set(pair)) for pair in pairs)
+
+
+def screen_instance(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+):
+    """
+    Diagnostics (list of str, empty if the screen passes) for an instance
+    with Demand[d] aligned with T. rest_pairs is accepted for the common rules
+    signature but not screened.
+    """
+    W = list(W); D = list(D); T = list(T)
+    weekend_only = set(weekend_only)
+    problems = []
+    if Max_Deviation < 0:
+        return [f"Max_Deviation is {Max_Deviation:g}; it must be at least 0."]
+    if not S:
+        return ["The shift set is empty."]
+
+    # Workers: weekly hours reachable with k working days of min_len..max_len hours
+    lengths = [e - s + 1 for s, e in S]
+    min_len, max_len = min(lengths), max(lengths)
+    allowed = {w: [d for d in D if w not in weekend_only or d in weekend_days] for w in W}
+    low = np.array([math.ceil(MinHw[w] - TOLERANCE) for w in W], dtype=float)
+    high = np.array([math.floor(MaxHw[w] + TOLERANCE) for w in W], dtype=float)
+    days = np.array([working_days(D, allowed[w]) for w in W])
+    k = np.arange(len(D) + 1)
+    usable = k[None, :] <= days[:, None]
+    reachable = usable & (np.maximum(low[:, None], k * min_len) <= np.minimum(high[:, None], k * max_len))
+    most = np.minimum(high, days * max_len)
+    for i in np.flatnonzero(~reachable.any(axis=1)):
+        w = W[i]
+        if MinHw[w] > MaxHw[w]:
+            problems.append(f"Worker {w}: MinHw {MinHw[w]:g} is above MaxHw {MaxHw[w]:g}.")
+        elif low[i] > high[i]:
+            problems.append(f"Worker {w}: no whole number of hours lies between MinHw {MinHw[w]:g} and "
+                            f"MaxHw {MaxHw[w]:g} (hours are whole slots).")
+        elif low[i] > days[i] * max_len:
+            kind = "weekend-only, " if w in weekend_only else ""
+            problems.append(f"Worker {w}: MinHw {MinHw[w]:g} needs more than the {days[i] * max_len} h "
+                            f"possible in {days[i]} days ({kind}{max_len} h shifts, two consecutive days off).")
+        else:
+            problems.append(f"Worker {w}: no week of {min_len}-{max_len} h shifts gives "
+                            f"{MinHw[w]:g}-{MaxHw[w]:g} h.")
+
+    # Slots: headcount must stay within Max_Deviation of demand, between the
+    # min-staff rule and the staff who can work that day (none if no shift covers the slot)
+    demand = np.array([[Demand[d][i] for i in range(len(T))] for d in D], dtype=float)
+    available = np.array([sum(1 for w in W if d in allowed[w]) for d in D])
+    covered = np.array([bool(c) for c in shifts_covering(S, T).values()])
+    need = np.maximum(np.ceil(demand - Max_Deviation - TOLERANCE), 1 if require_min_staff else 0)
+    room = np.minimum(np.floor(demand + Max_Deviation + TOLERANCE), available[:, None] * covered[None, :])
+    for i, d in enumerate(D):
+        short = np.flatnonzero(need[i] > room[i])
+        if len(short):
+            problems.append(f"Day {d}: slot{'s' if len(short) > 1 else ''} {_listed(T[j] for j in short)} "
+                            f"cannot be staffed within Max_Deviation {Max_Deviation:g} of demand with "
+                            f"{available[i]} staff available.")
+    if problems:
+        return problems
+
+    # Totals: staff-hours the slots need / absorb against what the contracts give / require
+    hours_needed, hours_absorbed = need.sum(), room.sum()
+    if hours_needed > most.sum() + TOLERANCE:
+        problems.append(f"Demand needs at least {hours_needed:g} staff-hours within Max_Deviation "
+                        f"{Max_Deviation:g}; the staff can work at most {most.sum():g}.")
+    if low.sum() > hours_absorbed + TOLERANCE:
+        problems.append(f"Contracts require at least {low.sum():g} staff-hours; demand within Max_Deviation "
+                        f"{Max_Deviation:g} absorbs at most {hours_absorbed:g}.")
+    day_short = np.flatnonzero(need.sum(axis=1) > available * max_len)
+    if len(day_short):
+        problems.append(f"Day{'s' if len(day_short) > 1 else ''} {_listed(D[i] for i in day_short)} "
+                        f"need{'' if len(day_short) > 1 else 's'} more staff-hours than "
+                        f"{max_len} h per available worker.")
+    if closing_slot in T:
+        closings = sum(min(max_closings, len(allowed[w])) for w in W)
+        closing_need = need[:, T.index(closing_slot)].sum()
+        if closing_need > closings:
+            problems.append(f"Slot {closing_slot} needs {closing_need:g} closing shifts in the week; "
+                            f"with at most {max_closings} per worker the staff can cover {closings}.")
+    return problems
@@ -16,6 +16,7 @@ except Exception as e:
     st.code("pip install numpy")
     st.stop()
 
+import functools
 import inspect
 from io import BytesIO
 import sys, os
@@ -57,6 +58,13 @@ except Exception as e1:
     except Exception as e2:
         opt_import_error = (e1, e2)
 
+from bounds import describe_bounds
+from edit_panel import fragment, roster_editor, worker_editors
+from editing import RosterEditor
+from progress import SolveJob
+from roster import Schedule
+from solve_panel import follow_solve
+
 def debug_import_error():
     st.error("Failed to import `optimizer.py`. Please ensure it is in the same folder as this file.")
     if opt_import_error is not None:
@@ -79,7 +87,7 @@ def build_shift_set_fallback(T, min_len=4, max_len=8):
                 S.append((s,e))
     return S
 
-def adapt_to_user_optimizer(demand_df, staff_df, max_dev):
+def adapt_to_user_optimizer(demand_df, staff_df, max_dev, engine="mip", gap=None, on_progress=None, stop=None):
     """
     If optimizer has `build_and_solve_shift_model`, adapt inputs accordingly and call it.
     Returns a normalized dict if successful, else None.
@@ -111,7 +119,8 @@ def adapt_to_user_optimizer(demand_df, staff_df, max_dev):
     # Call the user's function WITHOUT time_limit kw
     fn = getattr(opt_mod, "build_and_solve_shift_model")
     try:
-        res = fn(W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=max_dev)
+        res = fn(W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=max_dev, engine=engine, gap=gap,
+                 on_progress=on_progress, stop=stop, diagnose=True)
     except TypeError:
         # if user requires time_limit positionally/kw but has a default, omit it; else try None
         try:
@@ -123,29 +132,33 @@ def adapt_to_user_optimizer(demand_df, staff_df, max_dev):
     # Normalize to our expected outputs
     out = {}
     out["status"] = res.get("status", "OK")
-    out["objective"] = res.get("objective", float("nan"))
+    out["objective"] = res.get("objective")
+    if out["objective"] is None:
+        out["objective"] = float("nan")
     out["elapsed_time"] = res.get("elapsed_time", float("nan"))
+    out["diagnostics"] = res.get("diagnostics", [])
+    out["diagnosed_by"] = res.get("diagnosed_by")
+    out["winner"] = res.get("winner")
+    out["gap_stopped"] = res.get("gap_stopped")
+    out["candidates"] = res.get("candidates")
+    out["bounds"] = res.get("bounds")
 
     # Convert schedule list[(w,d,t)] to DataFrames
     schedule = res.get("schedule", [])
+    roster = Schedule.from_rows(schedule, W, D, T)
     # Coverage by day-slot
-    rows = []
-    for d in D:
-        for t in T:
-            staffed = sum(1 for (w_, d_, t_) in schedule if d_ == d and t_ == t)
-            demand_val = float(demand_df.iloc[d-1, t-1])
-            under = max(0.0, demand_val - staffed)
-            over = max(0.0, staffed - demand_val)
-            rows.append({"day": d, "slot": t, "demand": demand_val, "staffed": staffed, "under": under, "over": over})
-    out["coverage_df"] = pd.DataFrame(rows)
+    out["coverage_df"] = pd.DataFrame(roster.coverage_columns(Demand),
+                                      columns=["day", "slot", "demand", "staffed", "under", "over"])
 
     # Hours per worker (each slot counts as 1 hour)
-    hours_rows = []
-    for w in W:
-        total_hours = sum(1 for (w_, _, _) in schedule if w_ == w)
-        hours_rows.append({"name": w, "total_hours": total_hours,
-                           "min_week_hours": MinHw[w], "max_week_hours": MaxHw[w]})
-    out["hours_df"] = pd.DataFrame(hours_rows)
+    out["hours_df"] = pd.DataFrame({"name": W, "total_hours": roster.hours(),
+                                    "min_week_hours": [MinHw[w] for w in W],
+                                    "max_week_hours": [MaxHw[w] for w in W]})
+
+    # Store rules for manual edits (validation.py)
+    if hasattr(opt_mod, "validate_schedule"):
+        out["validate"] = functools.partial(opt_mod.validate_schedule, W=W, D=D, T=T, S=S, MinHw=MinHw, MaxHw=MaxHw,
+                                            Demand=Demand, Max_Deviation=max_dev)
 
     # Assignments in slot form; also we will aggregate to per-worker 7x15 later
     out["assignments_df"] = pd.DataFrame([{"name": w, "day": d, "start_slot": t, "end_slot": t, "hours": 1}
@@ -212,6 +225,9 @@ DAY_LABELS = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
 with st.sidebar:
     st.header("Configuration")
     max_dev = st.number_input("Max deviation per slot (people)", min_value=0.0, value=2.5, step=0.5)
+    quick_preview = st.checkbox("Quick preview (greedy, no solver)", value=False)
+    race_solvers = st.checkbox("Race solver configurations (one per CPU core)", value=False)
+    gap_pct = st.number_input("Stop at relative gap (%)", min_value=0.0, max_value=100.0, value=1.0, step=0.5)
 
     st.markdown("---")
     st.subheader("Demand CSV")
@@ -280,64 +296,80 @@ else:
 
 st.markdown("### Run Optimizer")
 if st.button("Solve now", type="primary"):
-    with st.spinner("Solving..."):
-        res = adapt_to_user_optimizer(demand, st.session_state["staff_df"], max_dev)
-        if res is None:
-            res = call_any_solver(opt_mod, demand, st.session_state["staff_df"], S, max_deviation=max_dev)
+    st.session_state["solve_job"] = SolveJob(adapt_to_user_optimizer, demand, st.session_state["staff_df"], max_dev,
+                                             engine="greedy" if quick_preview else ("portfolio" if race_solvers else "mip"),
+                                             gap=gap_pct / 100)
+
+job = st.session_state.get("solve_job")
+if job is not None:
+    res = follow_solve(job)
+    if res is None:
+        res = call_any_solver(opt_mod, demand, st.session_state["staff_df"], S, max_deviation=max_dev)
+    if res.get("diagnosed_by") == "screening":
+        # Rejected by the pre-solve screen, before any model was built
+        st.error("These inputs cannot produce a schedule:\n" + "\n".join(f"- {msg}" for msg in res["diagnostics"]))
+        st.stop()
+    if res.get("diagnostics"):
+        # The MIP was infeasible: the elastic solve (diagnosis.py) names the rules to relax
+        st.error("No roster meets every rule; relax one of these:\n"
+                 + "\n".join(f"- {msg}" for msg in res["diagnostics"]))
+        st.stop()
 
     st.success(f"Status: {res.get('status','N/A')}, Objective (total deviation): {res.get('objective', float('nan')):.4f}")
-    if 'hours_df' in res:
-        st.write("Weekly hours per worker")
-        st.dataframe(res['hours_df'], use_container_width=True)
-    if 'coverage_df' in res:
-        st.write("Coverage by day-slot (demand / staffed / under / over)")
-        st.dataframe(res['coverage_df'], use_container_width=True)
-
-    # Per-worker 7x15 with color highlight
-    st.markdown("### Per-worker Schedule (7×15, color = scheduled)")
+    if res.get("gap_stopped"):
+        st.caption(f"Stopped at the {gap_pct:g} % gap: not proven optimal")
+    if res.get("winner"):
+        st.caption(f"Portfolio winner: {res['winner']}")
+    if res.get("candidates"):
+        st.caption(res["candidates"])
+    if res.get("bounds"):
+        st.caption(describe_bounds(res["bounds"]))
     assignments_df = res.get("assignments_df", pd.DataFrame(columns=["name","day","start_slot","end_slot"]))
     workers = list(st.session_state["staff_df"]['name'])
+    if "coverage_df" not in res:
+        st.stop()
 
-    def style_schedule(df):
-        return df.style.apply(lambda s: ['background-color: #C6F6D5' if v==1 else '' for v in s], axis=1)
-
-    SLOT_LABELS = ["10-11","11-12","12-13","13-14","14-15","15-16","16-17","17-18","18-19","19-20","20-21","21-22","22-23","23-00","00-01"]
-    DAY_LABELS = ["Mon","Tue","Wed","Thu","Fri","Sat","Sun"]
-    worker_tables = {}
-    if not assignments_df.empty:
-        for w in workers:
-            mat = np.zeros((7,15), dtype=int)
-            subset = assignments_df[assignments_df['name'] == w]
-            for _, row in subset.iterrows():
-                d = int(row['day']) - 1
-                s = int(row['start_slot']) - 1
-                e = int(row['end_slot']) - 1
-                s = max(0, min(14, s))
-                e = max(0, min(14, e))
-                mat[d, s:e+1] = 1
-            df = pd.DataFrame(mat, columns=SLOT_LABELS, index=DAY_LABELS)
-            worker_tables[w] = df
-
-    for w in workers:
-        if w in worker_tables:
-            with st.expander(f"{w}"):
-                st.dataframe(style_schedule(worker_tables[w]), use_container_width=True)
-
-    # Download per-worker Excel
-    if worker_tables:
-        try:
-            import xlsxwriter
-            engine = "xlsxwriter"
-        except Exception:
-            engine = None
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine=engine) as writer:
-            for w, df in worker_tables.items():
-                sheet_name = w[:31] if w else "Worker"
-                df.to_excel(writer, sheet_name=sheet_name)
-        st.download_button(
-            "Download per-worker schedule (Excel)",
-            data=output.getvalue(),
-            file_name="per_worker_schedule.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
+    # Manual edits (editing.py): cells switched in the per-worker tables update
+    # the hours and coverage tables in place, with no new solve
+    def start_editing():
+        roster = Schedule.from_spans(assignments_df['name'].tolist(), assignments_df['day'].astype(int).tolist(),
+                                     assignments_df['start_slot'].astype(int).tolist(),
+                                     assignments_df['end_slot'].astype(int).tolist(),
+                                     workers, range(1, 8), range(1, 16))
+        return RosterEditor(roster, res["coverage_df"], res.get("hours_df"), validate=res.get("validate"))
+    editor = roster_editor(job, start_editing)
+
+    @fragment
+    def results():
+        if editor.hours_df is not None:
+            st.write("Weekly hours per worker")
+            st.dataframe(editor.hours_df, use_container_width=True)
+        st.write("Coverage by day-slot (demand / staffed / under / over)")
+        st.dataframe(editor.coverage_df, use_container_width=True)
+
+        # Per-worker 7x15, editable
+        st.markdown("### Per-worker Schedule (7×15, ticked = scheduled; tick or untick to adjust)")
+        worker_editors(editor, SLOT_LABELS, DAY_LABELS)
+        grid = editor.roster.grid()
+        worker_tables = {w: pd.DataFrame(grid[i], columns=SLOT_LABELS, index=DAY_LABELS) for i, w in enumerate(workers)}
+
+        # Download per-worker Excel
+        if worker_tables:
+            try:
+                import xlsxwriter
+                engine = "xlsxwriter"
+            except Exception:
+                engine = None
+            output = BytesIO()
+            with pd.ExcelWriter(output, engine=engine) as writer:
+                for w, df in worker_tables.items():
+                    sheet_name = w[:31] if w else "Worker"
+                    df.to_excel(writer, sheet_name=sheet_name)
+            st.download_button(
+                "Download per-worker schedule (Excel)",
+                data=output.getvalue(),
+                file_name="per_worker_schedule.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+
+    results()
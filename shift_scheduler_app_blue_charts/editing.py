@@ -0,0 +1,88 @@
+import numpy as np
+
+from roster import Schedule
+
+# Manual edits on a solved week, without another solve. RosterEditor keeps the
+# roster's slot masks, the staffed count of every (day, slot), the total
+# deviation and the apps' coverage / hours tables. Switching one (worker, day,
+# slot) cell on or off flips one bit and moves one count, and only that cell's
+# coverage row and that worker's hours are rewritten in place, so an edit
+# costs the same for 5 or 500 workers. The coverage table has one row per
+# (day, slot), by day then slot (Schedule.coverage_columns); the hours table,
+# if any, one row per worker in W order with a "total_hours" column.
+
+
+class RosterEditor:
+    """A solved roster under manual cell edits."""
+
+    def __init__(self, roster, coverage_df, hours_df=None, validate=None):
+        self.solved = roster.grid()
+        self.validate = validate
+        self._start = (roster.masks.copy(), coverage_df.copy(), None if hours_df is None else hours_df.copy())
+        self.roster = Schedule(roster.W, roster.D, roster.T)
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Back to the solved roster; version changes so edit widgets start afresh."""
+        masks, coverage_df, hours_df = self._start
+        self.roster.masks[:] = masks
+        self.coverage_df = coverage_df.copy()
+        self.hours_df = None if hours_df is None else hours_df.copy()
+        self.staffed = self.roster.staffed()
+        self.demand = self.coverage_df["demand"].to_numpy(dtype=float).reshape(self.staffed.shape)
+        self.deviation = float(np.abs(self.staffed - self.demand).sum())
+        self.changed = set()
+        self.version += 1
+        self._columns = {c: self.coverage_df.columns.get_loc(c) for c in ("staffed", "under", "over")}
+        if self.hours_df is not None:
+            self._columns["total_hours"] = self.hours_df.columns.get_loc("total_hours")
+
+    def set_cell(self, i, j, k, on):
+        """Worker W[i] works slot T[k] on day D[j] (on=True) or not; False if it already did."""
+        bit = self.roster.masks.dtype.type(1 << k)
+        if bool(self.roster.masks[i, j] & bit) == bool(on):
+            return False
+        self.roster.masks[i, j] ^= bit
+        step = 1 if on else -1
+        old = int(self.staffed[j, k])
+        new = old + step
+        demand = self.demand[j, k]
+        self.staffed[j, k] = new
+        self.deviation += abs(new - demand) - abs(old - demand)
+
+        # One coverage row and one hours cell change
+        row = j * len(self.roster.T) + k
+        self.coverage_df.iat[row, self._columns["staffed"]] = new
+        self.coverage_df.iat[row, self._columns["under"]] = max(0.0, demand - new)
+        self.coverage_df.iat[row, self._columns["over"]] = max(0.0, new - demand)
+        if self.hours_df is not None:
+            self.hours_df.iat[i, self._columns["total_hours"]] += step
+        # A cell switched back to its solved value is no longer an edit
+        self.changed ^= {(i, j, k)}
+        return True
+
+    @property
+    def edits(self):
+        """Cells that differ from the solved roster."""
+        return len(self.changed)
+
+    def apply_edits(self, i, edited_rows, columns):
+        """
+        Worker W[i]'s cells from a data_editor state over the solved grid:
+        {day position: {column label: worked}}, columns = the slot labels.
+        Returns the number of cells that changed.
+        """
+        changed = 0
+        for j, cells in edited_rows.items():
+            for label, value in cells.items():
+                changed += self.set_cell(i, int(j), list(columns).index(label), bool(value))
+        return changed
+
+    def schedule(self):
+        """The edited roster as (w, d, t) rows."""
+        return self.roster.rows()
+
+    def violations(self):
+        """Rules the edited roster breaks (validation.py records); [] without a validator."""
+        return [] if self.validate is None else self.validate(self.roster)
@@ -0,0 +1,157 @@
+import time
+
+import numpy as np
+
+from backends import solve_arrays
+from matrix_model import build_matrix_model, initial_values, matrix_schedule
+from progress import reached
+from shift_model import schedule_metrics
+from warm_start import repair_schedule
+
+# Lazy rows for the 12h rest and the closing cap. At the optimum almost all of
+# them are slack, so the matrix model is first built without them. Each
+# incumbent is checked with array arithmetic (rule_violations), only the rows
+# it breaks are appended, and the model is solved again from the incumbent
+# repaired to every rule, until an incumbent breaks none. The model without
+# the rows is a relaxation, so a clean optimum of it is an optimum of the full
+# model: the objective is the one the full model gives. Its optimum is also a
+# lower bound for the full model, so once the repaired incumbent (legal for
+# every row) meets it the loop stops there, and later rounds stop the solver
+# as soon as it reaches it.
+
+
+def rule_violations(b, C, T, rest_pairs=(), closing_slot=None, max_closings=2):
+    """
+    Broken lazy rows of a 0/1 array b[w, d, s] (d in consecutive days):
+    rest [(w, d, pair index)] for late on day d and early on d+1, and
+    closings [w] over the cap.
+    """
+    X = b @ C.astype(float)
+    rest = []
+    for k, (late, early) in enumerate(rest_pairs):
+        both = X[:, :-1, T.index(late)] + X[:, 1:, T.index(early)] > 1.5
+        rest += [(w, d, k) for w, d in np.argwhere(both).tolist()]
+    closings = []
+    if closing_slot is not None:
+        closings = np.flatnonzero(X[:, :, T.index(closing_slot)].sum(axis=1) > max_closings + 0.5).tolist()
+    return rest, closings
+
+
+def add_rows(mm, terms, upper):
+    """Append rows sum(x[cols]) <= upper (full-layout b columns; dropped ones are skipped)."""
+    index = np.full(mm["n_full"], -1)
+    index[mm["columns"]] = np.arange(len(mm["columns"]))
+    n_rows = mm["shape"][0]
+    rows, cols = [], []
+    for i, full in enumerate(terms):
+        kept = index[np.asarray(full)]
+        kept = kept[kept >= 0]
+        rows.append(np.full(len(kept), n_rows + i))
+        cols.append(kept)
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    mm.update(
+        rows=np.concatenate([mm["rows"], rows]),
+        cols=np.concatenate([mm["cols"], cols]),
+        vals=np.concatenate([mm["vals"], np.ones(len(cols))]),
+        row_lower=np.concatenate([mm["row_lower"], np.full(len(terms), -np.inf)]),
+        row_upper=np.concatenate([mm["row_upper"], np.asarray(upper, float)]),
+        shape=(n_rows + len(terms), mm["shape"][1]),
+    )
+
+
+def solve_lazy(
+    W, D, T, S, MinHw, MaxHw, Demand,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    candidates=None,
+    backend="auto",
+    time_limit=None,
+    initial_schedule=None,
+    target=None,
+    max_rounds=50,
+    on_iteration=None,
+):
+    """
+    Matrix model without the 12h-rest and closing rows, solved again with
+    the rows its incumbents break until one breaks none.
+    on_iteration(record) gets {"round", "objective", "rest_rows", "closing_rows", "rows", "elapsed"}.
+    Returns: status, objective, schedule(list of (w,d,t)), metrics dict
+    """
+    W = list(W); D = list(D); T = list(T); S = list(S)
+    rest_pairs = [(late, early) for late, early in rest_pairs if late in T and early in T]
+    if closing_slot not in T:
+        closing_slot = None
+    rules = dict(Max_Deviation=Max_Deviation, rest_pairs=rest_pairs, closing_slot=closing_slot,
+                 max_closings=max_closings, weekend_only=weekend_only, weekend_days=weekend_days,
+                 require_min_staff=require_min_staff)
+    mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand, candidates=candidates,
+                            **dict(rules, rest_pairs=(), closing_slot=None))
+    C = np.array([[s <= t <= e for t in T] for s, e in S])
+    late_s = [np.flatnonzero(C[:, T.index(late)]) for late, _ in rest_pairs]
+    early_s = [np.flatnonzero(C[:, T.index(early)]) for _, early in rest_pairs]
+    close_s = np.flatnonzero(C[:, T.index(closing_slot)]) if closing_slot is not None else None
+    nD, nS = len(D), len(S)
+    start = time.time()
+    added = {"rest": set(), "closings": set()}
+
+    def column(w, d, s):
+        return (w * nD + d) * nS + s
+
+    def repaired(schedule):
+        """(objective, schedule, metrics) of a schedule repaired to every rule, or None."""
+        legal = repair_schedule(schedule, W, D, T, S, MinHw, MaxHw, Demand, **rules)
+        if legal is None:
+            return None
+        objective, metrics = schedule_metrics(legal, D, T, Demand)
+        return objective, legal, metrics
+
+    best = repaired(initial_schedule) if initial_schedule else None
+    for round_ in range(max_rounds):
+        x0 = initial_values(mm, best[1]) if best is not None else None
+        left = None if time_limit is None else max(1, time_limit - (time.time() - start))
+        began = time.time()
+        status, x = solve_arrays(mm, backend=backend, time_limit=left, x0=x0, target=target)
+        if x is None or status != "Optimal":
+            if best is not None and status != "Infeasible":
+                break
+            return status, None, [], {}
+        objective = float(mm["c"] @ x)
+        schedule, metrics = matrix_schedule(mm, x)
+        # Solved to the end (CBC reports a timed-out incumbent as optimal too):
+        # a lower bound for the full model
+        finished = left is None or time.time() - began < left - 1
+        if finished:
+            target = objective if target is None else max(target, objective)
+        full = np.zeros(mm["n_full"])
+        full[mm["columns"]] = x
+        b = (full[:len(W) * nD * nS].reshape(len(W), nD, nS) > 0.5).astype(float)
+        rest, closings = rule_violations(b, C, T, rest_pairs, closing_slot, max_closings)
+        rest = [r for r in rest if r not in added["rest"]]
+        closings = [w for w in closings if w not in added["closings"]]
+        if on_iteration is not None:
+            on_iteration({"round": round_ + 1, "objective": objective, "rest_rows": len(rest),
+                          "closing_rows": len(closings), "rows": mm["shape"][0], "elapsed": time.time() - start})
+        candidate = (objective, schedule, metrics) if not rest and not closings else repaired(schedule)
+        if candidate is not None and (best is None or candidate[0] < best[0]):
+            best = candidate
+        if not rest and not closings:
+            return ("Optimal" if finished else "Feasible",) + best
+        if best is not None and reached(best[0], target):
+            return ("Optimal",) + best
+        terms = [np.concatenate([column(w, d, late_s[k]), column(w, d + 1, early_s[k])]) for w, d, k in rest]
+        terms += [np.concatenate([column(w, d, close_s) for d in range(nD)]) for w in closings]
+        add_rows(mm, terms, [1.0] * len(rest) + [max_closings] * len(closings))
+        added["rest"].update(rest)
+        added["closings"].update(closings)
+        if time_limit is not None and time.time() - start >= time_limit:
+            break
+
+    # Out of rounds or time: the best incumbent repaired to every rule
+    if best is None:
+        return "Not Solved", None, [], {}
+    return ("Feasible",) + best
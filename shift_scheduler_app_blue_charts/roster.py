@@ -0,0 +1,149 @@
+import numpy as np
+
+# Compact weekly roster: one slot bitmask per (worker, day), bit i set when
+# slot T[i] is worked (0 on a day off), in a uint16 array for days of up to 16
+# slots and uint32 up to 32. Engines and apps pass schedules around as lists
+# of (w, d, t) rows; Schedule converts to and from them and computes staffing,
+# under / over, weekly hours, closings and 12h-rest breaks as whole-array
+# operations, so post-processing stays instant for hundreds of workers.
+# T is a run of consecutive slots, as everywhere else.
+
+# Set bits of every byte value (popcount of a mask array through its bytes)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+
+def shift_mask(se, first):
+    """Bitmask of a shift's slots (bit i is slot first + i); 0 for a day off."""
+    if se is None:
+        return 0
+    return ((1 << (se[1] - se[0] + 1)) - 1) << (se[0] - first)
+
+
+def mask_dtype(n_slots):
+    """Smallest unsigned dtype with a bit per slot."""
+    for dtype in (np.uint16, np.uint32):
+        if n_slots <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"Schedule holds at most 32 slots per day, got {n_slots}")
+
+
+class Schedule:
+    """Weekly roster: masks[i, j] is the slot bitmask of worker W[i] on day D[j]."""
+
+    def __init__(self, W, D, T, masks=None):
+        self.W = list(W); self.D = list(D); self.T = list(T)
+        shape = (len(self.W), len(self.D))
+        dtype = mask_dtype(len(self.T))
+        self.masks = np.zeros(shape, dtype=dtype) if masks is None else np.array(masks, dtype=dtype)
+        if self.masks.shape != shape:
+            raise ValueError(f"masks should have shape {shape}, got {self.masks.shape}")
+
+    @classmethod
+    def from_spans(cls, workers, days, starts, ends, W, D, T):
+        """
+        Schedule from parallel sequences of (worker, day, first slot, last
+        slot). Spans are clipped to T; rows for workers or days outside W / D
+        are dropped.
+        """
+        roster = cls(W, D, T)
+        if len(workers) == 0:
+            return roster
+        w_index = {w: i for i, w in enumerate(roster.W)}
+        d_index = {d: j for j, d in enumerate(roster.D)}
+        wi = np.array([w_index.get(w, -1) for w in workers])
+        dj = np.array([d_index.get(d, -1) for d in days])
+        first = roster.T[0]
+        s = np.clip(np.asarray(starts, dtype=np.int64) - first, 0, None)
+        e = np.clip(np.asarray(ends, dtype=np.int64) - first, None, len(roster.T) - 1)
+        keep = (wi >= 0) & (dj >= 0) & (s <= e)
+        s, e = s[keep].astype(np.uint64), e[keep].astype(np.uint64)
+        one = np.uint64(1)
+        spans = ((one << (e - s + one)) - one) << s
+        np.bitwise_or.at(roster.masks, (wi[keep], dj[keep]), spans.astype(roster.masks.dtype))
+        return roster
+
+    @classmethod
+    def from_rows(cls, rows, W, D, T):
+        """Schedule from (w, d, t) rows."""
+        rows = list(rows)
+        workers, days, slots = zip(*rows) if rows else ((), (), ())
+        return cls.from_spans(workers, days, slots, slots, W, D, T)
+
+    @classmethod
+    def from_patterns(cls, patterns, W, D, T):
+        """Schedule from {w: pattern} (a shift (s, e) or None per day, as in patterns.py)."""
+        roster = cls(W, D, T)
+        for i, w in enumerate(roster.W):
+            roster.masks[i] = [shift_mask(se, roster.T[0]) for se in patterns[w]]
+        return roster
+
+    def grid(self):
+        """0/1 array [worker, day, slot]."""
+        bits = np.arange(len(self.T), dtype=self.masks.dtype)
+        return ((self.masks[:, :, None] >> bits) & 1).astype(np.int64)
+
+    def rows(self):
+        """(w, d, t) rows, by worker, day and slot."""
+        return [(self.W[i], self.D[j], self.T[k]) for i, j, k in np.argwhere(self.grid()).tolist()]
+
+    def staffed(self):
+        """Workers on each [day, slot]."""
+        return self.grid().sum(axis=0)
+
+    def demand_array(self, Demand):
+        """Demand[d][t-1] as a float [day, slot] array."""
+        return np.array([[float(Demand[d][k]) for k in range(len(self.T))] for d in self.D])
+
+    def coverage(self, Demand):
+        """(under, over, staffed, demand) [day, slot] arrays."""
+        staffed = self.staffed()
+        demand = self.demand_array(Demand)
+        return np.maximum(0.0, demand - staffed), np.maximum(0.0, staffed - demand), staffed, demand
+
+    def coverage_columns(self, Demand):
+        """Flat day, slot, staffed, demand, under and over columns by day and slot (for a DataFrame)."""
+        under, over, staffed, demand = self.coverage(Demand)
+        return {"day": np.repeat(self.D, len(self.T)), "slot": np.tile(self.T, len(self.D)),
+                "staffed": staffed.ravel(), "demand": demand.ravel(), "under": under.ravel(), "over": over.ravel()}
+
+    def deviation(self, Demand):
+        """Total under + over."""
+        under, over, _, _ = self.coverage(Demand)
+        return float((under + over).sum())
+
+    def metrics(self, Demand):
+        """{(d, t): (under, over, staffed, demand)}, as shift_model.schedule_metrics."""
+        under, over, staffed, demand = (a.tolist() for a in self.coverage(Demand))
+        return {(d, t): (under[j][k], over[j][k], staffed[j][k], demand[j][k])
+                for j, d in enumerate(self.D) for k, t in enumerate(self.T)}
+
+    def day_hours(self):
+        """Worked slots per [worker, day] (popcount of the masks)."""
+        masks = np.ascontiguousarray(self.masks)
+        return _POPCOUNT[masks.view(np.uint8)].reshape(len(self.W), len(self.D), -1).sum(axis=2)
+
+    def hours(self):
+        """Weekly hours (worked slots) per worker."""
+        return self.day_hours().sum(axis=1)
+
+    def contiguous(self):
+        """[worker, day] True where the worked slots form one run (or none)."""
+        lowest = self.masks & (~self.masks + self.masks.dtype.type(1))
+        return (self.masks + lowest) & self.masks == 0
+
+    def closings(self, closing_slot):
+        """Shifts covering closing_slot per worker (0 if it is not in T)."""
+        if closing_slot not in self.T:
+            return np.zeros(len(self.W), dtype=np.int64)
+        k = self.masks.dtype.type(self.T.index(closing_slot))
+        return ((self.masks >> k) & 1).sum(axis=1).astype(np.int64)
+
+    def rest_violations(self, rest_pairs):
+        """[worker, day] True where a late slot on D[j] meets its early slot on D[j+1]."""
+        broken = np.zeros((len(self.W), max(0, len(self.D) - 1)), dtype=bool)
+        for late, early in rest_pairs:
+            if late in self.T and early in self.T:
+                li = self.masks.dtype.type(self.T.index(late))
+                ei = self.masks.dtype.type(self.T.index(early))
+                broken |= ((self.masks[:, :-1] >> li) & (self.masks[:, 1:] >> ei) & 1).astype(bool)
+        return broken
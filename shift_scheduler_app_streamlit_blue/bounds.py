@@ -0,0 +1,76 @@
+import math
+
+import numpy as np
+
+from backends import solve_arrays
+
+# Lower bounds on the total deviation, computed before the MIP runs. Headcount
+# in a slot is an integer between the min-staff rule (1) and the staff who may
+# work that day, so a slot's deviation is at least the distance from its
+# fractional demand to the nearest such integer (the analytic bound, a sum
+# over slots). The LP relaxation of the lean model, with those distances added
+# as cuts under + over >= distance, is tighter. The optimizers stop the solver
+# as soon as its incumbent reaches the larger of the two.
+
+def slot_distances(W, D, T, Demand, require_min_staff=True, weekend_only=(), weekend_days=(5, 6, 7)):
+    """{(d, t): distance from Demand[d][t-1] to the nearest headcount slot (d, t) can have}"""
+    distances = {}
+    lowest = 1 if require_min_staff else 0
+    for d in D:
+        highest = sum(1 for w in W if w not in weekend_only or d in weekend_days)
+        for i, t in enumerate(T):
+            demand = Demand[d][i]
+            if highest < lowest:
+                distances[(d, t)] = math.inf
+                continue
+            staffed = (min(max(n, lowest), highest) for n in (math.floor(demand), math.ceil(demand)))
+            distances[(d, t)] = min(abs(n - demand) for n in staffed)
+    return distances
+
+
+def objective_bounds(mm, backend="auto"):
+    """
+    Analytic and LP lower bounds for a matrix model (matrix_model.py).
+    Returns {"analytic", "lp", "lower_bound", "infeasible"}; "lp" is None
+    when the LP relaxation has no solution, and "infeasible" is True when it
+    (and so the model) is proven infeasible. backend=None (no solver
+    installed) skips the LP and gives the analytic bound alone.
+    """
+    inst, rules = mm["instance"], mm["rules"]
+    D, T = inst["D"], inst["T"]
+    distances = slot_distances(inst["W"], D, T, inst["Demand"],
+                               require_min_staff=rules.get("require_min_staff", True),
+                               weekend_only=set(rules.get("weekend_only", ())),
+                               weekend_days=rules.get("weekend_days", (5, 6, 7)))
+    analytic = sum(distances.values())
+    if math.isinf(analytic):
+        # A slot that cannot be staffed at all
+        return {"analytic": analytic, "lp": None, "lower_bound": analytic, "infeasible": True}
+    if backend is None:
+        return {"analytic": analytic, "lp": None, "lower_bound": analytic, "infeasible": False}
+
+    # LP relaxation plus one row per slot: under + over >= distance
+    n_rows, n_cols = mm["shape"]
+    n_dev = len(D) * len(T)
+    under0, over0 = n_cols - 2 * n_dev, n_cols - n_dev
+    dev = np.arange(n_dev)
+    lp = dict(
+        mm,
+        rows=np.concatenate([mm["rows"], n_rows + dev, n_rows + dev]),
+        cols=np.concatenate([mm["cols"], under0 + dev, over0 + dev]),
+        vals=np.concatenate([mm["vals"], np.ones(2 * n_dev)]),
+        row_lower=np.concatenate([mm["row_lower"], [distances[(d, t)] for d in D for t in T]]),
+        row_upper=np.concatenate([mm["row_upper"], np.full(n_dev, math.inf)]),
+        integrality=np.zeros_like(mm["integrality"]),
+        shape=(n_rows + n_dev, n_cols),
+    )
+    status, x = solve_arrays(lp, backend=backend)
+    lp_value = float(mm["c"] @ x) if status == "Optimal" and x is not None else None
+    lower_bound = analytic if lp_value is None else max(analytic, lp_value)
+    return {"analytic": analytic, "lp": lp_value, "lower_bound": lower_bound,
+            "infeasible": status == "Infeasible"}
+
+
+def describe_bounds(bounds):
+    lp = "infeasible" if bounds["infeasible"] else "-" if bounds["lp"] is None else f"{bounds['lp']:.2f}"
+    return f"Lower bounds: analytic {bounds['analytic']:.2f}, LP {lp}"
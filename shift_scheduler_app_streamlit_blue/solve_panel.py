@@ -0,0 +1,42 @@
+import time
+
+import streamlit as st
+
+# Live progress panel for a progress.SolveJob. A click on the stop button
+# reruns the script; the job keeps running in its thread, so the rerun finds it
+# in st.session_state, stops it and follows it until CBC / HiGHS hands back the
+# best roster so far.
+
+
+def _value(x, fmt="{:.2f}"):
+    return "–" if x is None else fmt.format(x)
+
+
+def follow_solve(job, poll=0.5):
+    """Show the job's incumbent, bound, gap and nodes until it finishes; returns its result."""
+    if not job.done():
+        if st.button("Stop and use current best", key="stop_solve"):
+            job.stop()
+        panel = st.empty()
+        while not job.done():
+            event = job.latest() or {}
+            with panel.container():
+                cols = st.columns(5)
+                cols[0].metric("Best roster (deviation)", _value(event.get("incumbent")))
+                cols[1].metric("Lower bound", _value(event.get("bound")))
+                cols[2].metric("Gap", _value(event.get("gap"), "{:.2%}"))
+                cols[3].metric("Nodes", event.get("nodes", 0))
+                cols[4].metric("Elapsed", _value(event.get("elapsed"), "{:.1f} s"))
+                bounds = next((e for e in job.events if "lp_bound" in e), None)
+                if bounds is not None:
+                    st.caption(f"Lower bounds before search: analytic {_value(bounds['analytic_bound'])}, "
+                               f"LP {_value(bounds['lp_bound'])}; the solver stops once the best roster reaches them")
+                if job.stopping():
+                    st.caption("Stopping: waiting for the solver to hand back its best roster...")
+                elif not event:
+                    st.caption("Solving: building the model...")
+            time.sleep(poll)
+        panel.empty()
+    if job.error is not None:
+        raise job.error
+    return job.result
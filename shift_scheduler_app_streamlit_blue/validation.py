@@ -0,0 +1,121 @@
+import math
+
+import numpy as np
+
+from roster import Schedule
+
+# Schedule validator: every rule the model holds, checked on a finished
+# schedule (solver output, a manual edit or an imported CSV) without building
+# a model. The week becomes a roster.Schedule of slot bitmasks and each rule
+# is one or two array operations over all workers at once, so a store-sized
+# week is checked in well under a millisecond. Violations come back as records
+# {"rule", "worker", "day", "slot", "detail"} (None where a field does not
+# apply), in the order of RULES; describe_violations() turns them into text.
+
+RULES = {
+    "row": "row outside the staff, days or slots",
+    "shift": "one shift of min_len..max_len consecutive slots per day",
+    "hours": "weekly hours within MinHw..MaxHw",
+    "rest_days": "two consecutive days off",
+    "rest_12h": "12h rest between a late and the next day's early slot",
+    "closings": "at most max_closings closing shifts",
+    "weekend_only": "weekend-only contracts work weekend days only",
+    "deviation": "staffing within Max_Deviation of demand",
+    "min_staff": "at least one worker per slot",
+}
+
+
+def _record(rule, worker=None, day=None, slot=None, detail=""):
+    return {"rule": rule, "worker": worker, "day": day, "slot": slot, "detail": detail}
+
+
+def schedule_violations(
+    schedule, W, D, T, MinHw, MaxHw,
+    Demand=None,
+    Max_Deviation=2.5,
+    rest_pairs=(),
+    closing_slot=None,
+    max_closings=2,
+    weekend_only=(),
+    weekend_days=(5, 6, 7),
+    require_min_staff=True,
+    min_len=4,
+    max_len=8,
+):
+    """
+    Broken rules of a schedule: (w, d, t) rows or a roster.Schedule.
+    The coverage rules (deviation, min_staff) are checked only with Demand
+    (Demand[d] aligned with T).
+    Returns a list of {"rule", "worker", "day", "slot", "detail"}, empty if
+    the schedule is legal.
+    """
+    out = []
+    if isinstance(schedule, Schedule):
+        roster = schedule
+    else:
+        rows = list(schedule)
+        known_w, known_d, known_t = set(W), set(D), set(T)
+        for w, d, t in rows:
+            if w not in known_w or d not in known_d or t not in known_t:
+                out.append(_record("row", w, d, t, "not a listed worker, day or slot"))
+        roster = Schedule.from_rows(rows, W, D, T)
+    W, D, T = roster.W, roster.D, roster.T
+    masks = roster.masks
+    length = roster.day_hours()
+
+    # One shift a day: a single run of min_len..max_len slots
+    worked = masks != 0
+    for i, j in np.argwhere(worked & ~roster.contiguous()).tolist():
+        out.append(_record("shift", W[i], D[j], None, "worked slots are not one consecutive run"))
+    for i, j in np.argwhere(worked & roster.contiguous() & ((length < min_len) | (length > max_len))).tolist():
+        out.append(_record("shift", W[i], D[j], None, f"{length[i, j]} h shift, outside {min_len}..{max_len} h"))
+
+    # Weekly hours, whole slots within [MinHw, MaxHw]
+    hours = length.sum(axis=1)
+    low = np.array([math.ceil(MinHw[w] - 1e-9) for w in W])
+    high = np.array([math.floor(MaxHw[w] + 1e-9) for w in W])
+    for i in np.flatnonzero((hours < low) | (hours > high)).tolist():
+        out.append(_record("hours", W[i], detail=f"{hours[i]} h, outside {MinHw[W[i]]:g}..{MaxHw[W[i]]:g} h"))
+
+    # Two consecutive days off (D in consecutive order)
+    off = ~worked
+    rested = (off[:, :-1] & off[:, 1:]).any(axis=1) if len(D) > 1 else np.ones(len(W), dtype=bool)
+    for i in np.flatnonzero(~rested).tolist():
+        out.append(_record("rest_days", W[i], detail="no two consecutive days off"))
+
+    for i, j in np.argwhere(roster.rest_violations(rest_pairs)).tolist():
+        out.append(_record("rest_12h", W[i], D[j], None, f"late shift on day {D[j]}, early shift on day {D[j + 1]}"))
+
+    closings = roster.closings(closing_slot)
+    for i in np.flatnonzero(closings > max_closings).tolist():
+        out.append(_record("closings", W[i], slot=closing_slot,
+                           detail=f"{closings[i]} closing shifts, at most {max_closings}"))
+
+    weekend_only = set(weekend_only)
+    weekday = np.array([d not in weekend_days for d in D])
+    restricted = np.array([w in weekend_only for w in W])
+    for i, j in np.argwhere(worked & weekday[None, :] & restricted[:, None]).tolist():
+        out.append(_record("weekend_only", W[i], D[j], None, "weekend-only contract on a weekday"))
+
+    if Demand is not None:
+        under, over, staffed, demand = roster.coverage(Demand)
+        for j, k in np.argwhere(under + over > Max_Deviation + 1e-9).tolist():
+            out.append(_record("deviation", day=D[j], slot=T[k],
+                               detail=f"{staffed[j, k]} staff for demand {demand[j, k]:g}"))
+        if require_min_staff:
+            for j, k in np.argwhere(staffed < 1).tolist():
+                out.append(_record("min_staff", day=D[j], slot=T[k], detail="nobody on"))
+    return out
+
+
+def describe_violations(violations):
+    """One line per violation, e.g. 'rest_12h: Ana, day 3: late shift on day 3, early shift on day 4'."""
+    lines = []
+    for v in violations:
+        where = ", ".join(str(part) for part in (
+            v["worker"],
+            None if v["day"] is None else f"day {v['day']}",
+            None if v["slot"] is None else f"slot {v['slot']}",
+        ) if part is not None)
+        lines.append(f"{v['rule']}: {where + ': ' if where else ''}{v['detail']}")
+    return lines
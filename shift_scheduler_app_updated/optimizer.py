@@ -1,75 +1,317 @@
-
-import pulp
+import functools
 import time
 
-def build_and_solve_shift_model(W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=2.5, time_limit=120):
-    model = pulp.LpProblem("Shift_Scheduling", pulp.LpMinimize)
-
-    x = pulp.LpVariable.dicts("x", (W,D,T), cat="Binary")
-    y = pulp.LpVariable.dicts("y", (W,D), cat="Binary")
-    z = pulp.LpVariable.dicts("z", (W,range(1,7)), cat="Binary")
-    b = pulp.LpVariable.dicts("b", (W,D,S), cat="Binary")
-    under = pulp.LpVariable.dicts("under", (D,T), lowBound=0)
-    over = pulp.LpVariable.dicts("over", (D,T), lowBound=0)
-
-    model += pulp.lpSum([under[d][t] + over[d][t] for d in D for t in T])
-
-    for w in W:
-        for d in D:
-            model += pulp.lpSum([x[w][d][t] for t in T]) >= 4*y[w][d]
-            model += pulp.lpSum([x[w][d][t] for t in T]) <= 8*y[w][d]
-
-    for w in W:
-        model += pulp.lpSum([x[w][d][t] for d in D for t in T]) >= MinHw[w]
-        model += pulp.lpSum([x[w][d][t] for d in D for t in T]) <= MaxHw[w]
-
-    for w in W:
-        model += pulp.lpSum([z[w][d] for d in range(1,7)]) == 1
-        for d in range(1,7):
-            model += z[w][d] <= 1 - y[w][d]
-            model += z[w][d] <= 1 - y[w][d+1]
-
-    for w in W:
-        for d in range(1,7):
-            for t in range(13,16):
-                model += x[w][d][t] + x[w][d+1][t-12] <= 1
-
-    for w in W:
-        model += pulp.lpSum([x[w][d][15] for d in D]) <= 2
-
-    for d in D:
-        for t in T:
-            model += pulp.lpSum([x[w][d][t] for w in W]) + under[d][t] - over[d][t] == Demand[d][t-1]
-            model += under[d][t] + over[d][t] <= Max_Deviation
-            model += pulp.lpSum([x[w][d][t] for w in W]) >= 1
-
-    for w in W:
-        for d in D:
-            model += pulp.lpSum([b[w][d][s,e] for (s,e) in S]) <= 1
-            for t in T:
-                model += x[w][d][t] == pulp.lpSum([b[w][d][s,e] for (s,e) in S if s<=t<=e])
-            model += y[w][d] == pulp.lpSum([b[w][d][s,e] for (s,e) in S])
-
-    for w in W:
-        if MinHw[w] == 15:
-            for d in D:
-                if d not in [5,6,7]:
-                    model += y[w][d] == 0
+from aggregated import solve_aggregated
+from backends import select_backend, solve_matrix_model
+from bounds import objective_bounds
+from column_generation import solve_columns
+from diagnosis import diagnose_infeasibility
+from greedy import greedy_schedule
+from lagrangian import solve_lagrangian
+from lazy import solve_lazy
+from lns import solve_lns
+from local_search import solve_local_search
+from matrix_model import build_matrix_model
+from multilevel import solve_multilevel
+from portfolio import solve_portfolio
+from progress import gap_stopped, progress_event, reached, with_lower_bound
+from reduction import candidate_shifts, describe_candidates
+from schedule_model import checkin_model, checkout_model
+from screening import screen_instance
+from shift_model import build_shift_set
+from two_stage import solve_two_stage
+from validation import schedule_violations
+
+# Alcazar rules: 15 slots (10:00..01:00)
+# - 12h rest: slots 13..15 (late) vs next-day slots 1..3 (early)
+# - Max 2 closing shifts at slot 15
+# - 15h contracts work Fri/Sat/Sun only
+REST_PAIRS = [(13, 1), (14, 2), (15, 3)]
+CLOSING_SLOT = 15
+WEEKEND_DAYS = [5, 6, 7]
+
+def build_and_solve_shift_model(W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=2.5, time_limit=120,
+                                formulation="lean", engine="mip", initial_schedule=None, on_iteration=None,
+                                backend="auto", gap=None, on_progress=None, stop=None,
+                                diagnose=False, prune="exact"):
+    # Optimizer expects Demand[d][t-1]
+    Demand_T = {d: [Demand[d][t-1] for t in T] for d in D}
+    weekend_only = [w for w in W if MinHw[w] == 15]
+
+    rules = dict(
+        Max_Deviation=Max_Deviation,
+        rest_pairs=REST_PAIRS,
+        closing_slot=CLOSING_SLOT,
+        weekend_only=weekend_only,
+        weekend_days=WEEKEND_DAYS,
+        require_min_staff=True,
+    )
 
+    # Screening (screening.py): inputs the rows cannot satisfy are rejected
+    # with diagnostics before any model is built
     start_time = time.time()
-    result_status = model.solve(pulp.PULP_CBC_CMD(msg=True, timeLimit=time_limit))
-    end_time = time.time()
+    problems = screen_instance(W, D, T, S, MinHw, MaxHw, Demand_T, **rules)
+    if problems:
+        return {
+            "status": "Infeasible",
+            "objective": None,
+            "elapsed_time": time.time() - start_time,
+            "schedule": [],
+            "diagnostics": problems,
+            "diagnosed_by": "screening"
+        }
 
-    schedule = []
-    for w in W:
-        for d in D:
-            for t in T:
-                if pulp.value(x[w][d][t]) > 0.5:
-                    schedule.append((w, d, t))
+    # Heuristic shift prune (reduction.py): if it removed shifts the rows need,
+    # the instance is solved again with the exact candidates
+    exact = functools.partial(
+        build_and_solve_shift_model, W, D, T, S, MinHw, MaxHw, Demand, Max_Deviation=Max_Deviation,
+        time_limit=time_limit, formulation=formulation, engine=engine, initial_schedule=initial_schedule,
+        on_iteration=on_iteration, backend=backend, gap=gap, on_progress=on_progress, stop=stop,
+        diagnose=diagnose, prune="exact")
 
-    return {
-        "status": pulp.LpStatus[model.status],
-        "objective": pulp.value(model.objective),
-        "elapsed_time": end_time - start_time,
-        "schedule": schedule
+    def diagnosed(result):
+        if prune == "demand" and result["status"] == "Infeasible":
+            return exact()
+        # The rows conflict after all: one elastic solve (diagnosis.py) names
+        # the constraint groups to relax
+        if diagnose and result["status"] == "Infeasible":
+            result["diagnostics"] = diagnose_infeasibility(W, D, T, S, MinHw, MaxHw, Demand_T,
+                                                           backend=backend, **rules)[0]
+            result["diagnosed_by"] = "diagnosis"
+        return result
+
+    if engine == "multilevel":
+        # Two-slot blocks first, then the slot model on shifts near that roster
+        start_time = time.time()
+        status, objective, schedule, _ = solve_multilevel(W, D, T, S, MinHw, MaxHw, Demand_T,
+                                                          time_limit=time_limit, backend=backend,
+                                                          on_iteration=on_iteration, **rules)
+        return diagnosed({
+            "status": status,
+            "objective": objective,
+            "elapsed_time": time.time() - start_time,
+            "schedule": schedule
+        })
+
+    # Greedy rosters: the quick preview engine, the default MIP start and the
+    # fallback when CBC is missing or returns no incumbent
+    start_time = time.time()
+    status, objective, greedy, _ = greedy_schedule(W, D, T, S, MinHw, MaxHw, Demand_T, **rules)
+    fallback = {
+        "status": status,
+        "objective": objective,
+        "elapsed_time": time.time() - start_time,
+        "schedule": greedy
     }
+    if engine == "greedy":
+        return fallback
+
+    backend = select_backend(backend)
+    if backend is None and engine != "local_search":
+        # No solver installed: degraded mode
+        return fallback
+
+    # Model reduction (reduction.py): b columns only for each (worker, day)'s
+    # candidate shifts, none on a weekend-only worker's weekdays, always
+    # including the MIP start's
+    build_start = time.time()
+    candidates = candidate_shifts(W, D, T, S, MinHw, MaxHw, Demand_T, prune=prune,
+                                  required=greedy if initial_schedule is None else initial_schedule, **rules)
+    reduced = describe_candidates(candidates, S)
+
+    if engine == "two_stage":
+        # Shift counts per day first, then the lean model on the shifts they
+        # use (two_stage.py); the full model only finishes what they leave open
+        start_time = time.time()
+        status, objective, schedule, _, lower_bound = solve_two_stage(
+            W, D, T, S, MinHw, MaxHw, Demand_T, time_limit=time_limit, backend=backend, candidates=candidates,
+            initial_schedule=greedy if initial_schedule is None else initial_schedule,
+            on_iteration=on_iteration, **rules)
+        if objective is None and status != "Infeasible" and greedy:
+            # The counts' bound holds for the greedy fallback too
+            return dict(fallback, lower_bound=lower_bound, candidates=reduced)
+        return diagnosed({
+            "status": status,
+            "objective": objective,
+            "elapsed_time": time.time() - start_time,
+            "schedule": schedule,
+            "lower_bound": lower_bound,
+            "candidates": reduced
+        })
+
+    # Lower bounds (bounds.py) on the matrix model: an infeasible LP relaxation
+    # ends the solve here, a greedy roster that meets the bound is already
+    # optimal, and the solvers stop as soon as their incumbent meets it
+    mm = build_matrix_model(W, D, T, S, MinHw, MaxHw, Demand_T, candidates=candidates, **rules)
+    bounds = objective_bounds(mm, backend=backend)
+    build_time = time.time() - build_start
+    found = {"candidates": reduced, "bounds": bounds, "analytic_bound": bounds["analytic"], "lp_bound": bounds["lp"]}
+    if bounds["infeasible"]:
+        return diagnosed(dict(status="Infeasible", objective=None, elapsed_time=0.0, build_time=build_time,
+                              schedule=[], **found))
+    target = bounds["lower_bound"]
+    if fallback["status"] == "Feasible" and reached(fallback["objective"], target):
+        return dict(fallback, status="Optimal", build_time=build_time, **found)
+    if on_progress is not None:
+        incumbent = fallback["objective"] if fallback["status"] == "Feasible" else None
+        on_progress(dict(progress_event(incumbent, target, 0, 0.0),
+                         analytic_bound=bounds["analytic"], lp_bound=bounds["lp"]))
+        on_progress = with_lower_bound(on_progress, target)
+
+    def mip_status(status, objective):
+        # A solver stopped at `gap` says "Optimal" too: only the bound proves it
+        if gap_stopped(status, objective, gap, target):
+            found["gap_stopped"] = True
+            return "Feasible"
+        return status
+
+    # Engines outside the MIP below: they start from the greedy roster (or
+    # initial_schedule), stop at the bound above, the time limit or `stop`,
+    # and report each iteration to on_progress too; history keeps them
+    if engine in ("aggregated", "columns", "lns", "local_search", "lagrangian"):
+        start = greedy if initial_schedule is None else initial_schedule
+        history = []
+
+        def report(record):
+            history.append(record)
+            if on_iteration is not None:
+                on_iteration(record)
+            if on_progress is not None:
+                on_progress(progress_event(record["objective"], record.get("lower_bound"), 0, record["elapsed"]))
+
+        start_time = time.time()
+        extra = {}
+        if engine in ("aggregated", "columns"):
+            # Weekly patterns: integer counts per contract class (same
+            # MinHw/MaxHw) or one roster column per worker
+            solve = solve_aggregated if engine == "aggregated" else solve_columns
+            result = solve(W, D, T, S, MinHw, MaxHw, Demand_T, time_limit=time_limit, initial_schedule=start,
+                           backend=backend, gap=gap, stop=stop, **rules)
+        elif engine == "lns":
+            # Large-neighbourhood search: re-optimise a few workers or two days
+            # at a time around the incumbent
+            result = solve_lns(W, D, T, S, MinHw, MaxHw, Demand_T, time_limit=time_limit, initial_schedule=start,
+                               on_iteration=report, target=target, backend=backend, stop=stop, **rules)
+        elif engine == "local_search":
+            # Annealing over the roster (no MIP solver: it also runs without a
+            # backend, on the analytic bound)
+            result = solve_local_search(W, D, T, S, MinHw, MaxHw, Demand_T, time_limit=time_limit,
+                                        initial_schedule=start, target=target, on_iteration=report, stop=stop,
+                                        **rules)
+        else:
+            # Weekly rows relaxed, one MIP per day in a process pool; it stops
+            # once the repaired roster meets the dual bound or the bound above
+            result = solve_lagrangian(W, D, T, S, MinHw, MaxHw, Demand_T, time_limit=time_limit, target=target,
+                                      on_iteration=report, backend=backend, stop=stop, **rules)
+            extra["lower_bound"] = result[4]
+        return diagnosed({
+            "status": result[0],
+            "objective": result[1],
+            "elapsed_time": time.time() - start_time,
+            "build_time": build_time,
+            "schedule": result[2],
+            "history": history,
+            **extra,
+            **found
+        })
+
+    if engine == "lazy":
+        # 12h-rest and closing rows only where an incumbent breaks them (lazy.py)
+        start_time = time.time()
+        status, objective, schedule, _ = solve_lazy(
+            W, D, T, S, MinHw, MaxHw, Demand_T, candidates=candidates, backend=backend, time_limit=time_limit,
+            initial_schedule=greedy if initial_schedule is None else initial_schedule, target=target,
+            on_iteration=on_iteration, **rules)
+        if objective is None and status != "Infeasible" and greedy:
+            return dict(fallback, **found)
+        return diagnosed({
+            "status": status,
+            "objective": objective,
+            "elapsed_time": time.time() - start_time,
+            "build_time": build_time,
+            "schedule": schedule,
+            **found
+        })
+
+    if engine == "portfolio":
+        # Solver configurations (seeds, settings, CBC / HiGHS) raced on the matrix
+        # model, one process per core; the first to prove optimality stops the rest
+        start_time = time.time()
+        status, objective, schedule, _, report = solve_portfolio(
+            mm, time_limit=time_limit, initial_schedule=greedy if initial_schedule is None else initial_schedule,
+            incumbent=(fallback["status"], fallback["objective"], greedy, {}), on_result=on_iteration,
+            gap=gap, stop=stop, target=target)
+        return diagnosed({
+            "status": mip_status(status, objective),
+            "objective": objective,
+            "elapsed_time": time.time() - start_time,
+            "build_time": build_time,
+            "schedule": schedule,
+            "portfolio": report,
+            "winner": report["winner"],
+            **found
+        })
+
+    if engine == "matrix" or backend != "cbc":
+        # Lean model assembled with NumPy straight into sparse arrays; CBC reads
+        # them from an MPS file, HiGHS takes them in-process
+        start_time = time.time()
+        status, objective, schedule, _ = solve_matrix_model(
+            mm, backend=backend, time_limit=time_limit, msg=True,
+            initial_schedule=greedy if initial_schedule is None else initial_schedule,
+            gap=gap, on_progress=on_progress, stop=stop, target=target)
+        if objective is None and status != "Infeasible" and greedy:
+            return dict(fallback, **found)
+        return diagnosed({
+            "status": mip_status(status, objective),
+            "objective": objective,
+            "elapsed_time": time.time() - start_time,
+            "build_time": build_time,
+            "schedule": schedule,
+            **found
+        })
+
+    # Persistent model: built once per (days, slots, shifts, rules) and updated
+    # in place for the current staff, hours, demand and cap on later solves
+    build_start = time.time()
+    sm = checkout_model("Shift_Scheduling", W, D, T, S, MinHw, MaxHw, Demand_T,
+                        formulation=formulation, **rules)
+    sm.restrict_shifts(candidates)
+    build_time += time.time() - build_start
+
+    # MIP start from a previous (w, d, t) schedule repaired to the current rules,
+    # else from the greedy roster (CBC closes the gap faster from it than from
+    # the model's last optimum)
+    if initial_schedule is None:
+        initial_schedule = greedy
+    start_time = time.time()
+    status, objective, schedule, _ = sm.solve(time_limit=time_limit, msg=True, initial_schedule=initial_schedule,
+                                              gap=gap, on_progress=on_progress, stop=stop, target=target)
+    end_time = time.time()
+    checkin_model(sm)
+    if objective is None and status != "Infeasible" and greedy:
+        # CBC stopped without an incumbent: keep the greedy roster
+        return dict(fallback, **found)
+
+    return diagnosed({
+        "status": mip_status(status, objective),
+        "objective": objective,
+        "elapsed_time": end_time - start_time,
+        "build_time": build_time,
+        "schedule": schedule,
+        **found
+    })
+
+
+def validate_schedule(schedule, W, D, T, S, MinHw, MaxHw, Demand=None, Max_Deviation=2.5):
+    """
+    Alcazar rules a (w, d, t) schedule breaks (validation.py), e.g. after a
+    manual edit or a CSV import; shift lengths as in S, Demand[d][t-1] adds
+    the coverage rules.
+    """
+    Demand_T = None if Demand is None else {d: [Demand[d][t-1] for t in T] for d in D}
+    lengths = [e - s + 1 for s, e in S]
+    return schedule_violations(schedule, W, D, T, MinHw, MaxHw, Demand_T, Max_Deviation=Max_Deviation,
+                               rest_pairs=REST_PAIRS, closing_slot=CLOSING_SLOT,
+                               weekend_only=[w for w in W if MinHw[w] == 15], weekend_days=WEEKEND_DAYS,
+                               min_len=min(lengths), max_len=max(lengths))